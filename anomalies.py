@@ -0,0 +1,170 @@
+# anomalies.py
+#
+# Job em lote que pontua cada (Cliente, MÊS) com estatística robusta
+# (mediana/MAD) e grava o resultado por versão dos dados em .cache/anomalias/.
+# O dashboard lê o arquivo da versão atual (e calcula na hora se ainda não existir).
+#
+#   python anomalies.py [planilha.xlsx]   (sem argumento: última versão baixada do Drive)
+
+import os
+import pickle
+import sys
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from refresher import CACHE_DIR, SNAPSHOT_FILE
+
+ANOMALIAS_DIR = os.path.join(CACHE_DIR, "anomalias")
+LIMIAR = 3.5          # |z robusto| acima disso é anomalia (Iglewicz & Hoaglin)
+MIN_HISTORICO = 3     # meses mínimos de um cliente para comparar com o próprio histórico
+
+METRICAS = {
+    'Realizado': 'realização',
+    'Oportunidades': 'oportunidades',
+    'Gap': 'gap',
+}
+
+
+def _robust_z(valores, grupos):
+    """
+    z robusto de cada valor dentro do seu grupo: 0.6745 * (x - mediana) / MAD.
+
+    Quando o MAD é zero (mais da metade dos valores iguais), usa o desvio
+    absoluto médio: (x - mediana) / (1.2533 * MAD médio). Grupos sem dispersão
+    nenhuma ficam com z = 0.
+    """
+    mediana = valores.groupby(grupos).transform('median')
+    desvio = (valores - mediana).abs()
+    mad = desvio.groupby(grupos).transform('median')
+    mad_medio = desvio.groupby(grupos).transform('mean')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.where(mad > 0, 0.6745 * (valores - mediana) / mad,
+                     np.where(mad_medio > 0, (valores - mediana) / (1.2533 * mad_medio), 0.0))
+    return pd.Series(z, index=valores.index), mediana
+
+
+def score_anomalies(df):
+    """
+    Pontua todos os (Cliente, MÊS) de uma vez.
+
+    Para realização, oportunidades e gap calcula o z robusto entre os clientes
+    do mesmo mês e contra o histórico do próprio cliente, além de duas regras
+    diretas: realização caindo a zero em cliente que costuma realizar e pico
+    de oportunidades sem nenhuma realização.
+
+    Parâmetros:
+        df (DataFrame): Dataset limpo (SharedDataset.df).
+
+    Retorna:
+        DataFrame: Uma linha por (Cliente, MÊS) com valores, z-scores, score
+        (maior |z|) e `motivos` (vazio quando não há anomalia), ordenado por score.
+    """
+    base = pd.DataFrame({
+        'Cliente': df['Cliente'].to_numpy(),
+        'MÊS': df['MÊS'].to_numpy(),
+        'Realizado': df['Quantidade_iTRACKER'].to_numpy(dtype=float),
+        'Oportunidades': np.nansum(df[['Importação', 'Exportação', 'Cabotagem']].to_numpy(dtype=float), axis=1),
+        'Gap': df['Gap de Realização'].to_numpy(dtype=float),
+    }).dropna(subset=['MÊS'])
+    agg = base.groupby(['Cliente', 'MÊS'], sort=True).sum().reset_index()
+
+    meses_cliente = agg.groupby('Cliente')['MÊS'].transform('size')
+    com_historico = (meses_cliente >= MIN_HISTORICO).to_numpy()
+    motivos = np.full(len(agg), "", dtype=object)
+    z_max = np.zeros(len(agg))
+
+    def marcar(mask, texto):
+        motivos[mask] = motivos[mask] + texto + "; "
+
+    medianas_historico = {}
+    for col, nome in METRICAS.items():
+        z_clientes, _ = _robust_z(agg[col], agg['MÊS'])
+        z_historico, mediana = _robust_z(agg[col], agg['Cliente'])
+        z_historico = z_historico.where(com_historico, 0.0)
+        agg[f'z_{col}_clientes'] = z_clientes.round(2)
+        agg[f'z_{col}_historico'] = z_historico.round(2)
+        medianas_historico[col] = mediana
+        z_max = np.maximum(z_max, np.maximum(z_clientes.abs(), z_historico.abs()).to_numpy())
+        marcar((z_clientes.abs() > LIMIAR).to_numpy(), f"{nome} atípica entre os clientes do mês")
+        marcar((z_historico.abs() > LIMIAR).to_numpy(), f"{nome} fora do histórico do cliente")
+
+    sem_realizacao = (agg['Realizado'] == 0).to_numpy()
+    marcar(sem_realizacao & com_historico & (medianas_historico['Realizado'] > 0).to_numpy(),
+           "realização caiu a zero")
+    marcar(sem_realizacao & (agg['z_Oportunidades_historico'] > LIMIAR).to_numpy(),
+           "pico de oportunidades sem realização")
+
+    agg['score'] = z_max.round(2)
+    agg['motivos'] = pd.Series(motivos, index=agg.index).str.rstrip("; ")
+    return agg.sort_values('score', ascending=False, ignore_index=True)
+
+
+def flagged(anomalias, meses=(), clientes=()):
+    """Apenas as linhas com motivo, opcionalmente restritas a meses/clientes."""
+    mask = anomalias['motivos'] != ""
+    if meses:
+        mask &= anomalias['MÊS'].isin(meses)
+    if clientes:
+        mask &= anomalias['Cliente'].isin(clientes)
+    return anomalias[mask]
+
+
+def _path(versao):
+    return os.path.join(ANOMALIAS_DIR, f"{versao}.pkl")
+
+
+def load_anomalies(versao):
+    """Resultado gravado para a versão, ou None se o job ainda não rodou para ela."""
+    try:
+        with open(_path(versao), "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+
+
+def save_anomalies(versao, anomalias):
+    # Mesmo esquema do snapshot: arquivo temporário + rename
+    os.makedirs(ANOMALIAS_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=ANOMALIAS_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(anomalias, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, _path(versao))
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def anomalies_for(dataset):
+    """Lê o resultado da versão do dataset; se não existir, calcula e grava."""
+    anomalias = load_anomalies(dataset.versao)
+    if anomalias is None:
+        anomalias = score_anomalies(dataset.df)
+        save_anomalies(dataset.versao, anomalias)
+    return anomalias
+
+
+def main():
+    from data_loader import read_workbook
+    from dataset import build_shared_dataset
+
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "rb") as f:
+            df = read_workbook(f.read())
+    else:
+        with open(SNAPSHOT_FILE, "rb") as f:
+            df = pickle.load(f).df
+    dataset = build_shared_dataset(df, datetime.now())
+    anomalias = score_anomalies(dataset.df)
+    save_anomalies(dataset.versao, anomalias)
+    marcadas = flagged(anomalias)
+    print(f"Versão {dataset.versao}: {len(marcadas)} de {len(anomalias)} (Cliente, MÊS) marcados")
+    print(marcadas[['Cliente', 'MÊS', 'Realizado', 'Oportunidades', 'Gap', 'score', 'motivos']]
+          .head(20).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
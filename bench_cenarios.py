@@ -0,0 +1,39 @@
+# bench_cenarios.py
+#
+# Tempo para avaliar K cenários de budget sobre todos os clientes de uma
+# planilha sintética (performance, classe e GAP de cada cliente em cada cenário).
+#
+#   python bench_cenarios.py [n_clientes] [n_cenarios]
+
+import sys
+import time
+
+import numpy as np
+
+from rankings import aggregate_by_client
+from scenarios import ScenarioEngine
+from synthetic_data import make_workbook_df
+
+
+def main():
+    n_clientes = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    n_cenarios = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    df = make_workbook_df(n_clientes)
+    engine = ScenarioEngine(aggregate_by_client(df, mes_gap=df['MÊS'].max()))
+
+    # Cortes/aumentos gerais de -30% a +30% e ajustes aleatórios por cliente
+    rng = np.random.default_rng(42)
+    fatores = np.linspace(0.7, 1.3, n_cenarios)[:, None] * rng.uniform(0.9, 1.1, (n_cenarios, len(engine.budget)))
+    matriz = engine.budget * fatores
+
+    inicio = time.perf_counter()
+    resultado = engine.run(matriz)
+    resumo = resultado.summary()
+    duracao = time.perf_counter() - inicio
+
+    print(f"{n_cenarios} cenários x {len(engine.budget)} clientes: {duracao * 1000:.0f} ms")
+    print(resumo.iloc[[0, n_cenarios // 2, -1]].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# bench_client_store.py
+#
+# Compara o JSON estruturado com o banco SQLite nas consultas do HUB IA:
+# tempo de uma consulta avulsa (abrir + responder), tempo por consulta com a
+# base já aberta e memória usada para responder.
+#
+#   python bench_client_store.py [consultas] [caminho_json]
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from client_store import ClientStore
+from utils_dados_clientes import consultar_dados_cliente
+
+
+def medir(func, n):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    for _ in range(n):
+        func()
+    duracao = (time.perf_counter() - inicio) / n * 1000
+    pico = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+    return duracao, pico
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    path_json = sys.argv[2] if len(sys.argv) > 2 else "dados_clientes_estruturado.json"
+    with open(path_json, encoding="utf-8") as f:
+        dados = json.load(f)
+    path_db = os.path.join(tempfile.mkdtemp(prefix="bench_store_"), "dados.sqlite")
+    ClientStore(path_db).upsert(dados)
+
+    rng = random.Random(42)
+    consultas = [(cliente, int(rng.choice(list(meses)))) for cliente, meses in dados.items()]
+    proxima = lambda: consultas[rng.randrange(len(consultas))]
+
+    def json_avulsa():
+        with open(path_json, encoding="utf-8") as f:
+            consultar_dados_cliente(json.load(f), *proxima())
+
+    def sqlite_avulsa():
+        store = ClientStore(path_db)
+        consultar_dados_cliente(store, *proxima())
+        store.close()
+
+    store = ClientStore(path_db)
+    casos = [
+        ("JSON: abrir e consultar", json_avulsa),
+        ("SQLite: abrir e consultar", sqlite_avulsa),
+        ("JSON já carregado", lambda: consultar_dados_cliente(dados, *proxima())),
+        ("SQLite já aberto", lambda: consultar_dados_cliente(store, *proxima())),
+        ("SQLite: mês de todos", lambda: store.month_clients(proxima()[1])),
+        ("SQLite: cliente no ano", lambda: store.client_months(proxima()[0])),
+    ]
+    print(f"{len(dados)} clientes, {sum(len(m) for m in dados.values())} linhas (cliente, mês); {n} consultas")
+    print(f"{'consulta':>26} | {'ms/consulta':>11} | {'pico memória (KB)':>17}")
+    for nome, func in casos:
+        ms, pico = medir(func, n)
+        print(f"{nome:>26} | {ms:>11.3f} | {pico:>17.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# bench_dataset_compartilhado.py
+#
+# Mede memória e tempo de partida por worker com 1, 4 e 8 processos,
+# comparando cada processo montando o seu dataset (fluxo sem
+# DASH_DATASET_COMPARTILHADO) com os workers mapeando a versão publicada
+# por shared_dataset.py. A memória vem de /proc/self/smaps_rollup (Linux):
+# privada = páginas só do processo; PSS = privada + fatia das compartilhadas.
+#
+#   python bench_dataset_compartilhado.py [n_clientes]
+
+import multiprocessing as mp
+import pickle
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from dataset import build_shared_dataset
+from kpi_views import KPIViews
+from shared_dataset import SharedReader, publish
+from synthetic_data import make_workbook_df
+from trends import TrendEngine
+
+WORKERS = [1, 4, 8]
+
+
+def _memoria():
+    campos = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for linha in f:
+            partes = linha.split()
+            if len(partes) == 3 and partes[2] == "kB":
+                campos[partes[0].rstrip(":")] = int(partes[1])
+    return campos["Private_Clean"] + campos["Private_Dirty"], campos["Pss"]
+
+
+def _tocar(dataset):
+    # Lê todas as colunas, como os gráficos e a tabela fazem
+    for col in dataset.df.columns:
+        arr = dataset.df[col].to_numpy()
+        if arr.dtype.kind in "fi":
+            float(np.nansum(arr))
+
+
+def _worker_proprio(snapshot_path, pronto, fila):
+    privada0, pss0 = _memoria()
+    inicio = time.perf_counter()
+    with open(snapshot_path, "rb") as f:
+        raw = pickle.load(f)
+    dataset = build_shared_dataset(raw, datetime.now())
+    KPIViews(dataset.df), TrendEngine(dataset.df)
+    del raw
+    partida = time.perf_counter() - inicio
+    _tocar(dataset)
+    pronto.wait()
+    privada, pss = _memoria()
+    fila.put((partida, privada - privada0, pss - pss0))
+
+
+def _worker_leitor(pasta, pronto, fila):
+    privada0, pss0 = _memoria()
+    inicio = time.perf_counter()
+    publicado = SharedReader(pasta).attach()
+    partida = time.perf_counter() - inicio
+    _tocar(publicado.dataset)
+    publicado.kpi_views.lookup(), publicado.tendencias.monthly_totals()
+    # Todos os workers vivos ao medir: o PSS divide as páginas entre eles
+    pronto.wait()
+    privada, pss = _memoria()
+    fila.put((partida, privada - privada0, pss - pss0))
+
+
+def medir(alvo, arg, n):
+    ctx = mp.get_context("fork")
+    pronto = ctx.Barrier(n + 1)
+    fila = ctx.Queue()
+    processos = [ctx.Process(target=alvo, args=(arg, pronto, fila)) for _ in range(n)]
+    for p in processos:
+        p.start()
+    pronto.wait()
+    resultados = [fila.get() for _ in processos]
+    for p in processos:
+        p.join()
+    partida, privada, pss = np.array(resultados).mean(axis=0)
+    return partida * 1000, privada / 1024, pss / 1024
+
+
+def main():
+    n_clientes = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    raw = make_workbook_df(n_clientes)
+    dataset = build_shared_dataset(raw, datetime.now())
+    print(f"Planilha sintética: {len(raw)} linhas")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        snapshot_path = f"{pasta}/snapshot.pkl"
+        with open(snapshot_path, "wb") as f:
+            pickle.dump(raw, f, protocol=pickle.HIGHEST_PROTOCOL)
+        publish(dataset, KPIViews(dataset.df), TrendEngine(dataset.df), f"{pasta}/publicado")
+        del raw, dataset
+
+        print(f"{'workers':>8} | {'modo':>12} | {'partida (ms)':>12} | {'privada (MB)':>12} | {'PSS (MB)':>9}")
+        for n in WORKERS:
+            for modo, alvo, arg in (("próprio", _worker_proprio, snapshot_path),
+                                    ("mapeado", _worker_leitor, f"{pasta}/publicado")):
+                partida, privada, pss = medir(alvo, arg, n)
+                print(f"{n:>8} | {modo:>12} | {partida:>12.1f} | {privada:>12.1f} | {pss:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
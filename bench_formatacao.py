@@ -0,0 +1,61 @@
+# bench_formatacao.py
+#
+# Compara as versões escalares (aplicadas valor a valor) e vetorizadas de
+# format_number, format_percent, custom_round e da classificação de cores,
+# conferindo que a saída é idêntica.
+#
+#   python bench_formatacao.py [n_valores]
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from metrics import (
+    classify_performance, custom_round, custom_round_array, format_fixed_array,
+    format_number, format_number_array, format_percent, format_percent_array,
+)
+
+
+def cronometrar(func):
+    inicio = time.perf_counter()
+    resultado = func()
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(42)
+    # Mistura de contagens inteiras (muitas repetidas), valores grandes, percentuais e NaN
+    valores = pd.Series(np.concatenate([
+        rng.integers(0, 5000, n // 2).astype(float),
+        rng.uniform(-50, 250, n // 4).round(2),
+        rng.uniform(0, 5e6, n - n // 2 - n // 4 - 10),
+        [np.nan] * 5, [0.0, -0.0, 0.5, 999.95, 999999.995],
+    ]))
+    sem_nan = valores.fillna(0)
+
+    casos = [
+        ("format_number", lambda: valores.apply(format_number), lambda: format_number_array(valores)),
+        ("format_percent", lambda: valores.apply(format_percent), lambda: format_percent_array(valores)),
+        ("texto '%.1f%%'", lambda: valores.apply(lambda x: f'{x:.1f}%'), lambda: format_fixed_array(valores, 1, '%')),
+        ("custom_round", lambda: sem_nan.apply(custom_round), lambda: custom_round_array(sem_nan)),
+        ("classe de cor",
+         lambda: valores.apply(lambda x: 2 if x >= 100 else (1 if x >= 70 else 0)),
+         lambda: classify_performance(valores)),
+    ]
+
+    print(f"{n} valores")
+    print(f"{'função':>16} | {'escalar (s)':>12} | {'vetorizado (s)':>15} | {'ganho':>6} | idêntico")
+    for nome, escalar, vetorizado in casos:
+        esperado, t_escalar = cronometrar(escalar)
+        obtido, t_vetorizado = cronometrar(vetorizado)
+        igual = esperado.astype(object).tolist() == obtido.astype(object).tolist()
+        print(f"{nome:>16} | {t_escalar:>12.3f} | {t_vetorizado:>15.3f} | {t_escalar / t_vetorizado:>5.1f}x | {igual}")
+        if not igual:
+            sys.exit(f"Saída diferente em {nome}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# bench_memoria_sessoes.py
+#
+# Mede a memória por sessão com 1, 10 e 50 sessões simultâneas, comparando
+# o modelo antigo (cada sessão com sua própria cópia dos dados) com o
+# dataset compartilhado do processo.
+#
+#   python bench_memoria_sessoes.py [n_clientes]
+
+import sys
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+from dataset import build_shared_dataset, filter_dataset
+from synthetic_data import make_workbook_df
+
+SESSOES = [1, 10, 50]
+
+
+def sessao_copias(raw):
+    # Reproduz o fluxo anterior do main.py: limpeza e cópias por sessão
+    df = raw[raw['Cliente'].notna() & (raw['Cliente'] != "undefined")].copy()
+    df['Cliente'] = df['Cliente'].str.upper()
+    filtered_df = df.copy()
+    detailed_df = filtered_df.sort_values(['Cliente'])
+    return [
+        df, filtered_df, detailed_df, detailed_df.copy(),
+        filtered_df[filtered_df['BUDGET'] > 0].copy(),
+        filtered_df[(filtered_df['Importação'] + filtered_df['Exportação'] + filtered_df['Cabotagem']) > 0].copy(),
+        filtered_df.copy(),
+    ]
+
+
+def sessao_compartilhada(dataset, cache):
+    # Fluxo atual: o recorte vem do cache do processo e os derivados são views
+    chave = (dataset.versao, (), ())
+    if chave not in cache:
+        cache[chave] = filter_dataset(dataset)
+    filtered_df = cache[chave]
+    return [filtered_df, filtered_df[filtered_df['BUDGET'] > 0]]
+
+
+def medir(criar_sessao, n):
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    sessoes = [criar_sessao() for _ in range(n)]
+    atual = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del sessoes
+    return (atual - base) / n / 1024 ** 2
+
+
+def main():
+    n_clientes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    pd.set_option("mode.copy_on_write", True)
+    raw = make_workbook_df(n_clientes)
+    print(f"Planilha sintética: {len(raw)} linhas")
+    print(f"{'sessões':>8} | {'cópias (MB/sessão)':>20} | {'compartilhado (MB/sessão)':>26}")
+    for n in SESSOES:
+        antigo = medir(lambda: sessao_copias(raw), n)
+        # O dataset compartilhado é criado uma vez e contabilizado no total
+        cache = {}
+
+        def criar():
+            if "dataset" not in cache:
+                cache["dataset"] = build_shared_dataset(raw, datetime.now())
+            return sessao_compartilhada(cache["dataset"], cache)
+
+        novo = medir(criar, n)
+        print(f"{n:>8} | {antigo:>20.2f} | {novo:>26.2f}")
+
+
+if __name__ == "__main__":
+    main()
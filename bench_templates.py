@@ -0,0 +1,150 @@
+# bench_templates.py
+#
+# Compara o HTML de um rerun típico do dashboard (CSS do tema, 4 KPIs,
+# 10 títulos de seção, 6 blocos de insights, conclusões e tabela) montado como antes, com f-strings inline e ícones em base64 em cada
+# bloco, e com os templates compilados de templates.py. Reporta bytes e tempo
+# de montagem por rerun: com o mesmo recorte (blocos vindos do cache, como na
+# paginação da tabela) e com um recorte novo a cada rerun (todos renderizados).
+#
+#   python bench_templates.py [reruns]
+
+import base64
+import sys
+import time
+
+import templates
+from detailed_table import TABLE_STYLES
+from style import COLORS, get_css
+
+SECOES = [
+    ("VISÃO GERAL", "titulo", False), ("DADOS REFERENTES AO MÊS DE ABRIL", "detalhes", False),
+    ("PERFORMANCE VS BUDGET POR CLIENTE", "detalhes", True),
+    ("CLIENTES COM MAIOR GAP VS TARGET ACUMULADO", "detalhes", True),
+    ("COMPARATIVO BUDGET VS REALIZADO POR CATEGORIA", "detalhes", True),
+    ("APROVEITAMENTO DE OPORTUNIDADES POR CLIENTE", "detalhes", True),
+    ("CLIENTES FORA DO BUDGET COM OPERAÇÕES REALIZADAS", "detalhes", True),
+    ("TENDÊNCIA MENSAL: MÊS A MÊS, ACUMULADO NO ANO E MÓVEL DE 3 MESES", "detalhes", True),
+    ("ALERTAS DE COMPORTAMENTO ATÍPICO", "insights", True),
+    ("CONCLUSÕES E RECOMENDAÇÕES iTracker HUB IA", "ia", False),
+]
+KPIS = [("budget", "TOTAL BUDGET", "12.345"), ("oportunidades", "TOTAL OPORTUNIDADES", "45.678"),
+        ("realizado", "REALIZADO (SYSTRACKER)", "9.876"), ("performance", "PERFORMANCE VS BUDGET", "80,0%")]
+INTRO = "Com base nos dados disponíveis até o dia <b>19 de October</b>, os principais destaques são:"
+ITENS = [f"Destaque {i}: <b>{i * 1234}</b> containers" for i in range(4)]
+N_INSIGHTS = 6
+
+
+def rerun_anterior(icones):
+    """HTML do rerun como era montado antes (f-strings inline, base64 por bloco)."""
+    blocos = [get_css("Clean")]
+    for titulo, icone, topo in SECOES:
+        margem = " margin-top: 15px;" if topo else ""
+        blocos.append(f"""
+        <div class='section' style='text-align: center; display: flex; justify-content: center; align-items: center; gap: 12px;{margem}'>
+            <img src="data:image/png;base64,{icones[icone]}" alt="Ícone" style="height: 28px; vertical-align: middle;" />
+            <h3 class='section-title' style="margin: 0;">{titulo}</h3>
+        </div>
+        """)
+    for icone, titulo, valor in KPIS:
+        blocos.append(f"""
+    <div style="
+        display: flex;
+        flex-direction: row;
+        align-items: center;
+        justify-content: center;
+        padding: 18px 24px;
+        border-radius: 12px;
+        background-color: #f9f9f9;
+        border-left: 6px solid #2196F3;
+        box-shadow: 0 2px 6px rgba(0,0,0,0.08);
+        min-width: 200px;
+        max-width: 250px;
+        margin: auto;
+    ">
+        <img src="data:image/png;base64,{icones[icone]}" width="34" height="34" style="margin-right:14px;" />
+        <div style="display: flex; flex-direction: column; line-height: 1.2;">
+            <span style="font-size: 13px; color: #555;">{titulo}</span>
+            <span style="font-size: 22px; font-weight: 700; ">{valor}</span>
+        </div>
+    </div>
+    """)
+    itens = "".join(f"\n                <li>{item}</li>" for item in ITENS)
+    for i in range(N_INSIGHTS):
+        blocos.append(f"""
+        <div style='background-color:{COLORS['background']}; padding:10px; border-radius:5px; margin-top:10px;'>
+            <div style='display: flex; align-items: center; gap: 10px;'>
+                <img src="data:image/png;base64,{icones['insights']}" alt="Ícone Insights" style="height: 20px;" />
+                <h5 style='margin: 0;'>INSIGHTS - BLOCO {i}</h5>
+            </div>
+            <p style='margin-bottom:10px;'>{INTRO}</p>
+            <ul>{itens}
+            </ul>
+        </div>
+        """)
+    blocos.append(f"""
+    <div style='background-color:{COLORS['background']}; padding:15px; border-radius:8px;'>
+        <div style='display: flex; align-items: center; gap: 10px; margin-bottom: 10px;'>
+            <img src="data:image/png;base64,{icones['insights']}" alt="Ícone Insights" style="height: 24px;" />
+            <h4 style='margin: 0;'>ANÁLISE DE PERFORMANCE E CONCLUSÕES</h4>
+        </div>
+        <p>{INTRO}</p>
+        <ul>{itens}
+        </ul>
+        <div style='display: flex; align-items: center; gap: 10px; margin-top: 15px; margin-bottom: 10px;'>
+            <img src="data:image/png;base64,{icones['recomendacoes']}" alt="Ícone Recomendações" style="height: 24px;" />
+            <h4 style='margin: 0;'>RECOMENDAÇÕES E AÇÕES</h4>
+        </div>
+        <ol>
+            <li>Recomendação</li>
+        </ol>
+    </div>
+    """)
+    blocos.append(TABLE_STYLES + "<table class='custom-table'></table>")
+    return blocos
+
+
+def rerun_templates(recorte=""):
+    """HTML do mesmo rerun com templates.py; `recorte` muda os valores (recorte novo)."""
+    intro = INTRO + recorte
+    blocos = [templates.page_css()]
+    blocos += [templates.section_header(titulo, icone, topo) for titulo, icone, topo in SECOES]
+    blocos += [templates.kpi_card(icone, titulo, valor + recorte) for icone, titulo, valor in KPIS]
+    blocos += [templates.insight_block(f"INSIGHTS - BLOCO {i}", ITENS, intro) for i in range(N_INSIGHTS)]
+    blocos.append(templates.conclusions_block(intro, ITENS, "<li>Recomendação</li>"))
+    blocos.append("<table class='custom-table'></table>")
+    return blocos
+
+
+def medir(montar, reruns):
+    inicio = time.perf_counter()
+    for _ in range(reruns):
+        blocos = montar()
+    duracao = (time.perf_counter() - inicio) / reruns
+    return sum(len(b.encode("utf-8")) for b in blocos), len(blocos), duracao
+
+
+def main():
+    reruns = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    def icones():
+        # Antes os PNGs eram lidos uma vez no import do main.py
+        return {nome: base64.b64encode(open(path, "rb").read()).decode() for nome, path in templates.ICONES.items()}
+
+    antes = icones()
+    templates.page_css()  # a primeira montagem (leitura dos PNGs) acontece uma vez por processo
+
+    recortes = iter(range(10 ** 9))
+    resultados = [("f-strings inline", *medir(lambda: rerun_anterior(antes), reruns)),
+                  ("templates", *medir(rerun_templates, reruns)),
+                  ("templates, recorte novo", *medir(lambda: rerun_templates(f" {next(recortes)}"), reruns))]
+    print(f"{reruns} reruns")
+    print(f"{'montagem':>23} | {'blocos':>6} | {'bytes/rerun':>11} | {'µs/rerun':>9}")
+    for nome, n_bytes, blocos, duracao in resultados:
+        print(f"{nome:>23} | {blocos:>6} | {n_bytes:>11,} | {duracao * 1e6:>9.1f}")
+    (_, b_antes, _, t_antes), (_, b_depois, _, t_depois), _ = resultados
+    print(f"Economia por rerun: {b_antes - b_depois:,} bytes ({(1 - b_depois / b_antes) * 100:.1f}%), "
+          f"{(t_antes - t_depois) * 1e6:.1f} µs ({t_antes / t_depois:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
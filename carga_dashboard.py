@@ -0,0 +1,308 @@
+# carga_dashboard.py
+#
+# Teste de carga do dashboard: N sessões simultâneas do main.py rodando sem
+# navegador (streamlit.testing AppTest), com o download do Drive trocado por
+# uma planilha local. Cada sessão repete uma sequência realista (troca de
+# meses, busca e seleção de clientes, ordenação e paginação da tabela e
+# download das exportações CSV/Excel). Tudo roda em uma pasta temporária:
+# nada do que o main.py grava (.cache/, dados_clientes.sqlite) toca o projeto.
+# Reporta p50/p95 do tempo de rerun, vazão e pico de RSS, e termina com
+# código 1 quando algum limite é ultrapassado. O orçamento de bytes por rerun
+# (payload.py) roda em modo estrito: rerun acima dele conta como exceção.
+#
+#   python carga_dashboard.py [--sessoes 10] [--rodadas 3] [--planilha arquivo.xlsx]
+#                             [--p95-max-ms 4000] [--rss-max-mb 1500] [--vazao-min 1.0]
+
+import argparse
+import atexit
+import io
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pandas as pd
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.testing.v1 import AppTest, app_test
+
+import refresher
+from payload import ENV_ESTRITO
+from synthetic_data import make_workbook_df
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(RAIZ, "main.py")
+TIMEOUT = 120  # segundos por rerun
+EXPORTACOES = {"download-csv": "csv", "download-excel": "excel"}
+NOMES_MESES = ["Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho", "Julho", "Agosto",
+               "Setembro", "Outubro", "Novembro", "Dezembro"]
+
+
+def fixture_bytes(planilha=None, n_clientes=500):
+    """Conteúdo da planilha usada no lugar do Drive (arquivo local ou sintética)."""
+    if planilha:
+        with open(planilha, "rb") as f:
+            return f.read()
+    buf = io.BytesIO()
+    make_workbook_df(n_clientes).to_excel(buf, index=False, engine="openpyxl")
+    return buf.getvalue()
+
+
+def isolate_workdir():
+    """
+    Muda o diretório de trabalho para uma pasta temporária (apagada no fim).
+
+    O main.py e os módulos que ele usa gravam com caminhos relativos (snapshot,
+    linhas da última versão e anomalias em .cache/, dados_clientes.sqlite),
+    então nada do teste reaproveita nem sobrescreve os arquivos reais do
+    projeto. Só os ícones (assets/) são ligados à pasta do projeto.
+    """
+    pasta = tempfile.mkdtemp(prefix="carga_dashboard_")
+    os.symlink(os.path.join(RAIZ, "assets"), os.path.join(pasta, "assets"))
+    os.chdir(pasta)
+    atexit.register(shutil.rmtree, pasta, ignore_errors=True)
+    return pasta
+
+
+def install_fixture(conteudo):
+    """Troca o DataRefresher usado pelo main.py por um que lê a planilha local."""
+    original = refresher.DataRefresher
+
+    class FixtureRefresher(original):
+        def __init__(self, fetch, parse, **kwargs):
+            super().__init__(lambda: conteudo, parse, intervalo=3600)
+
+    refresher.DataRefresher = FixtureRefresher
+
+
+# Arquivos dos download_button de todas as sessões, por id do arquivo (hash do
+# conteúdo). Todas as sessões do AppTest usam o mesmo id de sessão, então a
+# limpeza de arquivos órfãos de uma pode apagar os arquivos de outra.
+_arquivos = {}
+_arquivos_lock = threading.Lock()
+
+
+class CapturaDownloads(MemoryMediaFileStorage):
+    """Armazenamento de mídia que guarda uma cópia dos arquivos de download."""
+
+    def load_and_get_id(self, path_or_data, mimetype, kind, filename=None):
+        file_id = super().load_and_get_id(path_or_data, mimetype, kind, filename)
+        if filename is not None:
+            with _arquivos_lock:
+                _arquivos[file_id] = self._files_by_id[file_id].content
+        return file_id
+
+
+def share_runtime():
+    """
+    Um único runtime simulado para todas as sessões.
+
+    O AppTest cria um runtime por rerun na variável global Runtime._instance
+    e a zera no fim; com sessões em threads, o rerun que termina derruba o
+    runtime dos que ainda estão rodando. Aqui as sessões dividem um runtime,
+    com os caches do st.cache_data compartilhados como em um servidor, e o
+    AppTest passa a gravar o seu runtime de cada rerun em uma subclasse.
+    """
+    compartilhado = MagicMock(spec=Runtime)
+    compartilhado.media_file_mgr = MediaFileManager(CapturaDownloads("/mock/media"))
+    compartilhado.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = compartilhado
+
+    class RuntimePorRerun(Runtime):
+        _instance = None
+
+    app_test.Runtime = RuntimePorRerun
+
+
+def read_export(formato, conteudo):
+    """Lê a exportação baixada como o usuário abriria (CSV ou Excel)."""
+    if formato == "csv":
+        return pd.read_csv(io.StringIO(conteudo.decode("utf-8")))
+    return pd.read_excel(io.BytesIO(conteudo), engine="openpyxl")
+
+
+class Sessao:
+    """Uma sessão do dashboard; cada ação é um rerun cronometrado."""
+
+    def __init__(self, latencias, erros, rng):
+        self.at = AppTest.from_file(APP, default_timeout=TIMEOUT)
+        self.at.secrets["google"] = {}
+        self.latencias = latencias
+        self.erros = erros
+        self.rng = rng
+        self.aberta = False
+
+    def _rotular_meses(self):
+        # O AppTest identifica as opções de uma multiselect com format_func pelo
+        # texto exibido, mas depois de um rerun guarda o valor original (o número
+        # do mês); sem a conversão, o rerun seguinte falha ao reenviar o estado.
+        meses = self.at.sidebar.multiselect
+        if len(meses):
+            meses[0].set_value([NOMES_MESES[int(v) - 1] if not isinstance(v, str) else v
+                                for v in meses[0].value])
+
+    def _rerun(self, acao, widget=None):
+        if self.aberta:
+            self._rotular_meses()
+        inicio = time.perf_counter()
+        (widget or self.at).run(timeout=TIMEOUT)
+        self.aberta = True
+        self.latencias.append((acao, (time.perf_counter() - inicio) * 1000))
+        if self.at.exception:
+            self.erros.append((acao, self.at.exception[0].value))
+
+    def abrir(self):
+        self._rerun("abrir")
+
+    def trocar_meses(self):
+        meses = self.at.sidebar.multiselect[0]
+        # Com format_func o AppTest identifica as opções pelo texto exibido
+        escolha = self.rng.sample(meses.options, k=min(len(meses.options), self.rng.randint(1, 3)))
+        self._rerun("meses", meses.set_value(escolha))
+
+    def selecionar_cliente(self):
+        self._rerun("busca_cliente", self.at.text_input(key="busca_cliente").input("CLIENTE 00"))
+        clientes = self.at.multiselect(key="clientes_selecionados")
+        if clientes.options:
+            self._rerun("clientes", clientes.select(self.rng.choice(clientes.options)))
+
+    def limpar_clientes(self):
+        self._rerun("limpar_clientes", self.at.multiselect(key="clientes_selecionados").set_value([]))
+
+    def _widget(self, tipo, key):
+        # A tabela (e seus controles) só aparece quando o recorte tem dados
+        try:
+            return getattr(self.at, tipo)(key=key)
+        except KeyError:
+            return None
+
+    def ordenar_tabela(self):
+        ordem = self._widget("selectbox", "sort_by")
+        if ordem is not None:
+            self._rerun("ordenar", ordem.set_value(self.rng.choice(ordem.options)))
+
+    def paginar(self, paginas=3):
+        for _ in range(paginas):
+            botao = self._widget("button", "next_page_btn")
+            if botao is None or botao.disabled:
+                break
+            self._rerun("paginar", botao.click())
+
+    def baixar_exportacoes(self):
+        # O download não gera rerun: o navegador busca o arquivo que o rerun já
+        # gerou. Cronometra a busca e a leitura e confere que CSV e Excel
+        # trazem as mesmas linhas.
+        linhas = {}
+        botoes = self.at.get("download_button")
+        for key, formato in EXPORTACOES.items():
+            # O id do widget termina com a key dada no main.py
+            botao = next((b for b in botoes if b.proto.id.endswith(key)), None)
+            if botao is None:
+                continue
+            inicio = time.perf_counter()
+            with _arquivos_lock:
+                conteudo = _arquivos.get(os.path.splitext(os.path.basename(botao.proto.url))[0])
+            acao = f"download_{formato}"
+            if conteudo is None:
+                self.erros.append((acao, f"arquivo {botao.proto.url} não encontrado"))
+                continue
+            try:
+                linhas[formato] = len(read_export(formato, conteudo))
+            except Exception as e:
+                self.erros.append((acao, e))
+                continue
+            self.latencias.append((acao, (time.perf_counter() - inicio) * 1000))
+        if len(set(linhas.values())) > 1:
+            self.erros.append(("download", f"CSV e Excel com linhas diferentes: {linhas}"))
+
+    def sequencia(self):
+        self.abrir()
+        self.trocar_meses()
+        self.selecionar_cliente()
+        self.limpar_clientes()
+        self.ordenar_tabela()
+        self.paginar()
+        self.baixar_exportacoes()
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(round(p / 100 * (len(valores) - 1))))] if valores else 0.0
+
+
+def pico_rss_mb():
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / 1024 ** 2 if sys.platform == "darwin" else pico / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do dashboard com sessões simultâneas.")
+    parser.add_argument("--sessoes", type=int, default=10)
+    parser.add_argument("--rodadas", type=int, default=3, help="sequências completas por sessão")
+    parser.add_argument("--planilha", help="planilha local no lugar do Drive (padrão: sintética)")
+    parser.add_argument("--clientes", type=int, default=500, help="clientes da planilha sintética")
+    parser.add_argument("--p95-max-ms", type=float, default=4000)
+    parser.add_argument("--rss-max-mb", type=float, default=1500)
+    parser.add_argument("--vazao-min", type=float, default=1.0, help="reruns por segundo")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    conteudo = fixture_bytes(args.planilha, args.clientes)
+    isolate_workdir()
+    install_fixture(conteudo)
+    share_runtime()
+    os.environ[ENV_ESTRITO] = "1"
+    latencias, erros = [], []
+    lock = threading.Lock()
+
+    def rodar(i):
+        locais, erros_locais = [], []
+        sessao = Sessao(locais, erros_locais, random.Random(args.seed + i))
+        for _ in range(args.rodadas):
+            sessao.sequencia()
+        with lock:
+            latencias.extend(locais)
+            erros.extend(erros_locais)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessoes) as pool:
+        list(pool.map(rodar, range(args.sessoes)))
+    duracao = time.perf_counter() - inicio
+
+    tempos = [ms for _, ms in latencias]
+    p50, p95 = percentil(tempos, 50), percentil(tempos, 95)
+    vazao = len(tempos) / duracao if duracao else 0.0
+    rss = pico_rss_mb()
+
+    print(f"{args.sessoes} sessões x {args.rodadas} rodadas: {len(tempos)} reruns em {duracao:.1f} s")
+    print(f"{'ação':>16} | {'reruns':>6} | {'p50 (ms)':>9} | {'p95 (ms)':>9}")
+    for acao in dict.fromkeys(a for a, _ in latencias):
+        da_acao = [ms for a, ms in latencias if a == acao]
+        print(f"{acao:>16} | {len(da_acao):>6} | {percentil(da_acao, 50):>9.0f} | {percentil(da_acao, 95):>9.0f}")
+    print(f"Total: p50 {p50:.0f} ms | p95 {p95:.0f} ms | vazão {vazao:.2f} reruns/s | pico RSS {rss:.0f} MB")
+
+    falhas = []
+    if erros:
+        falhas.append(f"{len(erros)} reruns com exceção (primeira em '{erros[0][0]}': {erros[0][1]})")
+    if p95 > args.p95_max_ms:
+        falhas.append(f"p95 {p95:.0f} ms acima de {args.p95_max_ms:.0f} ms")
+    if rss > args.rss_max_mb:
+        falhas.append(f"pico RSS {rss:.0f} MB acima de {args.rss_max_mb:.0f} MB")
+    if vazao < args.vazao_min:
+        falhas.append(f"vazão {vazao:.2f} reruns/s abaixo de {args.vazao_min:.2f}")
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
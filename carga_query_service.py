@@ -0,0 +1,71 @@
+# carga_query_service.py
+#
+# Teste de carga do query_service: N clientes concorrentes com conexões
+# keep-alive disparando consultas variadas; reporta vazão e latências.
+#
+#   python carga_query_service.py [conexoes] [requisicoes_por_conexao] [porta]
+
+import asyncio
+import random
+import sys
+import time
+from urllib.parse import quote
+
+from client_store import open_store
+from query_service import DEFAULT_PORT, METRICAS
+
+
+async def _get(reader, writer, caminho):
+    writer.write(f"GET {caminho} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode("latin-1"))
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    tamanho = 0
+    while True:
+        linha = await reader.readline()
+        if linha in (b"\r\n", b""):
+            break
+        if linha.lower().startswith(b"content-length:"):
+            tamanho = int(linha.split(b":")[1])
+    await reader.readexactly(tamanho)
+    return status
+
+
+async def _sessao(host, porta, caminhos, n, latencias, erros):
+    reader, writer = await asyncio.open_connection(host, porta)
+    try:
+        for _ in range(n):
+            inicio = time.perf_counter()
+            status = await _get(reader, writer, random.choice(caminhos))
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            if status >= 500:
+                erros.append(status)
+    finally:
+        writer.close()
+
+
+async def main(conexoes=50, por_conexao=200, porta=DEFAULT_PORT, host="127.0.0.1"):
+    # Monta um conjunto realista de consultas a partir dos próprios clientes do banco
+    dados = open_store().to_dict()
+    caminhos = ["/agregados"] + [f"/agregados?mes={m}" for m in range(1, 13)]
+    for cliente, meses in dados.items():
+        caminhos.append(f"/clientes/{quote(cliente)}")
+        caminhos += [f"/clientes/{quote(cliente)}?mes={m}" for m in meses]
+    caminhos += [f"/ranking?metrica={m}&n=10" for m in METRICAS]
+
+    latencias, erros = [], []
+    inicio = time.perf_counter()
+    await asyncio.gather(*[
+        _sessao(host, porta, caminhos, por_conexao, latencias, erros) for _ in range(conexoes)
+    ])
+    duracao = time.perf_counter() - inicio
+    latencias.sort()
+    total = len(latencias)
+    print(f"Requisições: {total} em {duracao:.2f}s ({total / duracao:.0f} req/s), erros: {len(erros)}")
+    print(f"Latência p50: {latencias[total // 2]:.2f} ms | "
+          f"p95: {latencias[int(total * 0.95)]:.2f} ms | "
+          f"p99: {latencias[int(total * 0.99)]:.2f} ms")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:4]]
+    asyncio.run(main(*args))
@@ -0,0 +1,213 @@
+# charts.py
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+from metrics import classify_performance
+from style import COLORS
+
+
+def performance_figure(df_graph3, chart_height):
+    """Barras horizontais de performance vs budget com as faixas de threshold."""
+    # Processamento dos dados (top 15 já calculado no ranking)
+    df_graph3 = df_graph3.copy()
+    cores = np.array([COLORS['danger'], COLORS['warning'], COLORS['success']], dtype=object)
+    df_graph3['Color'] = cores[classify_performance(df_graph3['Performance'].to_numpy())]
+
+    # Gráfico
+    fig3 = go.Figure()
+    fig3.add_trace(go.Bar(
+        x=df_graph3['Performance'],
+        y=df_graph3['Cliente'],
+        orientation='h',
+        marker_color=df_graph3['Color'],
+        texttemplate='%{x:.1f}%',
+        hovertemplate='<b>%{y}</b><br>Performance: %{x:.1f}%<br>Budget: %{customdata[0]:,.0f}<br>Realizado: %{customdata[1]:,.0f}<extra></extra>',
+        customdata=np.stack((df_graph3['BUDGET'], df_graph3['Quantidade_iTRACKER']), axis=-1)
+    ))
+
+    # Formatação visual
+    fig3.add_shape(type="line", x0=100, y0=-0.5, x1=100, y1=len(df_graph3)-0.5, line=dict(color="black", width=2, dash="dash"))
+    fig3.add_shape(type="rect", x0=0, y0=-0.5, x1=70, y1=len(df_graph3)-0.5, line=dict(width=0), fillcolor="rgba(239, 83, 80, 0.1)", layer="below")
+    fig3.add_shape(type="rect", x0=70, y0=-0.5, x1=100, y1=len(df_graph3)-0.5, line=dict(width=0), fillcolor="rgba(255, 167, 38, 0.1)", layer="below")
+    fig3.add_shape(type="rect", x0=100, y0=-0.5, x1=df_graph3['Performance'].max() * 1.1, y1=len(df_graph3)-0.5, line=dict(width=0), fillcolor="rgba(102, 187, 106, 0.1)", layer="below")
+
+    fig3.add_annotation(x=35, y=len(df_graph3)-1, text="CRÍTICO (<70%)", showarrow=False, font=dict(color=COLORS['danger']), xanchor="center", yanchor="top")
+    fig3.add_annotation(x=85, y=len(df_graph3)-1, text="ATENÇÃO (70-100%)", showarrow=False, font=dict(color=COLORS['warning']), xanchor="center", yanchor="top")
+    fig3.add_annotation(x=min(150, df_graph3['Performance'].max() * 0.9), y=len(df_graph3)-1, text="META ATINGIDA (>100%)", showarrow=False, font=dict(color=COLORS['success']), xanchor="center", yanchor="top")
+
+    fig3.update_traces(textposition='inside')
+    fig3.update_layout(
+        xaxis_title='PERFORMANCE (%)',
+        yaxis_title='CLIENTE',
+        height=chart_height,
+        template="plotly",
+        margin=dict(l=60, r=30, t=30, b=40),
+        xaxis=dict(range=[0, max(200, df_graph3['Performance'].max() * 1.1)])
+    )
+
+    return fig3
+
+
+def gap_figure(df_gap_top, chart_height):
+    """Clientes com maior GAP vs target acumulado."""
+    fig_gap = px.bar(
+        df_gap_top,
+        x="Gap de Realização",
+        y="Cliente",
+        orientation="h",
+        color="Gap de Realização",
+        color_continuous_scale=px.colors.sequential.Reds,
+        labels={"Gap de Realização": "Gap de Atendimento"},
+        title=""
+    )
+    fig_gap.update_layout(
+        yaxis=dict(autorange="reversed"),
+        height=chart_height,
+        margin=dict(l=60, r=60, t=40, b=80),
+        legend=dict(orientation='h', y=-0.25, x=0.5, xanchor='center'),
+        plot_bgcolor="white"
+    )
+    fig_gap.update_traces(texttemplate='%{x}', textposition='outside')
+
+    return fig_gap
+
+
+def category_figure(df_grouped, chart_height):
+    """Comparativo budget vs realizado por categoria."""
+    df_melted = df_grouped.melt(
+        id_vars='Cliente',
+        value_vars=['BUDGET', 'Importação', 'Exportação', 'Cabotagem', 'Realizado (Systracker)'],
+        var_name='Categoria',
+        value_name='Quantidade'
+    )
+    df_melted = df_melted[df_melted['Quantidade'] > 0]
+
+    fig = px.bar(
+        df_melted,
+        x='Cliente',
+        y='Quantidade',
+        color='Categoria',
+        barmode='group',
+        height=chart_height,
+        color_discrete_map={
+            'BUDGET': '#0D47A1',
+            'Importação': '#00897B',
+            'Exportação': '#F4511E',
+            'Cabotagem': '#FFB300',
+            'Realizado (Systracker)': '#6A1B9A'
+        },
+        labels={'Quantidade': 'QTD. DE CONTAINERS'}
+    )
+    fig.update_traces(
+        texttemplate='%{y:.0f}',
+        textposition='outside',
+        hovertemplate='<b>CLIENTE:</b> %{x}<br><b>CATEGORIA:</b> %{fullData.name}<br><b>QTD.:</b> %{y:.0f}<extra></extra>'
+    )
+    fig.update_layout(
+        xaxis=dict(title='CLIENTE', tickangle=-30),
+        yaxis=dict(title='QTD. DE CONTAINERS', range=[0, df_melted['Quantidade'].max() * 1.1]),
+        legend=dict(orientation='h', y=-0.25, x=0.5, xanchor='center'),
+        margin=dict(l=60, r=40, t=20, b=100),
+        template='plotly_white',
+        bargap=0.25,
+        title_text="",
+        plot_bgcolor="white"
+    )
+
+    return fig
+
+
+def aproveitamento_figure(df_graph2, chart_height):
+    """Taxa de aproveitamento de oportunidades por cliente."""
+    # Gráfico
+    fig2 = px.bar(
+        df_graph2,
+        x='Cliente',
+        y='Aproveitamento',
+        color='Aproveitamento',
+        color_continuous_scale=px.colors.sequential.Blues,
+        text_auto='.1f',
+        labels={'Aproveitamento': 'TAXA DE APROVEITAMENTO (%)'},
+        custom_data=['Total_Oportunidades', 'Quantidade_iTRACKER']
+    )
+    fig2.update_traces(
+        texttemplate='%{y:.1f}%',
+        textposition='outside',
+        hovertemplate=(
+            '<b>CLIENTE:</b> %{x}<br>'
+            '<b>TAXA DE APROVEITAMENTO:</b> %{y:.1f}%<br>'
+            '<b>TOTAL OPORTUNIDADES:</b> %{customdata[0]:,.0f}<br>'
+            '<b>REALIZADO:</b> %{customdata[1]:,.0f}<extra></extra>'
+        )
+    )
+    fig2.update_layout(
+        xaxis_title='CLIENTE',
+        yaxis_title='TAXA DE APROVEITAMENTO (%)',
+        coloraxis_colorbar=dict(title='APROVEITAMENTO (%)'),
+        height=chart_height,
+        template="plotly",
+        margin=dict(l=60, r=60, t=30, b=60),
+        xaxis=dict(tickangle=-45),
+        yaxis=dict(range=[0, min(150, df_graph2['Aproveitamento'].max() * 1.1)])
+    )
+
+    return fig2
+
+
+def no_budget_figure(df_graph, chart_height):
+    """Clientes fora do budget com operações realizadas."""
+    fig_no_budget = px.bar(
+        df_graph,
+        x='Quantidade_iTRACKER',
+        y='Cliente',
+        orientation='h',
+        color='Quantidade_iTRACKER',
+        color_continuous_scale=px.colors.sequential.Oranges,
+    )
+    fig_no_budget.update_layout(
+        height=chart_height,
+        yaxis=dict(autorange="reversed"),
+        margin=dict(l=60, r=30, t=40, b=60),
+        plot_bgcolor="white"
+    )
+    fig_no_budget.update_traces(texttemplate='%{x}', textposition='outside')
+
+    return fig_no_budget
+
+
+def trend_figure(df_mensal, chart_height):
+    """Budget e realizado por mês, com a performance YTD e a móvel de 3 meses."""
+    df_mensal = df_mensal[(df_mensal['BUDGET'] > 0) | (df_mensal['Realizado'] > 0)]
+    meses = df_mensal.index.to_numpy()
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=meses, y=df_mensal['BUDGET'], name='BUDGET', marker_color='#0D47A1'))
+    fig.add_trace(go.Bar(x=meses, y=df_mensal['Realizado'], name='REALIZADO (SYSTRACKER)', marker_color='#6A1B9A'))
+    fig.add_trace(go.Scatter(x=meses, y=df_mensal['YTD_Performance'], name='PERFORMANCE YTD (%)',
+                             yaxis='y2', mode='lines+markers', line=dict(color=COLORS['success'])))
+    fig.add_trace(go.Scatter(x=meses, y=df_mensal['Perf_3M'], name='PERFORMANCE 3 MESES (%)',
+                             yaxis='y2', mode='lines+markers', line=dict(color=COLORS['warning'], dash='dash')))
+    fig.update_layout(
+        barmode='group',
+        height=chart_height,
+        xaxis=dict(title='MÊS', tickmode='array', tickvals=meses),
+        yaxis=dict(title='QTD. DE CONTAINERS'),
+        yaxis2=dict(title='PERFORMANCE (%)', overlaying='y', side='right', rangemode='tozero'),
+        legend=dict(orientation='h', y=-0.25, x=0.5, xanchor='center'),
+        margin=dict(l=60, r=60, t=20, b=100),
+        plot_bgcolor="white"
+    )
+
+    return fig
+
+
+FIGURES = {
+    "performance": performance_figure,
+    "gap": gap_figure,
+    "categorias": category_figure,
+    "aproveitamento": aproveitamento_figure,
+    "sem_budget": no_budget_figure,
+    "tendencia": trend_figure,
+}
@@ -0,0 +1,111 @@
+# client_catalog.py
+
+import bisect
+from collections import defaultdict
+
+from matching import tokenize
+from utils_dados_clientes import normalizar_texto
+
+LIMITE = 20            # opções devolvidas por busca
+MIN_FUZZY = 0.35       # similaridade mínima (Dice de trigramas) para a busca aproximada
+
+
+def _trigramas(texto):
+    padded = f"  {texto} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ClientCatalog:
+    """
+    Catálogo de clientes pesquisável por prefixo e por aproximação.
+
+    Montado uma vez por versão dos dados. Guarda os nomes normalizados em
+    ordem (busca por prefixo do nome com bisect), o vocabulário de tokens em
+    ordem (prefixo de qualquer palavra do nome) e um índice de trigramas para
+    a busca aproximada quando nenhum prefixo casa.
+
+    Parâmetros:
+        clientes (iterable): Nomes dos clientes como aparecem nos dados.
+    """
+
+    def __init__(self, clientes):
+        self._conjunto = set(clientes)
+        self.clientes = sorted(self._conjunto)
+        normalizados = [normalizar_texto(c) for c in self.clientes]
+        self._por_nome = sorted(zip(normalizados, range(len(self.clientes))))
+        self._nomes = [n for n, _ in self._por_nome]
+
+        por_token = defaultdict(set)
+        self._trigramas = defaultdict(set)
+        self._n_trigramas = []
+        for i, nome in enumerate(normalizados):
+            for token in tokenize(nome):
+                por_token[token].add(i)
+            tris = _trigramas(nome)
+            self._n_trigramas.append(len(tris))
+            for t in tris:
+                self._trigramas[t].add(i)
+        self._tokens = sorted(por_token)
+        self._por_token = [por_token[t] for t in self._tokens]
+
+    def __len__(self):
+        return len(self.clientes)
+
+    def __contains__(self, cliente):
+        return cliente in self._conjunto
+
+    def _prefixo_nome(self, texto):
+        inicio = bisect.bisect_left(self._nomes, texto)
+        fim = bisect.bisect_left(self._nomes, texto + "\uffff")
+        return {i for _, i in self._por_nome[inicio:fim]}
+
+    def _prefixo_token(self, token):
+        inicio = bisect.bisect_left(self._tokens, token)
+        fim = bisect.bisect_left(self._tokens, token + "\uffff")
+        encontrados = set()
+        for ids in self._por_token[inicio:fim]:
+            encontrados |= ids
+        return encontrados
+
+    def _aproximados(self, texto):
+        tris = _trigramas(texto)
+        comuns = defaultdict(int)
+        for t in tris:
+            for i in self._trigramas.get(t, ()):
+                comuns[i] += 1
+        return {
+            i: 2 * n / (len(tris) + self._n_trigramas[i])
+            for i, n in comuns.items()
+            if 2 * n / (len(tris) + self._n_trigramas[i]) >= MIN_FUZZY
+        }
+
+    def search(self, consulta, limite=LIMITE):
+        """
+        Clientes que melhor correspondem ao texto digitado.
+
+        Ordem: nome começando pelo texto, depois nomes em que cada palavra
+        digitada é prefixo de alguma palavra do nome e, se nada disso casar,
+        os mais parecidos por trigramas.
+
+        Parâmetros:
+            consulta (str): Texto digitado (vazio = primeiros em ordem alfabética).
+            limite (int): Quantidade máxima de resultados.
+
+        Retorna:
+            list: Nomes dos clientes, como aparecem nos dados.
+        """
+        texto = normalizar_texto(consulta or "").strip()
+        if not texto:
+            return self.clientes[:limite]
+
+        scores = dict.fromkeys(self._prefixo_nome(texto), 3.0)
+        tokens = tokenize(texto)
+        if tokens:
+            em_todos = set.intersection(*(self._prefixo_token(t) for t in tokens))
+            for i in em_todos:
+                scores.setdefault(i, 2.0)
+        if not scores:
+            scores = self._aproximados(texto)
+
+        ordem = sorted(scores, key=lambda i: (-scores[i], self.clientes[i]))
+        return [self.clientes[i] for i in ordem[:limite]]
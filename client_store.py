@@ -0,0 +1,373 @@
+# client_store.py
+
+import json
+import math
+import os
+import sqlite3
+import threading
+from collections.abc import Mapping
+
+from utils_dados_clientes import normalizar_texto
+
+DB_FILE = "dados_clientes.sqlite"
+JSON_FILE = "dados_clientes_estruturado.json"
+
+# Campo do JSON estruturado -> coluna da planilha reconciliada
+CAMPOS = {
+    "budget": "BUDGET",
+    "importacao": "Importação",
+    "exportacao": "Exportação",
+    "cabotagem": "Cabotagem",
+    "quantidade_itracker": "Quantidade_iTRACKER",
+    "aproveitamento_oportunidade": "Aproveitamento de Oportunidade (%)",
+    "realizacao_budget": "Realização do Budget (%)",
+    "desvio_budget_vs_oportunidade": "Desvio Budget vs Oportunidade (%)",
+    "target_diario_esperado": "Target Diário Esperado",
+    "target_acumulado": "Target Acumulado",
+    "gap_realizacao": "Gap de Realização",
+}
+
+# Colunas de métricas sem tipo declarado: inteiros e floats voltam como foram gravados
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS metricas (
+    cliente_norm TEXT NOT NULL,
+    mes INTEGER NOT NULL,
+    cliente TEXT NOT NULL,
+    {", ".join(CAMPOS)},
+    PRIMARY KEY (cliente_norm, mes)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_metricas_mes ON metricas (mes, cliente_norm);
+CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta VALUES ('versao', 0);
+"""
+
+# Campos somados quando a planilha tem mais de uma linha por (cliente, mês);
+# os percentuais saem das somas, com a regra da reconciliação
+SOMAVEIS = ["budget", "importacao", "exportacao", "cabotagem", "quantidade_itracker",
+            "target_diario_esperado", "target_acumulado", "gap_realizacao"]
+_OPORTUNIDADES = ["importacao", "exportacao", "cabotagem"]
+PERCENTUAIS = {
+    # campo: (campos necessários, numerador, denominador)
+    "aproveitamento_oportunidade": (
+        ["quantidade_itracker", *_OPORTUNIDADES],
+        lambda s: s["quantidade_itracker"], lambda s: sum(s[c] for c in _OPORTUNIDADES)),
+    "realizacao_budget": (
+        ["quantidade_itracker", "budget"], lambda s: s["quantidade_itracker"], lambda s: s["budget"]),
+    "desvio_budget_vs_oportunidade": (
+        ["budget", *_OPORTUNIDADES], lambda s: sum(s[c] for c in _OPORTUNIDADES) - s["budget"], lambda s: s["budget"]),
+}
+
+_COLUNAS = ", ".join(CAMPOS)
+
+
+def _upsert(campos):
+    # Atualiza só os campos informados, e só quando algum deles mudou
+    return f"""
+    INSERT INTO metricas (cliente_norm, mes, cliente, {", ".join(campos)})
+    VALUES (?, ?, ?, {", ".join("?" for _ in campos)})
+    ON CONFLICT (cliente_norm, mes) DO UPDATE SET
+        cliente = excluded.cliente,
+        {", ".join(f"{c} = excluded.{c}" for c in campos)}
+    WHERE {" OR ".join(f"{c} IS NOT excluded.{c}" for c in campos)}
+    """
+
+
+_UPSERT = _upsert(CAMPOS)
+
+
+def _valor(v):
+    # NaN vira NULL; escalares NumPy viram int/float do Python
+    if hasattr(v, "item"):
+        v = v.item()
+    if v is None or (isinstance(v, float) and math.isnan(v)):
+        return None
+    return v
+
+
+def _chave(cliente, mes):
+    # (nome exibido, cliente normalizado, mês) de uma linha da planilha; None sem cliente ou mês válido
+    if not isinstance(cliente, str) or not _valor(mes):
+        return None
+    cliente = cliente.upper().strip()
+    return cliente, normalizar_texto(cliente), int(mes)
+
+
+def _percentual(num, den):
+    # Mesmo arredondamento de np.round(num / den * 100, 2) da reconciliação
+    return round(num / den * 100 * 100) / 100 if den > 0 else 0.0
+
+
+def _metricas(linha):
+    return dict(zip(CAMPOS, linha))
+
+
+def _numerico(campo):
+    # Só valores numéricos entram em somas e rankings (textos e NULL ficam de fora)
+    return f"CASE WHEN typeof({campo}) IN ('integer', 'real') THEN {campo} END"
+
+
+class _ClientMonths(Mapping):
+    """Meses de um cliente (mês em texto -> métricas), lidos sob demanda."""
+
+    def __init__(self, store, cliente_norm):
+        self._store = store
+        self._cliente = cliente_norm
+
+    def __getitem__(self, mes):
+        try:
+            mes = int(mes)
+        except (TypeError, ValueError):
+            raise KeyError(mes)
+        linha = self._store._query(
+            f"SELECT {_COLUNAS} FROM metricas WHERE cliente_norm = ? AND mes = ?", (self._cliente, mes)
+        )
+        if not linha:
+            raise KeyError(str(mes))
+        return _metricas(linha[0])
+
+    def __iter__(self):
+        linhas = self._store._query("SELECT mes FROM metricas WHERE cliente_norm = ? ORDER BY mes", (self._cliente,))
+        return (str(mes) for (mes,) in linhas)
+
+    def __len__(self):
+        return self._store._query("SELECT COUNT(*) FROM metricas WHERE cliente_norm = ?", (self._cliente,))[0][0]
+
+
+class ClientStore(Mapping):
+    """
+    Dados estruturados dos clientes em SQLite, indexados por cliente
+    normalizado e por mês.
+
+    Funciona como o dicionário de dados_clientes_estruturado.json
+    (Cliente -> Mês -> métricas), então pode ser passado direto para
+    consultar_dados_cliente, mas cada consulta lê só as linhas necessárias
+    em vez de carregar o arquivo inteiro. A gravação é incremental: só
+    linhas novas ou alteradas são escritas.
+
+    Parâmetros:
+        path_db (str): Arquivo do banco (criado se não existir).
+    """
+
+    def __init__(self, path_db=DB_FILE):
+        self.path_db = path_db
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path_db, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def close(self):
+        self._conn.close()
+
+    @property
+    def versao(self):
+        """Contador incrementado a cada gravação que altera dados."""
+        return self._query("SELECT valor FROM meta WHERE chave = 'versao'")[0][0]
+
+    # --- Mapping: Cliente -> Mês -> métricas ---
+
+    def __getitem__(self, cliente):
+        cliente_norm = normalizar_texto(cliente)
+        if not self._query("SELECT 1 FROM metricas WHERE cliente_norm = ? LIMIT 1", (cliente_norm,)):
+            raise KeyError(cliente)
+        return _ClientMonths(self, cliente_norm)
+
+    def __contains__(self, cliente):
+        return bool(self._query("SELECT 1 FROM metricas WHERE cliente_norm = ? LIMIT 1",
+                                (normalizar_texto(cliente),)))
+
+    def __iter__(self):
+        return (c for (c,) in self._query("SELECT DISTINCT cliente FROM metricas ORDER BY cliente_norm"))
+
+    def __len__(self):
+        return self._query("SELECT COUNT(DISTINCT cliente_norm) FROM metricas")[0][0]
+
+    # --- Consultas por faixa ---
+
+    def client_months(self, cliente, mes_inicio=1, mes_fim=12):
+        """
+        Um cliente ao longo de uma faixa de meses.
+
+        Retorna:
+            dict: Mês (texto) -> métricas, em ordem de mês.
+        """
+        linhas = self._query(
+            f"SELECT mes, {_COLUNAS} FROM metricas WHERE cliente_norm = ? AND mes BETWEEN ? AND ? ORDER BY mes",
+            (normalizar_texto(cliente), mes_inicio, mes_fim),
+        )
+        return {str(linha[0]): _metricas(linha[1:]) for linha in linhas}
+
+    def month_clients(self, mes, clientes=None):
+        """
+        Todos os clientes (ou os informados) em um mês.
+
+        Retorna:
+            dict: Cliente -> métricas.
+        """
+        sql = f"SELECT cliente, {_COLUNAS} FROM metricas WHERE mes = ?"
+        params = [int(mes)]
+        if clientes:
+            normalizados = [normalizar_texto(c) for c in clientes]
+            sql += f" AND cliente_norm IN ({', '.join('?' for _ in normalizados)})"
+            params += normalizados
+        return {linha[0]: _metricas(linha[1:]) for linha in self._query(sql + " ORDER BY cliente_norm", params)}
+
+    def totals(self, campos, mes=None):
+        """
+        Somas dos campos sobre todos os clientes (de um mês ou de todos), feitas no banco.
+
+        Retorna:
+            dict: {"clientes": número de clientes, campo: soma, ...}.
+        """
+        desconhecidos = set(campos) - set(CAMPOS)
+        if desconhecidos:
+            raise KeyError(f"Campos desconhecidos: {sorted(desconhecidos)}")
+        sql = (f"SELECT COUNT(DISTINCT cliente_norm), {', '.join(f'TOTAL({_numerico(c)})' for c in campos)} "
+               "FROM metricas")
+        params = ()
+        if mes is not None:
+            sql += " WHERE mes = ?"
+            params = (int(mes),)
+        clientes, *somas = self._query(sql, params)[0]
+        return {"clientes": clientes, **dict(zip(campos, somas))}
+
+    def top(self, campo, mes=None, n=10, ordem="desc"):
+        """
+        Os N pares (cliente, mês) com maior valor do campo (ou menor, com ordem="asc").
+
+        Retorna:
+            list: Tuplas (cliente, mês, valor).
+        """
+        if campo not in CAMPOS:
+            raise KeyError(campo)
+        sql = f"SELECT cliente, mes, {campo} FROM metricas WHERE {_numerico(campo)} IS NOT NULL"
+        params = []
+        if mes is not None:
+            sql += " AND mes = ?"
+            params.append(int(mes))
+        sql += f" ORDER BY {campo} {'ASC' if ordem == 'asc' else 'DESC'}, cliente_norm, mes LIMIT ?"
+        return self._query(sql, params + [int(n)])
+
+    def to_dict(self):
+        """Todo o conteúdo no formato do JSON estruturado."""
+        dados = {}
+        for linha in self._query(f"SELECT cliente, mes, {_COLUNAS} FROM metricas ORDER BY cliente_norm, mes"):
+            dados.setdefault(linha[0], {})[str(linha[1])] = _metricas(linha[2:])
+        return dados
+
+    # --- Gravação incremental ---
+
+    def _write(self, linhas, sql=_UPSERT):
+        with self._lock, self._conn:
+            antes = self._conn.total_changes
+            self._conn.executemany(sql, linhas)
+            alteradas = self._conn.total_changes - antes
+            if alteradas:
+                self._conn.execute("UPDATE meta SET valor = valor + 1 WHERE chave = 'versao'")
+        return alteradas
+
+    def remove(self, chaves):
+        """
+        Apaga pares (cliente, mês); chaves sem mês válido são ignoradas.
+
+        Retorna:
+            int: Linhas apagadas.
+        """
+        return self._write(
+            [(normalizar_texto(str(cliente).upper().strip()), int(mes))
+             for cliente, mes in chaves if _valor(mes)],
+            "DELETE FROM metricas WHERE cliente_norm = ? AND mes = ?",
+        )
+
+    def replace(self, df, chaves):
+        """
+        Regrava os pares (cliente, mês) de `chaves` com todas as linhas de
+        `df` que caem neles (grafias diferentes do mesmo cliente normalizado
+        somam juntas) e apaga os que ficaram sem linhas.
+
+        Parâmetros:
+            df (DataFrame): Planilha completa da versão nova.
+            chaves (iterable): Pares (Cliente, MÊS) alterados ou removidos.
+
+        Retorna:
+            int: Linhas (cliente, mês) inseridas, alteradas ou apagadas.
+        """
+        tocadas = {chave[1:] for chave in (_chave(c, m) for c, m in chaves) if chave}
+        if not tocadas:
+            return 0
+        linhas = [chave[1:] if chave else None
+                  for chave in map(_chave, df['Cliente'].tolist(), df['MÊS'].tolist())]
+        alteradas = self.write_frame(df[[chave in tocadas for chave in linhas]])
+        return alteradas + self._write(
+            sorted(tocadas - set(linhas)), "DELETE FROM metricas WHERE cliente_norm = ? AND mes = ?"
+        )
+
+    def upsert(self, dados):
+        """
+        Grava dados no formato do JSON estruturado (Cliente -> Mês -> métricas).
+
+        Retorna:
+            int: Linhas (cliente, mês) inseridas ou alteradas.
+        """
+        return self._write(
+            (normalizar_texto(cliente), int(mes), cliente, *(_valor(info.get(c)) for c in CAMPOS))
+            for cliente, meses in dados.items()
+            for mes, info in meses.items()
+        )
+
+    def write_frame(self, df):
+        """
+        Grava uma planilha com as colunas de comparativo_final_atualizado.xlsx
+        (a reconciliada ou a do dashboard), uma linha por (cliente, mês).
+
+        Linhas do mesmo cliente normalizado e mês são somadas, e os
+        percentuais são recalculados das somas. Só os campos que a planilha
+        traz (ou que saem deles) são gravados; os demais ficam como estão
+        no banco. Linhas sem cliente ou sem mês válido são ignoradas, como no JSON.
+
+        Retorna:
+            int: Linhas (cliente, mês) inseridas ou alteradas.
+        """
+        somaveis = [c for c in SOMAVEIS if CAMPOS[c] in df.columns]
+        percentuais = [c for c, (campos, _, _) in PERCENTUAIS.items() if set(campos) <= set(somaveis)]
+        colunas = [df[CAMPOS[c]].tolist() for c in somaveis]
+        nomes, somas = {}, {}
+        for cliente, mes, *valores in zip(df['Cliente'].tolist(), df['MÊS'].tolist(), *colunas):
+            chave = _chave(cliente, mes)
+            if chave is None:
+                continue
+            cliente, chave = chave[0], chave[1:]
+            nomes.setdefault(chave, cliente)
+            acumulado = somas.setdefault(chave, [None] * len(somaveis))
+            for i, v in enumerate(valores):
+                v = _valor(v)
+                if isinstance(v, (int, float)):
+                    acumulado[i] = v if acumulado[i] is None else acumulado[i] + v
+
+        linhas = []
+        for chave, acumulado in somas.items():
+            zerado = dict(zip(somaveis, (v or 0 for v in acumulado)))
+            derivados = [_percentual(num(zerado), den(zerado))
+                         for _, num, den in (PERCENTUAIS[c] for c in percentuais)]
+            linhas.append((*chave, nomes[chave], *acumulado, *derivados))
+        if not somaveis:
+            return 0
+        return self._write(linhas, _upsert(somaveis + percentuais))
+
+def open_store(path_db=DB_FILE, path_json=JSON_FILE):
+    """
+    Abre o banco para os leitores (dashboard, query_service). Se ele ainda
+    estiver vazio, importa o JSON estruturado existente, para que os leitores
+    não dependam de a reconciliação já ter gravado o banco.
+
+    Retorna:
+        ClientStore
+    """
+    store = ClientStore(path_db)
+    if not len(store) and os.path.exists(path_json):
+        with open(path_json, "r", encoding="utf-8") as f:
+            store.upsert(json.load(f))
+    return store
@@ -1,47 +1,45 @@
 # data_loader.py
 
 import io
+import time
 import pandas as pd
 import streamlit as st
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseDownload
 
-def download_file_from_gdrive():
+from drive_client import drive_service, record_latency
+from schema import missing_columns
+
+FILE_ID = "1Bphi7lChPqh12kAStpupXJmCbwcdImKo"  # Ajuste o ID conforme necessário
+
+def fetch_workbook_bytes(credentials_info, file_id=FILE_ID, on_progress=None):
+    """
+    Baixa a planilha do Google Drive e retorna o conteúdo bruto (bytes).
+    Não usa nenhum elemento do Streamlit, podendo rodar em threads de fundo.
+    """
+    file = io.BytesIO()
+    inicio = time.perf_counter()
     try:
-        # Recupera as credenciais a partir dos secrets
-        credentials_info = st.secrets["google"]
-        credentials = service_account.Credentials.from_service_account_info(
-            credentials_info, 
-            scopes=['https://www.googleapis.com/auth/drive.readonly']
-        )
-        drive_service = build('drive', 'v3', credentials=credentials)
-        file_id = "1Bphi7lChPqh12kAStpupXJmCbwcdImKo"  # Ajuste o ID conforme necessário
-        st.sidebar.info("Baixando arquivo real do Google Sheets...")
-        request = drive_service.files().get_media(fileId=file_id)
-        file = io.BytesIO()
-        downloader = MediaIoBaseDownload(file, request)
-        done = False
-        progress_bar = st.sidebar.progress(0)
-        status_text = st.sidebar.empty()
-        while not done:
-            status, done = downloader.next_chunk()
-            progress = int(status.progress() * 100)
-            progress_bar.progress(progress)
-            status_text.text(f"Download: {progress}%")
-        status_text.text("Download concluído!")
-        progress_bar.empty()
-        file.seek(0)
-        df = pd.read_excel(file, engine='openpyxl')
-        st.sidebar.success("Arquivo carregado com sucesso!")
-        return df
-    except Exception as e:
-        st.sidebar.error(f"Erro ao acessar o Google Drive: {str(e)}")
-        return None
+        # Client do Drive reaproveitado entre chamadas (credenciais e conexão)
+        with drive_service(credentials_info) as service:
+            request = service.files().get_media(fileId=file_id)
+            downloader = MediaIoBaseDownload(file, request)
+            done = False
+            while not done:
+                status, done = downloader.next_chunk()
+                if on_progress is not None:
+                    on_progress(int(status.progress() * 100))
+    except Exception:
+        record_latency("download", inicio, sucesso=False)
+        raise
+    record_latency("download", inicio)
+    return file.getvalue()
+
+def read_workbook(content):
+    return pd.read_excel(io.BytesIO(content), engine='openpyxl')
 
 def validate_dataframe(df):
-    required_cols = ['Cliente', 'MÊS', 'BUDGET', 'Importação', 'Exportação', 'Cabotagem', 'Quantidade_iTRACKER']
-    missing = [col for col in required_cols if col not in df.columns]
+    # Tipos e faixas são tratados em schema.apply_schema ao montar o dataset
+    missing = missing_columns(df)
     if missing:
         st.error(f"Colunas ausentes: {', '.join(missing)}")
         st.stop()
@@ -0,0 +1,77 @@
+# dataset.py
+
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from fingerprint import dataframe_fingerprint
+from schema import QualityReport, apply_schema
+
+
+@dataclass(frozen=True)
+class SharedDataset:
+    """
+    Dataset imutável compartilhado por todas as sessões do processo.
+
+    As colunas são arrays NumPy somente leitura: qualquer tentativa de
+    escrita in-place levanta erro em vez de corromper os dados das outras sessões.
+    """
+    df: pd.DataFrame
+    versao: str  # impressão digital do conteúdo (fingerprint.dataframe_fingerprint)
+    carregado_em: datetime
+    qualidade: QualityReport
+
+    @property
+    def meses(self):
+        return sorted(self.df['MÊS'].dropna().unique())
+
+    @property
+    def clientes(self):
+        return sorted(self.df['Cliente'].unique())
+
+
+def _freeze(df):
+    colunas = {}
+    for col in df.columns:
+        arr = df[col].to_numpy(copy=True)
+        arr.flags.writeable = False
+        colunas[col] = arr
+    # copy=False mantém os arrays originais (não consolida em um novo bloco)
+    return pd.DataFrame(colunas, index=pd.RangeIndex(len(df)), copy=False)
+
+
+def build_shared_dataset(df, carregado_em):
+    """
+    Limpa a planilha carregada (schema.apply_schema) e devolve o dataset somente leitura.
+
+    A versão do dataset é a impressão digital do conteúdo já limpo: reenvios
+    da mesma planilha mantêm a versão e, com ela, todos os caches das etapas.
+
+    Parâmetros:
+        df (DataFrame): Planilha já validada (colunas obrigatórias presentes).
+        carregado_em (datetime): Momento da carga.
+
+    Retorna:
+        SharedDataset: Dataset imutável pronto para ser lido pelas sessões,
+        com o relatório de qualidade da validação.
+    """
+    df, qualidade = apply_schema(df)
+    return SharedDataset(_freeze(df), dataframe_fingerprint(df), carregado_em, qualidade)
+
+
+def filter_dataset(dataset, meses=(), clientes=()):
+    """
+    Aplica os filtros da sidebar. Sem filtros, devolve o próprio DataFrame
+    compartilhado (sem cópia); com filtros, devolve apenas as linhas selecionadas.
+    """
+    df = dataset.df
+    if not meses and not clientes:
+        return df
+    mask = np.ones(len(df), dtype=bool)
+    if meses:
+        mask &= df['MÊS'].isin(meses).to_numpy()
+    if clientes:
+        mask &= df['Cliente'].isin(clientes).to_numpy()
+    return df[mask]
@@ -0,0 +1,119 @@
+# detailed_table.py
+
+import io
+
+import pandas as pd
+
+NUMERIC_COLS = [
+    'BUDGET (MENSAL)','TARGET ACUMULADO','REALIZADO (SYSTRACKER)',
+    'GAP DE REALIZAÇÃO','OP. IMPO','OP. EXPO','OP. CABO.'
+]
+# Comparações do trends.TrendEngine para o cliente/mês de cada linha
+TREND_COLS = ['VAR. MoM', 'PERF. YTD (%)', 'PERF. 3M (%)']
+SORT_OPTIONS = ["CLIENTE","BUDGET (MENSAL)","REALIZADO (SYSTRACKER)","GAP DE REALIZAÇÃO"]
+
+# Enviado uma vez por página junto com o CSS compartilhado (templates.page_css)
+TABLE_STYLES = """
+<style>
+table.custom-table { width:100%; border-collapse:collapse; font-size:14px; margin-bottom: 20px; }
+.custom-table th { background:#f1f3f5; padding:8px; text-align:center; }
+.custom-table td { padding:8px; }
+.text-left { text-align:left; }
+.text-center { text-align:center; }
+.op-column { background-color: rgba(255, 255, 0, 0.1); }
+.nav-btn { font-size:20px; color:#444; background-color:transparent; border:1px solid #ccc; cursor:pointer;
+    padding:6px 12px; border-radius:6px; transition:background-color 0.2s ease; }
+.nav-btn:disabled { opacity:0.4; cursor:not-allowed; }
+</style>
+"""
+
+
+def build_detailed_df(filtered_df, trends=None):
+    """
+    Tabela detalhada: colunas renomeadas e valores arredondados para inteiro.
+    Com `trends` (TrendEngine), inclui as colunas de TREND_COLS.
+    """
+    # 1) Ordenação inicial
+    detailed_df = filtered_df.sort_values(['Cliente'])
+    ordenado = detailed_df
+
+    # 2) Seleção e renomeação de colunas (removendo a coluna MÊS)
+    detailed_df = detailed_df[[
+        'Cliente','BUDGET','Target Acumulado',
+        'Quantidade_iTRACKER','Gap de Realização',
+        'Importação','Exportação','Cabotagem'
+    ]]
+    detailed_df.columns = [
+        'CLIENTE','BUDGET (MENSAL)','TARGET ACUMULADO',
+        'REALIZADO (SYSTRACKER)','GAP DE REALIZAÇÃO',
+        'OP. IMPO','OP. EXPO','OP. CABO.'
+    ]
+
+    # 3) Arredondar e converter para int (valores inválidos já vêm como NaN do schema)
+    for col in NUMERIC_COLS:
+        detailed_df[col] = detailed_df[col].fillna(0).round(0).astype(int)
+
+    # 4) Variação mês a mês, YTD e performance móvel de 3 meses
+    if trends is not None:
+        comp = trends.lookup(ordenado['Cliente'].to_numpy(), ordenado['MÊS'].to_numpy())
+        detailed_df['VAR. MoM'] = comp['Var_MoM'].fillna(0).round(0).astype(int).to_numpy()
+        detailed_df['PERF. YTD (%)'] = comp['YTD_Performance'].round(1).to_numpy()
+        detailed_df['PERF. 3M (%)'] = comp['Perf_3M'].round(1).to_numpy()
+    return detailed_df
+
+
+def filter_and_sort(detailed_df, selected, sort_by):
+    """Aplica o cliente selecionado e a ordenação escolhida na tabela."""
+    df_filt = detailed_df
+    if selected != "Todos":
+        df_filt = df_filt[df_filt['CLIENTE']==selected]
+    if sort_by == "CLIENTE":
+        df_filt = df_filt.sort_values(['CLIENTE'])
+    else:
+        df_filt = df_filt.sort_values(sort_by, ascending=False)
+    return df_filt
+
+
+def render_table_html(paginated_df):
+    """HTML da página da tabela, com cores por célula na coluna GAP (estilo em TABLE_STYLES)."""
+    html = "<table class='custom-table'><thead><tr>"
+
+    # Cabeçalho
+    for col in paginated_df.columns:
+        html += f"<th>{col}</th>"
+    html += "</tr></thead><tbody>"
+
+    # Linhas da tabela
+    for _, row in paginated_df.iterrows():
+        html += "<tr>"
+        for col in paginated_df.columns:
+            align = "text-center" if col in NUMERIC_COLS or col in TREND_COLS else "text-left"
+            cell_style = ""
+            display_value = "-" if pd.isna(row[col]) else row[col]
+
+            if col == "GAP DE REALIZAÇÃO":
+                value = row[col] * -1  # Inverte o valor original
+                display_value = value  # Mostra valor já invertido
+
+                if value > 0:
+                    cell_style = "background-color: rgba(0, 128, 0, 0.15);"  # Verde para positivos
+                elif value < 0:
+                    cell_style = "background-color: rgba(255, 0, 0, 0.1);"   # Vermelho para negativos
+
+            elif col in ["OP. IMPO", "OP. EXPO", "OP. CABO."]:
+                cell_style = "background-color: rgba(255, 255, 0, 0.1);"
+
+            html += f"<td class='{align}' style='{cell_style}'>{display_value}</td>"
+        html += "</tr>"
+    html += "</tbody></table>"
+    return html
+
+
+def export_csv(df_filt):
+    return df_filt.to_csv(index=False)
+
+
+def export_excel(df_filt):
+    buf = io.BytesIO()
+    df_filt.to_excel(buf, index=False, engine='openpyxl')
+    return buf.getvalue()
@@ -0,0 +1,102 @@
+# drive_client.py
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import httplib2
+import google_auth_httplib2
+from google.oauth2 import service_account
+from googleapiclient.discovery import build
+
+DRIVE_SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
+HTTP_TIMEOUT = 60      # segundos por requisição
+POOL_SIZE = 4          # conexões keep-alive mantidas por credencial
+
+_lock = threading.Lock()
+_credenciais = {}      # chave da conta de serviço -> Credentials (renovadas sob demanda)
+_pools = {}            # chave da conta de serviço -> lista de services ociosos
+_latencias = deque(maxlen=500)
+
+
+def _chave(credentials_info):
+    return (credentials_info.get("client_email"), credentials_info.get("private_key_id"))
+
+
+def _get_credentials(credentials_info):
+    """
+    Retorna as credenciais da conta de serviço, criadas uma única vez por processo.
+    O token é renovado automaticamente pelo AuthorizedHttp quando expira.
+    """
+    chave = _chave(credentials_info)
+    with _lock:
+        credentials = _credenciais.get(chave)
+        if credentials is None:
+            credentials = service_account.Credentials.from_service_account_info(
+                dict(credentials_info), scopes=DRIVE_SCOPES
+            )
+            _credenciais[chave] = credentials
+    return credentials
+
+
+def _build_service(credentials):
+    # Documento de descoberta estático (empacotado no googleapiclient) e
+    # um httplib2.Http próprio para manter a conexão aberta entre chamadas.
+    authed_http = google_auth_httplib2.AuthorizedHttp(
+        credentials, http=httplib2.Http(timeout=HTTP_TIMEOUT)
+    )
+    return build('drive', 'v3', http=authed_http, static_discovery=True, cache_discovery=False)
+
+
+@contextmanager
+def drive_service(credentials_info):
+    """
+    Empresta um client do Drive do pool do processo.
+
+    httplib2.Http não é thread-safe, então cada client é usado por uma
+    única thread por vez e devolvido ao pool ao final do bloco `with`.
+    """
+    chave = _chave(credentials_info)
+    credentials = _get_credentials(credentials_info)
+    with _lock:
+        pool = _pools.setdefault(chave, [])
+        service = pool.pop() if pool else None
+    if service is None:
+        service = _build_service(credentials)
+    try:
+        yield service
+    finally:
+        with _lock:
+            if len(pool) < POOL_SIZE:
+                pool.append(service)
+
+
+def record_latency(operacao, inicio, sucesso=True):
+    """Registra a latência (em ms) de uma chamada ao Drive."""
+    _latencias.append({
+        "operacao": operacao,
+        "ms": (time.perf_counter() - inicio) * 1000,
+        "sucesso": sucesso,
+        "em": time.time(),
+    })
+
+
+def latency_stats(operacao=None):
+    """
+    Resumo das latências registradas no processo.
+
+    Retorna:
+        dict: chamadas, falhas, p50_ms, p95_ms e ultima_ms (None se não houver registros).
+    """
+    registros = [r for r in list(_latencias) if operacao is None or r["operacao"] == operacao]
+    if not registros:
+        return {"chamadas": 0, "falhas": 0, "p50_ms": None, "p95_ms": None, "ultima_ms": None}
+    tempos = sorted(r["ms"] for r in registros)
+    return {
+        "chamadas": len(registros),
+        "falhas": sum(1 for r in registros if not r["sucesso"]),
+        "p50_ms": tempos[len(tempos) // 2],
+        "p95_ms": tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))],
+        "ultima_ms": registros[-1]["ms"],
+    }
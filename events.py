@@ -0,0 +1,276 @@
+# events.py
+#
+# Ingestão contínua dos eventos de movimentação de containers do iTracker.
+# Os eventos chegam como linhas JSON em um arquivo só de acréscimo e
+# atualizam o realizado de cada (Cliente, MÊS), com performance e gap, sem
+# reler a planilha. Só contam eventos posteriores à carga da planilha (os
+# anteriores já estão no Quantidade_iTRACKER dela).
+#
+# Cada linha:
+#   {"cliente": "ALIANÇA", "data": "2025-04-17T10:32:00", "quantidade": 1}
+#   ("quantidade" é opcional, padrão 1)
+#
+#   python events.py [--arquivo .cache/eventos_itracker.jsonl] [--porta 9009]
+#
+# Recebe eventos por TCP (uma linha JSON por evento, ex.: nc localhost 9009)
+# e acrescenta ao arquivo lido pelo dashboard.
+
+import argparse
+import json
+import os
+import socketserver
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from reconciliation import canonical_client
+from refresher import CACHE_DIR
+
+EVENTOS_FILE = os.path.join(CACHE_DIR, "eventos_itracker.jsonl")
+POLL_INTERVAL = 2  # segundos entre leituras do arquivo de eventos
+DEFAULT_PORT = 9009
+
+COLUNAS = ['Cliente', 'MÊS', 'BUDGET', 'Target Acumulado', 'Realizado planilha', 'Eventos',
+           'Realizado', 'Performance', 'Gap de Realização']
+
+
+def parse_event(linha):
+    """
+    Converte uma linha do arquivo em (cliente, data, quantidade).
+
+    Retorna:
+        tuple | None: None para linhas inválidas (JSON quebrado, sem cliente ou data).
+    """
+    try:
+        evento = json.loads(linha)
+        cliente = str(evento["cliente"]).strip()
+        data = datetime.fromisoformat(evento["data"])
+        quantidade = float(evento.get("quantidade", 1))
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+    if not cliente:
+        return None
+    if data.tzinfo is not None:
+        # Mesma referência de carregado_em (horário local sem fuso)
+        data = data.astimezone().replace(tzinfo=None)
+    return cliente, data, quantidade
+
+
+class RealtimeAggregates:
+    """
+    Realizado de cada (Cliente, MÊS) = Quantidade_iTRACKER da planilha + eventos.
+
+    A base (BUDGET, target acumulado e realizado) é somada uma vez por versão
+    dos dados; cada lote de eventos só toca as chaves que aparecem nele, e
+    performance e gap são recalculados apenas para essas chaves.
+
+    Parâmetros:
+        df (DataFrame): Dataset limpo (SharedDataset.df).
+        desde (datetime): Carga da planilha; eventos anteriores são ignorados.
+    """
+
+    def __init__(self, df, desde):
+        self.desde = desde
+        base = pd.DataFrame({
+            'Cliente': df['Cliente'].to_numpy(),
+            'MÊS': df['MÊS'].to_numpy(dtype=float),
+            'BUDGET': np.nan_to_num(df['BUDGET'].to_numpy(dtype=float)),
+            'Target': np.nan_to_num(df['Target Acumulado'].to_numpy(dtype=float)),
+            'Realizado': np.nan_to_num(df['Quantidade_iTRACKER'].to_numpy(dtype=float)),
+        }).dropna(subset=['MÊS'])
+        agg = base.groupby(['Cliente', 'MÊS'], sort=False).sum()
+        # (cliente, mês) -> [budget, target, realizado da planilha, eventos]
+        self._linhas = {
+            (cliente, int(mes)): [budget, target, realizado, 0.0]
+            for (cliente, mes), budget, target, realizado in zip(
+                agg.index, agg['BUDGET'].tolist(), agg['Target'].tolist(), agg['Realizado'].tolist())
+        }
+        self._canonico = {canonical_client(c): c for c in agg.index.get_level_values('Cliente').unique()}
+        self._alterados = {}
+        self._lock = threading.Lock()
+        self.eventos = 0
+        self.ignorados = 0
+        self.ultimo_evento = None
+
+    def _cliente(self, nome):
+        chave = canonical_client(nome)
+        cliente = self._canonico.get(chave)
+        if cliente is None:
+            # Cliente fora da planilha: entra sem budget, como os "fora do budget"
+            cliente = self._canonico[chave] = nome.upper()
+        return cliente
+
+    def apply(self, linhas):
+        """
+        Aplica um lote de linhas do arquivo de eventos.
+
+        Retorna:
+            int: Eventos aplicados (linhas inválidas ou anteriores à carga são ignoradas).
+        """
+        aplicados = 0
+        with self._lock:
+            for linha in linhas:
+                evento = parse_event(linha)
+                if evento is None or evento[1] <= self.desde:
+                    self.ignorados += 1
+                    continue
+                cliente, data, quantidade = evento
+                chave = (self._cliente(cliente), data.month)
+                valores = self._linhas.get(chave)
+                if valores is None:
+                    valores = self._linhas[chave] = [0.0, 0.0, 0.0, 0.0]
+                valores[3] += quantidade
+                self._alterados[chave] = valores
+                if self.ultimo_evento is None or data > self.ultimo_evento:
+                    self.ultimo_evento = data
+                aplicados += 1
+            self.eventos += aplicados
+        return aplicados
+
+    def get(self, cliente, mes):
+        """Valores atuais de um (Cliente, MÊS), ou None se não existir."""
+        with self._lock:
+            cliente = self._canonico.get(canonical_client(cliente), cliente)
+            valores = self._linhas.get((cliente, int(mes)))
+            return None if valores is None else self._linha(cliente, int(mes), valores)
+
+    @staticmethod
+    def _linha(cliente, mes, valores):
+        budget, target, planilha, eventos = valores
+        realizado = planilha + eventos
+        return {
+            'Cliente': cliente,
+            'MÊS': mes,
+            'BUDGET': budget,
+            'Target Acumulado': target,
+            'Realizado planilha': planilha,
+            'Eventos': eventos,
+            'Realizado': realizado,
+            'Performance': realizado / budget * 100 if budget > 0 else np.nan,
+            'Gap de Realização': round(target - realizado, 2),
+        }
+
+    def changed(self, meses=(), clientes=()):
+        """
+        (Cliente, MÊS) que receberam eventos desde a carga, opcionalmente
+        restritos a meses/clientes. O custo depende só das chaves alteradas.
+
+        Retorna:
+            DataFrame: Colunas de COLUNAS, maiores volumes de eventos primeiro.
+        """
+        clientes = set(clientes)
+        with self._lock:
+            linhas = [self._linha(cliente, mes, valores) for (cliente, mes), valores in self._alterados.items()
+                      if (not meses or mes in meses) and (not clientes or cliente in clientes)]
+        alterados = pd.DataFrame(linhas, columns=COLUNAS)
+        return alterados.sort_values('Eventos', ascending=False, ignore_index=True)
+
+
+class EventIngestor:
+    """
+    Acompanha o arquivo de eventos em uma thread de fundo, lendo só o que
+    foi acrescentado desde a última leitura.
+
+    Uma única instância por processo: a cada nova versão dos dados,
+    `attach` troca os agregados e relê o arquivo desde o início (só os
+    eventos posteriores à nova carga contam).
+
+    Parâmetros:
+        path (str): Arquivo de eventos (pode ainda não existir).
+        intervalo (float): Segundos entre leituras.
+    """
+
+    def __init__(self, path=EVENTOS_FILE, intervalo=POLL_INTERVAL):
+        self.path = path
+        self._intervalo = intervalo
+        self._lock = threading.Lock()
+        self._offset = 0
+        self._resto = b""
+        self._thread = None
+        self._versao = None
+        self.agregados = None
+
+    def attach(self, dataset):
+        """
+        Agregados em tempo real da versão do dataset (criados na primeira chamada da versão).
+
+        Retorna:
+            RealtimeAggregates
+        """
+        with self._lock:
+            if self._versao != dataset.versao:
+                self.agregados = RealtimeAggregates(dataset.df, dataset.carregado_em)
+                self._versao = dataset.versao
+                self._offset, self._resto = 0, b""
+                self._poll()
+            return self.agregados
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="event-ingestor", daemon=True)
+                self._thread.start()
+
+    def _read_new(self):
+        try:
+            tamanho = os.path.getsize(self.path)
+        except OSError:
+            return []
+        if tamanho < self._offset:
+            # Arquivo truncado ou recriado: recomeça do início
+            self._offset, self._resto = 0, b""
+        if tamanho == self._offset:
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            novo = f.read(tamanho - self._offset)
+        self._offset += len(novo)
+        # A última linha pode estar pela metade: fica para a próxima leitura
+        *completas, self._resto = (self._resto + novo).split(b"\n")
+        return [linha.decode("utf-8", errors="replace") for linha in completas if linha.strip()]
+
+    def _poll(self):
+        if self.agregados is not None:
+            self.agregados.apply(self._read_new())
+
+    def _loop(self):
+        while True:
+            time.sleep(self._intervalo)
+            with self._lock:
+                self._poll()
+
+
+class _EventHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for linha in self.rfile:
+            if parse_event(linha) is None:
+                continue
+            with self.server.lock:
+                with open(self.server.path, "ab") as f:
+                    f.write(linha.rstrip(b"\r\n") + b"\n")
+
+
+def serve(path=EVENTOS_FILE, porta=DEFAULT_PORT, host="127.0.0.1"):
+    """Recebe eventos por TCP e acrescenta as linhas válidas ao arquivo de eventos."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with socketserver.ThreadingTCPServer((host, porta), _EventHandler) as server:
+        server.daemon_threads = True
+        server.path = path
+        server.lock = threading.Lock()
+        print(f"Recebendo eventos em {host}:{porta} -> {path}")
+        server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recebe eventos do iTracker por TCP e grava no arquivo de eventos.")
+    parser.add_argument("--arquivo", default=EVENTOS_FILE)
+    parser.add_argument("--porta", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+    serve(args.arquivo, args.porta)
+
+
+if __name__ == "__main__":
+    main()
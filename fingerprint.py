@@ -0,0 +1,87 @@
+# fingerprint.py
+
+import functools
+import hashlib
+import inspect
+import threading
+from collections import OrderedDict, defaultdict
+
+import pandas as pd
+
+
+def dataframe_fingerprint(df):
+    """
+    Impressão digital do conteúdo do DataFrame (colunas, tipos e valores).
+
+    Duas cargas com o mesmo conteúdo geram a mesma impressão digital, mesmo que
+    o arquivo tenha sido salvo de novo.
+    """
+    h = hashlib.sha1()
+    h.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()[:16]
+
+
+_lock = threading.Lock()
+_caches = {}
+_stats = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+
+def stage_cache(stage, max_entries=128):
+    """
+    Cache de processo para uma etapa do pipeline, chaveado por (impressão digital, parâmetros).
+
+    O primeiro argumento da função decorada deve ser a impressão digital dos
+    dados. Como no st.cache_resource, argumentos com nome iniciado por "_"
+    não entram na chave (são os objetos já identificados pela impressão digital).
+    O valor cacheado é compartilhado entre sessões e não deve ser alterado.
+
+    A função decorada ganha `.peek(...)`, com a mesma assinatura: devolve o
+    valor já cacheado para aqueles parâmetros, ou None, sem calcular.
+    """
+    def decorator(func):
+        parametros = list(inspect.signature(func).parameters)
+        cache = _caches.setdefault(stage, OrderedDict())
+
+        def chave_de(args, kwargs):
+            valores = dict(zip(parametros, args), **kwargs)
+            return tuple((k, v) for k, v in valores.items() if not k.startswith("_"))
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            chave = chave_de(args, kwargs)
+            with _lock:
+                if chave in cache:
+                    cache.move_to_end(chave)
+                    _stats[stage]["hits"] += 1
+                    return cache[chave]
+                _stats[stage]["misses"] += 1
+            resultado = func(*args, **kwargs)
+            with _lock:
+                cache[chave] = resultado
+                while len(cache) > max_entries:
+                    cache.popitem(last=False)
+            return resultado
+
+        def peek(*args, **kwargs):
+            with _lock:
+                return cache.get(chave_de(args, kwargs))
+
+        wrapper.peek = peek
+        return wrapper
+    return decorator
+
+
+def cache_stats():
+    """
+    Acertos e falhas de cada etapa cacheada desde o início do processo.
+
+    Retorna:
+        DataFrame: Uma linha por etapa com hits, misses e taxa de acerto (%).
+    """
+    with _lock:
+        linhas = [{"etapa": etapa, **valores} for etapa, valores in _stats.items()]
+    stats = pd.DataFrame(linhas, columns=["etapa", "hits", "misses"])
+    total = stats["hits"] + stats["misses"]
+    stats["taxa_acerto"] = (stats["hits"] / total.where(total > 0) * 100).fillna(0).round(1)
+    return stats
@@ -0,0 +1,204 @@
+# ia_context.py
+
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from matching import tokenize
+from utils_dados_clientes import normalizar_texto
+
+MESES = {"JANEIRO": 1, "FEVEREIRO": 2, "MARCO": 3, "ABRIL": 4, "MAIO": 5, "JUNHO": 6, "JULHO": 7,
+         "AGOSTO": 8, "SETEMBRO": 9, "OUTUBRO": 10, "NOVEMBRO": 11, "DEZEMBRO": 12}
+_NOMES_MESES = re.compile(rf"\b({'|'.join(MESES)})\b")  # palavra inteira: MAIOR não é MAIO
+MAX_CONTEXT_CHARS = 6000  # ~1500 tokens
+MAX_CLIENTES = 8
+SYSTEM_PROMPT = (
+    "Você é o iTracker HUB IA. Responda em português, de forma objetiva, usando apenas "
+    "os dados fornecidos. Formato das linhas: mês: budget, realizado (realização %), "
+    "oportunidades imp/exp/cab, aproveitamento %, gap de realização."
+)
+
+
+def data_version(dados):
+    """Versão dos dados estruturados (hash do conteúdo)."""
+    return hashlib.sha1(json.dumps(dados, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def _num(valor, casas=0):
+    try:
+        return f"{float(valor):.{casas}f}"
+    except (TypeError, ValueError):
+        return "?"
+
+
+def summarize_client(cliente, meses):
+    """
+    Resumo compacto de um cliente, uma linha por mês, com as mesmas métricas
+    da resposta de consultar_dados_cliente.
+    """
+    linhas = [cliente]
+    for mes in sorted(meses, key=int):
+        info = meses[mes]
+        linhas.append(
+            f" m{mes}: bud {_num(info['budget'])}, real {_num(info['quantidade_itracker'])} "
+            f"({_num(info['realizacao_budget'], 1)}%), opp {_num(info['importacao'])}/"
+            f"{_num(info['exportacao'])}/{_num(info['cabotagem'])}, "
+            f"aprov {_num(info['aproveitamento_oportunidade'], 1)}%, gap {_num(info['gap_realizacao'], 1)}"
+        )
+    return "\n".join(linhas)
+
+
+class ContextBuilder:
+    """
+    Pré-calcula os resumos de todos os clientes (uma vez por versão) e monta,
+    para cada pergunta, um contexto com apenas os clientes relevantes.
+    """
+
+    def __init__(self, dados):
+        self.versao = data_version(dados)
+        self._dados = dados
+        self._resumos = {c: summarize_client(c, m) for c, m in dados.items()}
+        self._indice = defaultdict(set)
+        for cliente in dados:
+            for t in tokenize(cliente):
+                self._indice[t].add(cliente)
+        # Visão geral: clientes com maior gap somado, usada quando nenhum cliente é citado
+        gap_total = {
+            c: sum(float(i.get("gap_realizacao") or 0) for i in m.values()) for c, m in dados.items()
+        }
+        self._maiores_gaps = sorted(gap_total, key=gap_total.get, reverse=True)
+
+    def relevant_clients(self, pergunta):
+        tokens = tokenize(pergunta)
+        pontos = defaultdict(float)
+        for t in tokens:
+            clientes = self._indice.get(t, ())
+            for c in clientes:
+                # Tokens raros (poucos clientes) pesam mais
+                pontos[c] += 1 / len(clientes)
+        if not pontos:
+            return self._maiores_gaps[:MAX_CLIENTES]
+        return sorted(pontos, key=pontos.get, reverse=True)[:MAX_CLIENTES]
+
+    def months_in(self, pergunta):
+        texto = normalizar_texto(pergunta)
+        meses = {MESES[nome] for nome in _NOMES_MESES.findall(texto)}
+        meses |= {int(m) for m in re.findall(r"\bMES\s+(\d{1,2})\b", texto) if 1 <= int(m) <= 12}
+        return meses
+
+    def build(self, pergunta):
+        """Contexto textual compacto para a pergunta, limitado a MAX_CONTEXT_CHARS."""
+        meses = self.months_in(pergunta)
+        partes, tamanho = [], 0
+        for cliente in self.relevant_clients(pergunta):
+            if meses:
+                filtrado = {m: i for m, i in self._dados[cliente].items() if int(m) in meses}
+                resumo = summarize_client(cliente, filtrado) if filtrado else None
+            else:
+                resumo = self._resumos[cliente]
+            if not resumo:
+                continue
+            if tamanho + len(resumo) > MAX_CONTEXT_CHARS:
+                break
+            partes.append(resumo)
+            tamanho += len(resumo)
+        return "\n".join(partes)
+
+
+class AnswerCache:
+    """
+    Cache LRU de respostas por (pergunta normalizada, versão dos dados), com expiração.
+
+    Compartilhado entre as sessões do processo: get/put são serializados por um lock.
+    """
+
+    def __init__(self, max_entries=256, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(pergunta):
+        return " ".join(re.sub(r"[^A-Z0-9 ]+", " ", normalizar_texto(pergunta)).split())
+
+    def get(self, pergunta, versao):
+        chave = (self.normalize(pergunta), versao)
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return None
+            resposta, criado_em = item
+            if time.monotonic() - criado_em > self.ttl:
+                del self._itens[chave]
+                return None
+            self._itens.move_to_end(chave)
+            return resposta
+
+    def put(self, pergunta, versao, resposta):
+        chave = (self.normalize(pergunta), versao)
+        with self._lock:
+            self._itens[chave] = (resposta, time.monotonic())
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_entries:
+                self._itens.popitem(last=False)
+
+
+class OpenAIModel:
+    """Adaptador para a API de chat da openai (0.28)."""
+
+    def __init__(self, api_key, model="gpt-3.5-turbo"):
+        self.api_key = api_key
+        self.model = model
+
+    def __call__(self, messages):
+        import openai
+        resposta = openai.ChatCompletion.create(
+            model=self.model, messages=messages, api_key=self.api_key, temperature=0.2
+        )
+        return resposta["choices"][0]["message"]["content"]
+
+
+class StubModel:
+    """Modelo local determinístico, para testes e uso sem chave da API."""
+
+    def __init__(self):
+        self.chamadas = 0
+
+    def __call__(self, messages):
+        self.chamadas += 1
+        contexto = messages[-1]["content"].split("\n\nPergunta:")[0]
+        clientes = [linha for linha in contexto.splitlines() if linha and not linha.startswith(" ")]
+        return f"Resposta local baseada em {len(clientes)} cliente(s): {', '.join(clientes)}"
+
+
+class IAHub:
+    """
+    Responde perguntas sobre os clientes usando um contexto enxuto e um cache de respostas.
+
+    Parâmetros:
+        dados (dict): Dados estruturados (Cliente -> Mês -> métricas).
+        model (callable): Recebe a lista de mensagens do chat e retorna o texto da resposta.
+        cache (AnswerCache, opcional): Cache compartilhado de respostas.
+    """
+
+    def __init__(self, dados, model, cache=None):
+        self.contexto = ContextBuilder(dados)
+        self.model = model
+        self.cache = cache if cache is not None else AnswerCache()
+
+    def ask(self, pergunta):
+        versao = self.contexto.versao
+        resposta = self.cache.get(pergunta, versao)
+        if resposta is not None:
+            return resposta
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": f"{self.contexto.build(pergunta)}\n\nPergunta: {pergunta}"},
+        ]
+        resposta = self.model(messages)
+        self.cache.put(pergunta, versao, resposta)
+        return resposta
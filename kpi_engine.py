@@ -0,0 +1,165 @@
+# kpi_engine.py
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from metrics import CLASSES_PERFORMANCE, classify_performance
+from rankings import ClientRankings, aggregate_by_client
+
+KPI_COLS = ['BUDGET', 'Importação', 'Exportação', 'Cabotagem', 'Quantidade_iTRACKER']
+
+
+@dataclass(frozen=True)
+class DashboardMetrics:
+    """Todos os KPIs, insights e entradas das recomendações de um recorte dos dados."""
+    total_registros: int
+    total_budget: float
+    total_importacao: float
+    total_exportacao: float
+    total_cabotagem: float
+    total_oportunidades: float
+    total_realizado: float
+    performance: float
+    aproveitamento: float
+    # Categoria mais ativa entre as oportunidades (recomendações)
+    top_categoria: str
+    top_categoria_valor: float
+    # Categoria com maior movimentação incluindo o Systracker (gráfico comparativo)
+    top_categoria_comparativo: str
+    top_categoria_comparativo_valor: float
+    clientes_sem_budget: int
+    percent_top5: float
+    # Insights do gráfico de performance (top N)
+    perf_total_clientes: int
+    perf_acima_meta: int
+    perf_atencao: int
+    perf_critico: int
+    # Insights do gráfico de GAP
+    gap_total: float
+    gap_media: float
+    gap_top_cliente: str
+    gap_top_valor: float
+    gap_acima_media: float
+    # Insights do gráfico de aproveitamento (top N)
+    aprov_media: float
+    aprov_melhor_cliente: str
+    aprov_melhor_valor: float
+    # Insights do gráfico de clientes fora do budget (top N)
+    sem_budget_clientes_top: int
+    sem_budget_media: float
+    sem_budget_top_cliente: str
+    sem_budget_top_valor: float
+    sem_budget_acima_media: float
+
+
+def _primeiro(df, col):
+    return (df.iloc[0]['Cliente'], df.iloc[0][col]) if not df.empty else (None, 0.0)
+
+
+def compute_metrics(df, rankings: ClientRankings) -> DashboardMetrics:
+    """
+    Calcula todos os KPIs e insights do dashboard.
+
+    Os totais saem de uma única passada vetorizada sobre as colunas numéricas;
+    os insights por cliente reaproveitam o agregado já calculado nos rankings.
+
+    Parâmetros:
+        df (DataFrame): Recorte filtrado.
+        rankings (ClientRankings): Rankings do mesmo recorte.
+
+    Retorna:
+        DashboardMetrics: Resultado tipado com todos os valores exibidos.
+    """
+    totais = np.nansum(df[KPI_COLS].to_numpy(dtype=float), axis=0) if len(df) else np.zeros(len(KPI_COLS))
+    budget, importacao, exportacao, cabotagem, realizado = (float(v) for v in totais)
+    oportunidades = importacao + exportacao + cabotagem
+
+    categorias = {'Importação': importacao, 'Exportação': exportacao, 'Cabotagem': cabotagem}
+    top_categoria = max(categorias, key=categorias.get)
+    comparativo = dict(categorias, **{'Realizado (Systracker)': realizado})
+    top_comparativo = max(comparativo, key=comparativo.get)
+
+    perf = rankings.performance_top['Performance']
+    gap = rankings.gap_all['Gap de Realização']
+    aprov = rankings.aproveitamento_top['Aproveitamento']
+    sem_budget = rankings.sem_budget_top['Quantidade_iTRACKER']
+    gap_cliente, gap_valor = _primeiro(rankings.gap_top, 'Gap de Realização')
+    aprov_cliente, aprov_valor = _primeiro(rankings.aproveitamento_top, 'Aproveitamento')
+    sb_cliente, sb_valor = _primeiro(rankings.sem_budget_top, 'Quantidade_iTRACKER')
+    gap_media = gap.mean() if len(gap) else 0.0
+    sb_media = sem_budget.mean() if len(sem_budget) else 0.0
+
+    return DashboardMetrics(
+        total_registros=len(df),
+        total_budget=budget,
+        total_importacao=importacao,
+        total_exportacao=exportacao,
+        total_cabotagem=cabotagem,
+        total_oportunidades=oportunidades,
+        total_realizado=realizado,
+        performance=(realizado / budget * 100) if budget > 0 else 0,
+        aproveitamento=(realizado / oportunidades * 100) if oportunidades > 0 else 0,
+        top_categoria=top_categoria,
+        top_categoria_valor=categorias[top_categoria],
+        top_categoria_comparativo=top_comparativo,
+        top_categoria_comparativo_valor=comparativo[top_comparativo],
+        clientes_sem_budget=len(rankings.sem_budget_all),
+        percent_top5=(rankings.realizado_top5.sum() / realizado * 100) if realizado > 0 else 0,
+        perf_total_clientes=len(perf),
+        perf_acima_meta=int((perf >= 100).sum()),
+        perf_atencao=int(((perf < 100) & (perf >= 70)).sum()),
+        perf_critico=int((perf < 70).sum()),
+        gap_total=gap.sum(),
+        gap_media=gap_media,
+        gap_top_cliente=gap_cliente,
+        gap_top_valor=gap_valor,
+        gap_acima_media=(gap > gap_media).mean() if len(gap) else 0.0,
+        aprov_media=aprov.mean() if len(aprov) else 0.0,
+        aprov_melhor_cliente=aprov_cliente,
+        aprov_melhor_valor=aprov_valor,
+        sem_budget_clientes_top=len(sem_budget),
+        sem_budget_media=sb_media,
+        sem_budget_top_cliente=sb_cliente,
+        sem_budget_top_valor=sb_valor,
+        sem_budget_acima_media=(sem_budget > sb_media).mean() if len(sem_budget) else 0.0,
+    )
+
+
+
+def compute_metrics_batch(df, by='Cliente', por_cliente=None):
+    """
+    KPIs principais de todos os grupos de uma vez (ex.: todos os clientes ou
+    todos os meses), em uma única passada vetorizada.
+
+    Por cliente, os totais saem de rankings.aggregate_by_client, o mesmo
+    agregado dos rankings: quem já tem ClientRankings.por_cliente passa o
+    agregado em `por_cliente` e nada é agrupado de novo.
+
+    Parâmetros:
+        df (DataFrame): Recorte filtrado.
+        by (str | list): Coluna(s) do agrupamento.
+        por_cliente (DataFrame, opcional): Agregado por cliente já calculado (só com by='Cliente').
+
+    Retorna:
+        DataFrame: Um grupo por linha com os totais de KPI_COLS, Total_Oportunidades,
+        Performance, Aproveitamento (NaN sem budget ou sem oportunidades) e a
+        classe de performance ('CRÍTICO', 'ATENÇÃO', 'META ATINGIDA').
+    """
+    if by == 'Cliente':
+        if por_cliente is None:
+            por_cliente = aggregate_by_client(df, mes_gap=None)
+        agg = por_cliente[KPI_COLS].copy()
+    else:
+        agg = df.groupby(by)[KPI_COLS].sum()
+    budget = agg['BUDGET'].to_numpy(dtype=float)
+    realizado = agg['Quantidade_iTRACKER'].to_numpy(dtype=float)
+    oportunidades = agg[['Importação', 'Exportação', 'Cabotagem']].to_numpy(dtype=float).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        performance = np.where(budget > 0, realizado / budget * 100, np.nan)
+        aproveitamento = np.where(oportunidades > 0, realizado / oportunidades * 100, np.nan)
+    agg['Total_Oportunidades'] = oportunidades
+    agg['Performance'] = performance
+    agg['Aproveitamento'] = aproveitamento
+    agg['Classe'] = CLASSES_PERFORMANCE[classify_performance(performance)]
+    return agg
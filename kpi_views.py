@@ -0,0 +1,158 @@
+# kpi_views.py
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+METRICAS = ['BUDGET', 'OPORTUNIDADES', 'Quantidade_iTRACKER']
+
+
+@dataclass(frozen=True)
+class HeadlineKPIs:
+    """Os quatro KPIs do topo do dashboard."""
+    total_budget: float
+    total_oportunidades: float
+    total_realizado: float
+    performance: float
+
+
+def _kpis(totais):
+    budget, oportunidades, realizado = (float(v) for v in totais)
+    return HeadlineKPIs(budget, oportunidades, realizado, (realizado / budget * 100) if budget else 0)
+
+
+def _valores(df):
+    valores = np.column_stack([
+        df['BUDGET'].to_numpy(dtype=float),
+        np.nansum(df[['Importação', 'Exportação', 'Cabotagem']].to_numpy(dtype=float), axis=1),
+        df['Quantidade_iTRACKER'].to_numpy(dtype=float),
+    ])
+    return np.nan_to_num(valores, nan=0.0)
+
+
+class KPIViews:
+    """
+    KPIs materializados na carga para cada cliente × mês.
+
+    Guarda um cubo (cliente, mês, métrica) com as somas de cada par e os
+    totais já reduzidos por mês, por cliente e geral. Uma seleção múltipla é
+    respondida somando apenas as células selecionadas. Linhas sem mês válido
+    ficam em uma fatia extra, contada apenas quando não há filtro de mês.
+    """
+
+    def __init__(self, df):
+        clientes, cod_cliente = np.unique(df['Cliente'].to_numpy(dtype=object), return_inverse=True)
+        meses = np.sort(df['MÊS'].dropna().unique())
+        self._indices(clientes, meses)
+        self._cubo = np.zeros((len(clientes), len(meses) + 1, len(METRICAS)))
+        np.add.at(self._cubo, (cod_cliente, self._cod_mes(df['MÊS'].to_numpy(dtype=float))), _valores(df))
+        self._reduzir()
+
+    @classmethod
+    def from_arrays(cls, clientes, meses, cubo):
+        """
+        Visão a partir de um cubo já calculado (ex.: publicado por outro
+        processo em shared_dataset). O cubo é usado como está, sem cópia.
+        """
+        views = object.__new__(cls)
+        views._indices(clientes, meses)
+        views._cubo = cubo
+        views._reduzir()
+        return views
+
+    def to_arrays(self):
+        """(clientes, meses, cubo): o suficiente para recriar a visão com from_arrays."""
+        return self._clientes, self._meses, self._cubo
+
+    def _indices(self, clientes, meses):
+        self._clientes = clientes
+        self._meses = meses
+        self._cliente_idx = {c: i for i, c in enumerate(clientes)}
+        self._mes_idx = {m: i for i, m in enumerate(meses)}
+
+    def _cod_mes(self, mes_valores):
+        # Linhas sem mês vão para a fatia extra (última posição)
+        cod_mes = np.full(len(mes_valores), len(self._meses), dtype=np.int64)
+        validos = ~np.isnan(mes_valores) & (mes_valores > 0)
+        cod_mes[validos] = np.searchsorted(self._meses, mes_valores[validos])
+        return cod_mes
+
+    def _reduzir(self):
+        self._por_mes = self._cubo.sum(axis=0)
+        self._por_cliente = self._cubo.sum(axis=1)
+        self._total = self._por_cliente.sum(axis=0)
+
+    def updated(self, chaves, linhas):
+        """
+        Visão da próxima versão dos dados a partir desta, recalculando apenas
+        as células alteradas.
+
+        Clientes e meses que deixaram de existir continuam no cubo com células
+        zeradas (as consultas dão o mesmo resultado que sem eles).
+
+        Parâmetros:
+            chaves (MultiIndex): (Cliente, MÊS) adicionados, removidos ou
+                alterados; MÊS = 0 indica linhas sem mês.
+            linhas (DataFrame): Linhas da nova versão com essas chaves.
+
+        Retorna:
+            KPIViews: Nova visão; esta não é alterada.
+        """
+        cli_chave = chaves.get_level_values('Cliente').to_numpy(dtype=object)
+        mes_chave = chaves.get_level_values('MÊS').to_numpy(dtype=float)
+        novo = object.__new__(KPIViews)
+        novo._indices(
+            np.unique(np.concatenate([self._clientes, cli_chave])),
+            np.unique(np.concatenate([self._meses, mes_chave[mes_chave > 0]])),
+        )
+
+        # Cubo anterior reposicionado nos novos índices (novos clientes/meses entram zerados)
+        novo._cubo = np.zeros((len(novo._clientes), len(novo._meses) + 1, len(METRICAS)))
+        mi_ant = np.append(np.searchsorted(novo._meses, self._meses), len(novo._meses))
+        novo._cubo[np.ix_(np.searchsorted(novo._clientes, self._clientes), mi_ant)] = self._cubo
+
+        novo._cubo[np.searchsorted(novo._clientes, cli_chave), novo._cod_mes(mes_chave)] = 0
+        np.add.at(novo._cubo, (
+            np.searchsorted(novo._clientes, linhas['Cliente'].to_numpy(dtype=object)),
+            novo._cod_mes(linhas['MÊS'].to_numpy(dtype=float)),
+        ), _valores(linhas))
+        novo._reduzir()
+        return novo
+
+    def lookup(self, meses=(), clientes=()):
+        """
+        KPIs de uma combinação de filtros.
+
+        Parâmetros:
+            meses (iterable): Meses selecionados (vazio = todos).
+            clientes (iterable): Clientes selecionados (vazio = todos).
+
+        Retorna:
+            HeadlineKPIs: Totais e performance da seleção.
+        """
+        mi = [self._mes_idx[m] for m in meses if m in self._mes_idx]
+        ci = [self._cliente_idx[c] for c in clientes if c in self._cliente_idx]
+        if (meses and not mi) or (clientes and not ci):
+            return _kpis(np.zeros(len(METRICAS)))
+        if not meses and not clientes:
+            totais = self._total
+        elif not clientes:
+            totais = self._por_mes[mi].sum(axis=0)
+        elif not meses:
+            totais = self._por_cliente[ci].sum(axis=0)
+        else:
+            totais = self._cubo[np.ix_(ci, mi)].sum(axis=(0, 1))
+        return _kpis(totais)
+
+    def by_client(self):
+        """Totais de cada cliente em todos os meses (inclusive linhas sem mês), indexado por Cliente."""
+        return pd.DataFrame(self._por_cliente, index=pd.Index(self._clientes, name='Cliente'), columns=METRICAS)
+
+    def as_frame(self):
+        """Visão (Cliente, MÊS) materializada em formato tabular."""
+        clientes = list(self._clientes)
+        meses = list(self._meses)
+        cubo = self._cubo[:, :len(meses), :]
+        idx = pd.MultiIndex.from_product([clientes, meses], names=['Cliente', 'MÊS'])
+        return pd.DataFrame(cubo.reshape(-1, len(METRICAS)), index=idx, columns=METRICAS)
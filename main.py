@@ -1,37 +1,38 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime
-import numpy as np
-import io, os, math
-import base64
-
-# Import dos módulos criados
-from data_loader import download_file_from_gdrive, validate_dataframe
-from style import COLORS, get_css
-from metrics import format_number, format_percent, custom_round
-
-# --- Função para converter PNG em base64 ---
-def img_to_base64(path):
-    with open(path, "rb") as f:
-        return base64.b64encode(f.read()).decode()
-
-# --- Pré‑carrega todos os ícones como base64 ---
-ICON_BUDGET        = img_to_base64("assets/budget-icon.png")
-ICON_OPORTU        = img_to_base64("assets/oportu-icon.png")
-ICON_REALIZADO     = img_to_base64("assets/realizado-icon.png")
-ICON_PERFORMANCE   = img_to_base64("assets/perf-bud-icon.png")
-ICON_LOGO          = img_to_base64("assets/itracker_logo.png")  # Logo da iTracker
-
-# --- Novos ícones para seções/títulos ---
-ICON_TITULO        = img_to_base64("assets/titulos-icon.png")   # Usado em "VISÃO GERAL"
-ICON_DETAILS       = img_to_base64("assets/details-icon.png")   # Usado em "DADOS DETALHADOS"
-ICON_IA            = img_to_base64("assets/ia-icon.png")        # Usado em "iTracker HUB IA"
-ICON_INSIGHTS      = img_to_base64("assets/insights-icon.png")  # Usado em blocos de insights
-ICON_RECOMENDACOES = img_to_base64("assets/recomen-icon.png")   # Usado em recomendações
+import os
 
+# Copy-on-write: recortes e seleções de colunas compartilham memória com o
+# dataset do processo até que alguém escreva neles.
+pd.set_option("mode.copy_on_write", True)
 
+# Import dos módulos criados
+from data_loader import fetch_workbook_bytes, read_workbook, validate_dataframe
+from drive_client import latency_stats
+from refresher import DataRefresher
+from dataset import build_shared_dataset, filter_dataset
+from rankings import compute_rankings, build_monthly_rankings, update_monthly_rankings, without_gap
+from ia_context import IAHub, AnswerCache, OpenAIModel
+from kpi_engine import compute_metrics, compute_metrics_batch
+from kpi_views import KPIViews
+from fingerprint import stage_cache, cache_stats
+from charts import FIGURES
+from detailed_table import (SORT_OPTIONS, build_detailed_df, filter_and_sort, render_table_html,
+                            export_csv, export_excel)
+from style import COLORS
+import templates
+from client_catalog import ClientCatalog
+from trends import TrendEngine
+from anomalies import anomalies_for, flagged
+from scenarios import ScenarioEngine
+from payload import PayloadMonitor, compact_figure, figure_bytes, recent_reruns
+from events import EventIngestor
+from version_diff import VersionHistory, rows_for
+from client_store import open_store
+from shared_dataset import ENV_LEITOR, SharedReader
+from segments import SEGMENTOS, segment_clients
+from metrics import format_number, format_percent
 
 # Configuração da página
 st.set_page_config(
@@ -41,163 +42,284 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# --- Seleção de Tema na Sidebar ---
-st.markdown(get_css("Clean"), unsafe_allow_html=True)
-
-st.markdown(f"""
-    <style>
-        .titulo-dashboard-container {{
-            position: relative;
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            padding: 35px 30px;
-            border-radius: 15px;
-            background: linear-gradient(to right, #F37021, #ffffff);
-            box-shadow: 0 4px 12px rgba(0, 0, 0, 0.2);
-            text-align: center;
-        }}
-        .titulo-dashboard {{
-            font-size: 38px;
-            font-weight: 800;
-            color: #212529;
-            margin: 0 auto;
-        }}
-        .logo-dashboard {{
-            position: absolute;
-            right: 30px;
-            top: 50%;
-            transform: translateY(-50%);
-            max-height: 65px;
-            margin-right: 5%;
-        }}
-        .subtitulo-dashboard {{
-            position: absolute;
-            bottom: 10px;
-            right: 30px;
-            font-size: 13px;
-            font-style: italic;
-            font-weight: 400;
-            color: #8A8A8A;
-            margin: 0;
-        }}
-        @media (max-width: 768px) {{
-            .titulo-dashboard {{
-                font-size: 28px;
-                width: 100%;
-            }}
-            .logo-dashboard {{
-                position: static;
-                display: block;
-                margin: 10px auto 0;
-                transform: none;
-            }}
-            .subtitulo-dashboard {{
-                position: static;
-                text-align: center;
-                margin-top: 10px;
-            }}
-        }}
-    </style>
-    <div class="titulo-dashboard-container">
-        <h1 class="titulo-dashboard">DASHBOARD DE ANÁLISE COMERCIAL DE CLIENTES</h1>
-        <img class="logo-dashboard" src="data:image/png;base64,{ICON_LOGO}" alt="Logo iTracker">
-        <p class="subtitulo-dashboard">Monitoramento em tempo real do desempenho comercial</p>
-    </div>
-""", unsafe_allow_html=True)
-
-current_date = datetime.now().strftime("%d de %B de %Y")
+# Bytes enviados ao navegador neste rerun (gráficos + blocos HTML). Em modo
+# estrito (DASH_PAYLOAD_ESTRITO=1) o rerun acima do orçamento falha no fim.
+payload = PayloadMonitor()
+
+def html(conteudo, alvo=st):
+    payload.add("html", len(conteudo.encode("utf-8")))
+    alvo.markdown(conteudo, unsafe_allow_html=True)
+
+def chart(nome, figura):
+    # figura = (Figure, bytes) devolvido por get_figure
+    payload.add(nome, figura[1])
+    st.plotly_chart(figura[0], use_container_width=True)
+
+# --- CSS compartilhado (montado uma vez por processo) e cabeçalho ---
+html(templates.page_css())
+html(templates.page_title())
 
 # --- Carregamento dos dados ---
-df = download_file_from_gdrive()
-if df is None:
-    st.error("Não foi possível carregar os dados do Google Sheets.")
-    st.stop()
-
-df = validate_dataframe(df)
-df = df[df['Cliente'].notna() & (df['Cliente'] != "undefined")]
-df['Cliente'] = df['Cliente'].str.upper()
-numeric_cols = ['MÊS','BUDGET','Importação','Exportação','Cabotagem','Quantidade_iTRACKER']
-for col in numeric_cols:
-    df[col] = pd.to_numeric(df[col], errors='coerce')
+# Vários processos atrás de um balanceador (DASH_DATASET_COMPARTILHADO=1): o
+# dataset e os agregados vêm prontos do publicador (shared_dataset.py),
+# mapeados em memória e somente leitura; o processo não baixa a planilha.
+modo_leitor = bool(os.environ.get(ENV_LEITOR))
+
+@st.cache_resource
+def get_shared_reader():
+    return SharedReader()
+
+# Um único refresher por processo: as páginas renderizam a partir da última
+# versão boa enquanto uma versão nova é buscada em segundo plano.
+@st.cache_resource
+def get_refresher():
+    credentials_info = dict(st.secrets["google"])
+    refresher = DataRefresher(lambda: fetch_workbook_bytes(credentials_info), read_workbook)
+    refresher.start()
+    return refresher
+
+# Um único dataset imutável por arquivo baixado, lido por todas as sessões.
+# A partir daqui todas as etapas são chaveadas pela impressão digital do
+# conteúdo (dataset.versao) e pelos parâmetros de cada etapa.
+@st.cache_resource(max_entries=2)
+def get_shared_dataset(versao_arquivo, _snapshot):
+    return build_shared_dataset(validate_dataframe(_snapshot.df), _snapshot.carregado_em)
+
+# Recortes filtrados também ficam no cache do processo (sem cópia por sessão)
+@stage_cache("filtros")
+def get_filtered_df(versao, meses, clientes, _dataset):
+    return filter_dataset(_dataset, meses, clientes)
+
+publicado = None
+if modo_leitor:
+    # Confere a versão publicada a cada rerun e troca quando chega uma nova
+    leitor = get_shared_reader()
+    publicado = leitor.attach()
+    if publicado is None:
+        st.info("Aguardando a primeira publicação dos dados (shared_dataset.py)...")
+        st.stop()
+    if leitor.ultimo_erro is not None:
+        st.sidebar.warning("Não foi possível ler a versão mais recente publicada. Exibindo a anterior.")
+    dataset = publicado.dataset
+    data_date = dataset.carregado_em.strftime("%d de %B de %Y às %H:%M")
+else:
+    refresher = get_refresher()
+    snapshot = refresher.get()
+    if snapshot is None:
+        # Primeira execução sem cópia local: a carga precisa ser síncrona
+        with st.spinner("Baixando arquivo real do Google Sheets..."):
+            snapshot = refresher.refresh_now()
+    if snapshot is None:
+        st.error(f"Não foi possível carregar os dados do Google Sheets: {refresher.ultimo_erro}")
+        st.stop()
+    if refresher.ultimo_erro is not None:
+        st.sidebar.warning("Google Drive indisponível. Exibindo a última versão carregada dos dados.")
+    # Latência dos downloads feitos pelo client do Drive reaproveitado no processo
+    latencia = latency_stats("download")
+    if latencia["chamadas"]:
+        st.sidebar.caption(
+            f"Download do Drive: último em {latencia['ultima_ms']:.0f} ms "
+            f"(p50: {latencia['p50_ms']:.0f} ms, p95: {latencia['p95_ms']:.0f} ms, "
+            f"{latencia['falhas']} falha(s) em {latencia['chamadas']} chamada(s))"
+        )
+    data_date = snapshot.carregado_em.strftime("%d de %B de %Y às %H:%M")
+    dataset = get_shared_dataset(snapshot.versao, snapshot)
+df = dataset.df
+
+# Diff linha a linha contra a versão anterior, usado para atualizar só o que
+# mudou nas etapas abaixo
+@st.cache_resource
+def get_version_history():
+    # O dashboard só lê o armazenamento estruturado: quem grava é o publicador
+    # (shared_dataset.py) ou a reconciliação (python reconciliation.py)
+    return VersionHistory(store=None)
+
+historico = get_version_history()
+mudancas = historico.observe(dataset)
+
+# Eventos do iTracker acrescentados ao arquivo de eventos (events.py), lidos em segundo plano
+@st.cache_resource
+def get_event_ingestor():
+    ingestor = EventIngestor()
+    ingestor.start()
+    return ingestor
+
+# KPIs do topo materializados por cliente × mês na carga de cada versão
+@stage_cache("kpi_views", max_entries=2)
+def get_kpi_views(versao, _dataset):
+    if publicado is not None:
+        return publicado.kpi_views
+    # Versão nova com a anterior ainda no cache: recalcula só as células alteradas
+    diff = historico.diff_for(versao)
+    anterior = get_kpi_views.peek(diff.versao_anterior) if diff is not None else None
+    if anterior is not None:
+        return anterior.updated(diff.chaves, rows_for(_dataset.df, diff.chaves))
+    return KPIViews(_dataset.df)
+
+# Variação mês a mês, YTD e móvel de 3 meses de todos os clientes (uma vez por versão)
+@stage_cache("tendencias", max_entries=2)
+def get_trends(versao, _dataset):
+    if publicado is not None:
+        return publicado.tendencias
+    return TrendEngine(_dataset.df)
+
+# Segmentos de clientes (budget, performance, conversão e tendência), uma vez por versão
+@stage_cache("segmentos", max_entries=2)
+def get_segments(versao, _kpi_views, _trends):
+    return segment_clients(_kpi_views, _trends)
+
+segmentos = get_segments(dataset.versao, get_kpi_views(dataset.versao, dataset), get_trends(dataset.versao, dataset))
 
 # --- Sidebar: Filtros ---
 st.sidebar.markdown("---")
 st.sidebar.markdown("### 🔍 Filtros de Análise")
 meses_map = {1:"Janeiro",2:"Fevereiro",3:"Março",4:"Abril",5:"Maio",6:"Junho",7:"Julho",8:"Agosto",
              9:"Setembro",10:"Outubro",11:"Novembro",12:"Dezembro"}
-meses_disponiveis = sorted(df['MÊS'].unique())
+meses_disponiveis = dataset.meses
 mes_selecionado = st.sidebar.multiselect(
     "Selecione o(s) mês(es):",
     options=meses_disponiveis,
     format_func=lambda x: meses_map.get(x, x),
     default=[meses_disponiveis[0]] if meses_disponiveis else []
 )
-clientes_disponiveis = sorted(df['Cliente'].unique())
-cliente_selecionado = st.sidebar.multiselect("Selecione o(s) cliente(s):", options=clientes_disponiveis)
+# Catálogo de clientes montado uma vez por versão; a lista mostra só os melhores
+# resultados para o texto buscado (mais os clientes já selecionados)
+@stage_cache("catalogo_clientes", max_entries=8)
+def get_client_catalog(versao, filtros, _clientes):
+    return ClientCatalog(_clientes)
+
+@stage_cache("busca_clientes", max_entries=512)
+def search_clients(versao, filtros, consulta, _catalogo):
+    return _catalogo.search(consulta)
+
+def client_options(consulta, selecionados, versao, filtros, catalogo):
+    encontrados = search_clients(versao, filtros, consulta, catalogo)
+    return list(selecionados) + [c for c in encontrados if c not in selecionados]
+
+catalogo_clientes = get_client_catalog(dataset.versao, (), dataset.df['Cliente'])
+busca_cliente = st.sidebar.text_input("Buscar cliente:", key="busca_cliente")
+cliente_selecionado = st.sidebar.multiselect(
+    "Selecione o(s) cliente(s):",
+    options=client_options(busca_cliente, st.session_state.get("clientes_selecionados", []),
+                           dataset.versao, (), catalogo_clientes),
+    key="clientes_selecionados"
+)
+contagem_segmentos = segmentos.counts()
+segmento_selecionado = st.sidebar.multiselect(
+    "Segmento(s) de clientes:",
+    options=[seg for seg in SEGMENTOS if contagem_segmentos[seg]],
+    format_func=lambda seg: f"{seg} ({contagem_segmentos[seg]})",
+    key="segmentos_selecionados"
+)
 if st.sidebar.button("Limpar Filtros"):
     mes_selecionado = []
     cliente_selecionado = []
+    segmento_selecionado = []
+
+# Clientes efetivamente filtrados: os selecionados, restritos aos segmentos escolhidos
+clientes_filtro = cliente_selecionado
+if segmento_selecionado:
+    membros = segmentos.members(segmento_selecionado)
+    if cliente_selecionado:
+        no_segmento = set(membros)
+        clientes_filtro = [c for c in cliente_selecionado if c in no_segmento]
+    else:
+        clientes_filtro = membros
+    if not clientes_filtro:
+        st.warning("Nenhum dos clientes selecionados pertence aos segmentos escolhidos.")
+        st.stop()
 st.sidebar.markdown("---")
 show_detailed_table = st.sidebar.checkbox("Mostrar tabela detalhada", value=True)
 chart_height = st.sidebar.slider("Altura dos gráficos", 400, 800, 500, 50)
 
+kpis = get_kpi_views(dataset.versao, dataset).lookup(mes_selecionado, clientes_filtro)
+
 # Aplica filtros
-if mes_selecionado and cliente_selecionado:
-    filtered_df = df[df['MÊS'].isin(mes_selecionado) & df['Cliente'].isin(cliente_selecionado)]
-elif mes_selecionado:
-    filtered_df = df[df['MÊS'].isin(mes_selecionado)]
-elif cliente_selecionado:
-    filtered_df = df[df['Cliente'].isin(cliente_selecionado)]
-else:
-    filtered_df = df.copy()
+filtered_df = get_filtered_df(dataset.versao, tuple(mes_selecionado), tuple(clientes_filtro), dataset)
+
+# Rankings (top-N) dos gráficos: pré-calculados por mês e cacheados por versão dos dados
+@stage_cache("rankings_mensais", max_entries=2)
+def get_monthly_rankings(versao, _dataset):
+    # Idem: só os meses com linhas alteradas são recalculados
+    diff = historico.diff_for(versao)
+    anteriores = get_monthly_rankings.peek(diff.versao_anterior) if diff is not None else None
+    if anteriores is not None:
+        return update_monthly_rankings(anteriores, _dataset.df, diff.meses)
+    return build_monthly_rankings(_dataset.df)
+
+@stage_cache("rankings")
+def get_rankings(versao, meses, clientes, mes_gap, _filtered_df, _dataset):
+    if len(meses) == 1 and not clientes:
+        mensal = get_monthly_rankings(versao, _dataset).get(meses[0])
+        if mensal is not None:
+            return mensal if meses[0] == mes_gap else without_gap(mensal)
+    return compute_rankings(_filtered_df, mes_gap)
+
+# KPIs, insights e recomendações calculados de uma vez para o recorte
+@stage_cache("metricas")
+def get_metrics(versao, meses, clientes, mes_gap, _filtered_df, _rankings):
+    return compute_metrics(_filtered_df, _rankings)
+
+# Gráficos, tabela detalhada e exportações do recorte
+# Figuras já compactadas, junto com o tamanho do JSON enviado ao navegador
+@stage_cache("graficos")
+def get_figure(nome, versao, filtros, altura, _df):
+    fig = compact_figure(FIGURES[nome](_df, altura))
+    return fig, figure_bytes(fig)
+
+# Anomalias por (Cliente, MÊS): lidas do job em lote (ou calculadas e gravadas na primeira vez)
+@stage_cache("anomalias", max_entries=2)
+def get_anomalies(versao, _dataset):
+    return anomalies_for(_dataset)
+
+@stage_cache("tendencia_mensal")
+def get_monthly_trend(versao, clientes, _trends):
+    return _trends.monthly_totals(clientes)
+
+@stage_cache("tabela")
+def get_detailed_df(versao, filtros, _filtered_df, _trends):
+    return build_detailed_df(_filtered_df, _trends)
+
+@stage_cache("tabela_ordenada")
+def get_sorted_table(versao, filtros, selected, sort_by, _detailed_df):
+    return filter_and_sort(_detailed_df, selected, sort_by)
+
+@stage_cache("tabela_html")
+def get_table_html(versao, filtros, selected, sort_by, records_per_page, page, _paginated_df):
+    return render_table_html(_paginated_df)
+
+@stage_cache("exportacoes", max_entries=32)
+def get_exports(versao, filtros, selected, sort_by, _df_filt):
+    return export_csv(_df_filt), export_excel(_df_filt)
+
+current_month = datetime.now().month
+filtros_key = (tuple(mes_selecionado), tuple(clientes_filtro), current_month)
+rankings = get_rankings(dataset.versao, tuple(mes_selecionado), tuple(clientes_filtro),
+                        current_month, filtered_df, dataset)
+m = get_metrics(dataset.versao, tuple(mes_selecionado), tuple(clientes_filtro),
+                current_month, filtered_df, rankings)
 
 # Mostra filtros ativos
-if mes_selecionado or cliente_selecionado:
+if mes_selecionado or cliente_selecionado or segmento_selecionado:
     filtros = []
     if mes_selecionado:
         meses_txt = [meses_map[m] for m in mes_selecionado]
         filtros.append(f"Meses: {', '.join(meses_txt)}")
     if cliente_selecionado:
         filtros.append(f"Clientes: {', '.join(cliente_selecionado)}")
-    st.markdown(f"<div style='background-color:#E3F2FD;padding:10px;border-radius:5px;'>"
-                f"<b>Filtros ativos:</b> {' | '.join(filtros)}</div>", unsafe_allow_html=True)
+    if segmento_selecionado:
+        filtros.append(f"Segmentos: {', '.join(segmento_selecionado)} ({len(clientes_filtro)} clientes)")
+    html(templates.active_filters(filtros))
 
 st.divider()
 
-# --- Seção de KPIs com ícones embutidos em Base64 ---
-st.markdown(f"""
-<div class='section' style='text-align: center; display: flex; justify-content: center; align-items: center; gap: 12px;'>
-    <img src="data:image/png;base64,{ICON_TITULO}" alt="Ícone Título" style="height: 28px; vertical-align: middle;" />
-    <h3 class='section-title' style="margin: 0;">VISÃO GERAL</h3>
-</div>
-""", unsafe_allow_html=True)
+# --- Seção de KPIs (ícones vêm do CSS compartilhado) ---
+html(templates.section_header("VISÃO GERAL", "titulo", topo=False))
 
 
 # Função do KPI
-def kpi_card(col, icon_b64, title, value, value_style=""):
-    col.markdown(f"""
-    <div style="
-        display: flex;
-        flex-direction: row;
-        align-items: center;
-        justify-content: center;
-        padding: 18px 24px;
-        border-radius: 12px;
-        background-color: #f9f9f9;
-        border-left: 6px solid #2196F3;
-        box-shadow: 0 2px 6px rgba(0,0,0,0.08);
-        min-width: 200px;
-        max-width: 250px;
-        margin: auto;
-    ">
-        <img src="data:image/png;base64,{icon_b64}" width="34" height="34" style="margin-right:14px;" />
-        <div style="display: flex; flex-direction: column; line-height: 1.2;">
-            <span style="font-size: 13px; color: #555;">{title}</span>
-            <span style="font-size: 22px; font-weight: 700; {value_style}">{value}</span>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+def kpi_card(col, icone, title, value, value_style=""):
+    html(templates.kpi_card(icone, title, value, value_style), col)
 
 # Container com mais espaçamento
 left, center, right = st.columns([0.5, 10, 0.5])
@@ -206,79 +328,85 @@ with center:
     col1, spacer1, col2, spacer2, col3, spacer3, col4 = st.columns([1, 0.5, 1, 0.5, 1, 0.5, 1])
 
     # KPI 1: TOTAL BUDGET
-    total_budget = filtered_df['BUDGET'].sum()
-    kpi_card(col1, ICON_BUDGET, "TOTAL BUDGET   ", format_number(total_budget))
+    kpi_card(col1, "budget", "TOTAL BUDGET   ", format_number(kpis.total_budget))
 
     # KPI 2: TOTAL OPORTUNIDADES
-    total_oport = (
-        filtered_df['Importação'].sum() +
-        filtered_df['Exportação'].sum() +
-        filtered_df['Cabotagem'].sum()
-    )
-    kpi_card(col2, ICON_OPORTU, "TOTAL OPORTUNIDADES", format_number(total_oport))
+    kpi_card(col2, "oportunidades", "TOTAL OPORTUNIDADES", format_number(kpis.total_oportunidades))
 
     # KPI 3: REALIZADO
-    total_itr = filtered_df['Quantidade_iTRACKER'].sum()
-    kpi_card(col3, ICON_REALIZADO, "REALIZADO (SYSTRACKER)", format_number(total_itr))
+    kpi_card(col3, "realizado", "REALIZADO (SYSTRACKER)", format_number(kpis.total_realizado))
 
     # KPI 4: PERFORMANCE
-    perf_val = (total_itr / total_budget * 100) if total_budget else 0
+    perf_val = kpis.performance
     color = "color:red;" if perf_val < 100 else "color:green;"
-    kpi_card(col4, ICON_PERFORMANCE, "PERFORMANCE VS BUDGET", format_percent(perf_val), value_style=color)
+    kpi_card(col4, "performance", "PERFORMANCE VS BUDGET", format_percent(perf_val), value_style=color)
 
 st.divider()
 
+# --- Monitoramento em tempo real (eventos do iTracker após a carga da planilha) ---
+tempo_real = get_event_ingestor().attach(dataset)
+if tempo_real.eventos:
+    html(templates.section_header("MONITORAMENTO EM TEMPO REAL", topo=False))
+    st.caption(f"{tempo_real.eventos} movimentações recebidas desde a carga da planilha "
+               f"({dataset.carregado_em.strftime('%d/%m %H:%M')}), "
+               f"a última às {tempo_real.ultimo_evento.strftime('%H:%M:%S')}.")
+    alterados = tempo_real.changed(tuple(mes_selecionado), tuple(clientes_filtro))
+    if alterados.empty:
+        st.caption("Nenhuma movimentação nova para os filtros atuais.")
+    else:
+        st.dataframe(alterados.head(20), hide_index=True, use_container_width=True)
+    st.button("Atualizar movimentações", key="atualizar_tempo_real")
+    st.divider()
+
+# --- O que mudou desde a última atualização (diff por Cliente/MÊS contra a versão anterior) ---
+if mudancas is not None and not mudancas.vazio:
+    detalhes = mudancas.detalhes
+    if mes_selecionado:
+        detalhes = detalhes[detalhes['MÊS'].isin(mes_selecionado)]
+    if clientes_filtro:
+        detalhes = detalhes[detalhes['Cliente'].isin(clientes_filtro)]
+    with st.expander(f"O QUE MUDOU DESDE A ÚLTIMA ATUALIZAÇÃO ({len(mudancas.detalhes)} CLIENTE/MÊS)"):
+        st.caption(f"{len(mudancas.adicionados)} adicionadas | {len(mudancas.modificados)} alteradas | "
+                   f"{len(mudancas.removidos)} removidas em relação à versão anterior dos dados.")
+        if detalhes.empty:
+            st.caption("Nenhuma alteração nos filtros atuais.")
+        else:
+            st.dataframe(detalhes, hide_index=True, use_container_width=True)
+    st.divider()
+
 # --- Tabela de Dados Detalhados ---
 if show_detailed_table and not filtered_df.empty:
 
-    # 1) Ordenação inicial 
-    detailed_df = filtered_df.sort_values(['Cliente'])
-    
-    # 2) Seleção e renomeação de colunas (removendo a coluna MÊS)
-    detailed_df = detailed_df[[
-        'Cliente','BUDGET','Target Acumulado',
-        'Quantidade_iTRACKER','Gap de Realização',
-        'Importação','Exportação','Cabotagem'
-    ]]
-    detailed_df.columns = [
-        'CLIENTE','BUDGET (MENSAL)','TARGET ACUMULADO',
-        'REALIZADO (SYSTRACKER)','GAP DE REALIZAÇÃO',
-        'OP. IMPO','OP. EXPO','OP. CABO.'
-    ]
-
-    # 3) Arredondar e converter para int
-    numeric_cols = [
-        'BUDGET (MENSAL)','TARGET ACUMULADO','REALIZADO (SYSTRACKER)',
-        'GAP DE REALIZAÇÃO','OP. IMPO','OP. EXPO','OP. CABO.'
-    ]
-    for col in numeric_cols:
-        detailed_df[col] = detailed_df[col].round(0).astype(int)
+    # 1-3) Ordenação, seleção/renomeação de colunas e arredondamento (cacheados por versão)
+    detailed_df = get_detailed_df(dataset.versao, filtros_key, filtered_df, get_trends(dataset.versao, dataset))
 
     # 4) Preparar opções e estados
-    clientes = sorted(detailed_df['CLIENTE'].unique().tolist())
-    sort_options = ["CLIENTE","BUDGET (MENSAL)","REALIZADO (SYSTRACKER)","GAP DE REALIZAÇÃO"]
+    catalogo_tabela = get_client_catalog(dataset.versao, filtros_key, detailed_df['CLIENTE'])
+    sort_options = SORT_OPTIONS
     selected = st.session_state.get("selected_client", "Todos")
     sort_by = st.session_state.get("sort_by", "CLIENTE")
     records_per_page = st.session_state.get("records_per_page", 10)
     page = st.session_state.get("detailed_table_page", 1)
 
     # Exibir título
-    st.markdown(f"""
-    <div class='section' style='text-align: center; display: flex; justify-content: center; align-items: center; gap: 12px;'>
-        <img src="data:image/png;base64,{ICON_DETAILS}" alt="Ícone Detalhes" style="height: 28px; vertical-align: middle;" />
-        <h3 class='section-title' style="margin: 0;">DADOS REFERENTES AO MÊS DE ABRIL</h3>
-    </div>
-    """, unsafe_allow_html=True)
+    html(templates.section_header("DADOS REFERENTES AO MÊS DE ABRIL", topo=False))
 
 
     # 5) Controles de filtro e ordenação
     with st.container():
         filter_col1, filter_col2, filter_col3 = st.columns([2, 2, 1], gap="medium")
         with filter_col1:
+            busca_tabela = st.text_input("Buscar cliente na tabela", key="busca_tabela")
+            if selected != "Todos" and selected not in catalogo_tabela:
+                selected = "Todos"
+                st.session_state["selected_client"] = selected
+            selecionados = [] if selected == "Todos" else [selected]
+            clientes = ["Todos"] + client_options(busca_tabela, selecionados, dataset.versao,
+                                                  filtros_key, catalogo_tabela)
             selected = st.selectbox(
                 "Selecionar Cliente",
-                ["Todos"] + clientes,
-                index=(["Todos"]+clientes).index(selected),
+                clientes,
+                index=clientes.index(selected),
                 key="selected_client"
             )
         with filter_col2:
@@ -297,13 +425,7 @@ if show_detailed_table and not filtered_df.empty:
             )
 
     # 6) Filtrar e ordenar
-    df_filt = detailed_df.copy()
-    if selected != "Todos":
-        df_filt = df_filt[df_filt['CLIENTE']==selected]
-    if sort_by == "CLIENTE":
-        df_filt = df_filt.sort_values(['CLIENTE'])
-    else:
-        df_filt = df_filt.sort_values(sort_by, ascending=False)
+    df_filt = get_sorted_table(dataset.versao, filtros_key, selected, sort_by, detailed_df)
 
     # 7) Paginar
     total_pages = max(1, (len(df_filt)-1)//records_per_page + 1)
@@ -314,72 +436,12 @@ if show_detailed_table and not filtered_df.empty:
     st.session_state["detailed_table_page"] = page
 
     # 8) Renderizar tabela HTML com cores por célula da coluna GAP
-    styles = """
-    <style>
-    table.custom-table { width:100%; border-collapse:collapse; font-size:14px; margin-bottom: 20px; }
-    .custom-table th { background:#f1f3f5; padding:8px; text-align:center; }
-    .custom-table td { padding:8px; }
-    .text-left { text-align:left; }
-    .text-center { text-align:center; }
-    .op-column { background-color: rgba(255, 255, 0, 0.1); }
-    </style>
-    """
-    html = styles + "<table class='custom-table'><thead><tr>"
-
-    # Cabeçalho
-    for col in paginated_df.columns:
-        html += f"<th>{col}</th>"
-    html += "</tr></thead><tbody>"
-
-    # Linhas da tabela
-    for _, row in paginated_df.iterrows():
-        html += "<tr>"
-        for col in paginated_df.columns:
-            align = "text-center" if col in numeric_cols else "text-left"
-            cell_style = ""
-            display_value = row[col]
-
-            if col == "GAP DE REALIZAÇÃO":
-                value = row[col] * -1  # Inverte o valor original
-                display_value = value  # Mostra valor já invertido
-
-                if value > 0:
-                    cell_style = "background-color: rgba(0, 128, 0, 0.15);"  # Verde para positivos
-                elif value < 0:
-                    cell_style = "background-color: rgba(255, 0, 0, 0.1);"   # Vermelho para negativos
-
-            elif col in ["OP. IMPO", "OP. EXPO", "OP. CABO."]:
-                cell_style = "background-color: rgba(255, 255, 0, 0.1);"
-
-            html += f"<td class='{align}' style='{cell_style}'>{display_value}</td>"
-        html += "</tr>"
-    html += "</tbody></table>"
+    table_html = get_table_html(dataset.versao, filtros_key, selected, sort_by, records_per_page, page, paginated_df)
 
     # Exibir no Streamlit
-    st.markdown(html, unsafe_allow_html=True)
-
-
-    # 9) Rodapé com navegação e downloads organizados
-    nav_styles = """
-    <style>
-    .nav-btn {
-        font-size: 20px;
-        color: #444;
-        background-color: transparent;
-        border: 1px solid #ccc;
-        cursor: pointer;
-        padding: 6px 12px;
-        border-radius: 6px;
-        transition: background-color 0.2s ease;
-    }
-    .nav-btn:disabled {
-        opacity: 0.4;
-        cursor: not-allowed;
-    }
-    </style>
-    """
-    st.markdown(nav_styles, unsafe_allow_html=True)
+    html(table_html)
 
+    # 9) Rodapé com navegação e downloads organizados (estilo .nav-btn em TABLE_STYLES)
     col_nav1, col_nav2, col_center, col_dl1, col_dl2 = st.columns([1, 1, 6, 1, 1])
 
     with col_nav1:
@@ -392,18 +454,16 @@ if show_detailed_table and not filtered_df.empty:
     if "next_page_btn" in st.session_state and st.session_state["next_page_btn"] and page < total_pages:
         st.session_state["detailed_table_page"] = page + 1
 
+    csv_data, excel_data = get_exports(dataset.versao, filtros_key, selected, sort_by, df_filt)
     with col_dl1:
         st.download_button(
             "📥 BAIXAR CSV",
-            df_filt.to_csv(index=False),
+            csv_data,
             "dados_detalhados.csv",
             "text/csv",
             key="download-csv"
         )
     with col_dl2:
-        buf = io.BytesIO()
-        df_filt.to_excel(buf, index=False, engine='openpyxl')
-        excel_data = buf.getvalue()
         st.download_button(
             "📥 BAIXAR EXCEL",
             excel_data,
@@ -416,63 +476,12 @@ st.divider()
 
 # --- Gráfico 1: Performance vs Budget ---
 if not filtered_df.empty:
-    budget_df = filtered_df[filtered_df['BUDGET'] > 0].copy()
-    if not budget_df.empty:
+    if not rankings.performance_top.empty:
         # Título principal com ícone
-        st.markdown(f"""
-        <div class='section' style='text-align: center; display: flex; justify-content: center; align-items: center; gap: 12px; margin-top: 15px;'>
-            <img src="data:image/png;base64,{ICON_DETAILS}" alt="Ícone Detalhes" style="height: 28px; vertical-align: middle;" />
-            <h3 class='section-title' style="margin: 0;">PERFORMANCE VS BUDGET POR CLIENTE</h3>
-        </div>
-        """, unsafe_allow_html=True)
-
-        # Processamento dos dados
-        df_graph3 = budget_df.groupby('Cliente', as_index=False).agg({
-            'BUDGET': 'sum',
-            'Quantidade_iTRACKER': 'sum'
-        })
-        df_graph3['Performance'] = (df_graph3['Quantidade_iTRACKER'] / df_graph3['BUDGET']) * 100
-        df_graph3 = df_graph3.sort_values('Performance', ascending=False)
-        if len(df_graph3) > 15:
-            df_graph3 = df_graph3.head(15)
-
-        df_graph3['Color'] = df_graph3['Performance'].apply(
-            lambda x: COLORS['success'] if x >= 100 else (COLORS['warning'] if x >= 70 else COLORS['danger'])
-        )
-
-        # Gráfico
-        fig3 = go.Figure()
-        fig3.add_trace(go.Bar(
-            x=df_graph3['Performance'],
-            y=df_graph3['Cliente'],
-            orientation='h',
-            marker_color=df_graph3['Color'],
-            text=df_graph3['Performance'].apply(lambda x: f'{x:.1f}%'),
-            hovertemplate='<b>%{y}</b><br>Performance: %{x:.1f}%<br>Budget: %{customdata[0]:,.0f}<br>Realizado: %{customdata[1]:,.0f}<extra></extra>',
-            customdata=np.stack((df_graph3['BUDGET'], df_graph3['Quantidade_iTRACKER']), axis=-1)
-        ))
-
-        # Formatação visual
-        fig3.add_shape(type="line", x0=100, y0=-0.5, x1=100, y1=len(df_graph3)-0.5, line=dict(color="black", width=2, dash="dash"))
-        fig3.add_shape(type="rect", x0=0, y0=-0.5, x1=70, y1=len(df_graph3)-0.5, line=dict(width=0), fillcolor="rgba(239, 83, 80, 0.1)", layer="below")
-        fig3.add_shape(type="rect", x0=70, y0=-0.5, x1=100, y1=len(df_graph3)-0.5, line=dict(width=0), fillcolor="rgba(255, 167, 38, 0.1)", layer="below")
-        fig3.add_shape(type="rect", x0=100, y0=-0.5, x1=df_graph3['Performance'].max() * 1.1, y1=len(df_graph3)-0.5, line=dict(width=0), fillcolor="rgba(102, 187, 106, 0.1)", layer="below")
-
-        fig3.add_annotation(x=35, y=len(df_graph3)-1, text="CRÍTICO (<70%)", showarrow=False, font=dict(color=COLORS['danger']), xanchor="center", yanchor="top")
-        fig3.add_annotation(x=85, y=len(df_graph3)-1, text="ATENÇÃO (70-100%)", showarrow=False, font=dict(color=COLORS['warning']), xanchor="center", yanchor="top")
-        fig3.add_annotation(x=min(150, df_graph3['Performance'].max() * 0.9), y=len(df_graph3)-1, text="META ATINGIDA (>100%)", showarrow=False, font=dict(color=COLORS['success']), xanchor="center", yanchor="top")
-
-        fig3.update_traces(textposition='inside')
-        fig3.update_layout(
-            xaxis_title='PERFORMANCE (%)',
-            yaxis_title='CLIENTE',
-            height=chart_height,
-            template="plotly",
-            margin=dict(l=60, r=30, t=30, b=40),
-            xaxis=dict(range=[0, max(200, df_graph3['Performance'].max() * 1.1)])
-        )
+        html(templates.section_header("PERFORMANCE VS BUDGET POR CLIENTE"))
 
-        st.plotly_chart(fig3, use_container_width=True)
+        fig3 = get_figure("performance", dataset.versao, filtros_key, chart_height, rankings.performance_top)
+        chart("performance", fig3)
 
         # Explicação da lógica
         with st.expander("VER RAZÃO DO CÁLCULO DESTE GRÁFICO"):
@@ -485,26 +494,17 @@ if not filtered_df.empty:
             """)
 
         # Bloco de Insights
-        total_clientes = len(df_graph3)
-        clientes_acima_meta = len(df_graph3[df_graph3['Performance'] >= 100])
-        clientes_atencao = len(df_graph3[(df_graph3['Performance'] < 100) & (df_graph3['Performance'] >= 70)])
-        clientes_critico = len(df_graph3[df_graph3['Performance'] < 70])
+        total_clientes = m.perf_total_clientes
+        clientes_acima_meta = m.perf_acima_meta
+        clientes_atencao = m.perf_atencao
+        clientes_critico = m.perf_critico
         data_atual = datetime.now().strftime('%d de %B')
 
-        st.markdown(f"""
-        <div style='background-color:{COLORS['background']}; padding:10px; border-radius:5px; margin-top:10px;'>
-            <div style='display: flex; align-items: center; gap: 10px;'>
-                <img src="data:image/png;base64,{ICON_INSIGHTS}" alt="Ícone Insights" style="height: 20px;" />
-                <h5 style='margin: 0;'>INSIGHTS - PERFORMANCE</h5>
-            </div>
-            <p style='margin-bottom:10px;'>Com base nos dados disponíveis até o dia <b>{data_atual}</b>, dos {total_clientes} clientes analisados:</p>
-            <ul>
-                <li><span style='color:{COLORS["success"]};'>✓ {clientes_acima_meta} clientes ({clientes_acima_meta/total_clientes*100:.1f}%) atingem ou superam a meta</span></li>
-                <li><span style='color:{COLORS["warning"]};'>⚠️ {clientes_atencao} clientes ({clientes_atencao/total_clientes*100:.1f}%) estão em zona de atenção (70-99%)</span></li>
-                <li><span style='color:{COLORS["danger"]};'>❌ {clientes_critico} clientes ({clientes_critico/total_clientes*100:.1f}%) estão em situação crítica (<70%)</span></li>
-            </ul>
-        </div>
-        """, unsafe_allow_html=True)
+        html(templates.insight_block("INSIGHTS - PERFORMANCE", [
+            f"<span style='color:{COLORS['success']};'>✓ {clientes_acima_meta} clientes ({clientes_acima_meta/total_clientes*100:.1f}%) atingem ou superam a meta</span>",
+            f"<span style='color:{COLORS['warning']};'>⚠️ {clientes_atencao} clientes ({clientes_atencao/total_clientes*100:.1f}%) estão em zona de atenção (70-99%)</span>",
+            f"<span style='color:{COLORS['danger']};'>❌ {clientes_critico} clientes ({clientes_critico/total_clientes*100:.1f}%) estão em situação crítica (<70%)</span>",
+        ], intro=f"Com base nos dados disponíveis até o dia <b>{data_atual}</b>, dos {total_clientes} clientes analisados:"))
     else:
         st.info("SEM DADOS DE BUDGET DISPONÍVEIS PARA OS FILTROS SELECIONADOS.")
         
@@ -512,71 +512,31 @@ st.divider()
 
 # --- Gráfico 2: GAP de Atendimento ---
 if not filtered_df.empty:
-    current_month = datetime.now().month
-    df_current = filtered_df[filtered_df['MÊS'] == current_month]
-    if not df_current.empty:
-        df_gap = df_current.groupby("Cliente", as_index=False).agg({
-            "Target Acumulado": "sum",
-            "Quantidade_iTRACKER": "sum",
-            "Gap de Realização": "sum"
-        })
-        df_gap['Gap de Realização'] = df_gap['Gap de Realização'].apply(custom_round)
-        df_gap = df_gap.sort_values("Gap de Realização", ascending=False)
-        df_gap_top = df_gap.head(15)
-
-        fig_gap = px.bar(
-            df_gap_top,
-            x="Gap de Realização",
-            y="Cliente",
-            orientation="h",
-            text="Gap de Realização",
-            color="Gap de Realização",
-            color_continuous_scale=px.colors.sequential.Reds,
-            labels={"Gap de Realização": "Gap de Atendimento"},
-            title=""
-        )
-        fig_gap.update_layout(
-            yaxis=dict(autorange="reversed"),
-            height=chart_height,
-            margin=dict(l=60, r=60, t=40, b=80),
-            legend=dict(orientation='h', y=-0.25, x=0.5, xanchor='center'),
-            plot_bgcolor="white"
-        )
-        fig_gap.update_traces(texttemplate='%{text}', textposition='outside')
+    df_gap = rankings.gap_all
+    if not df_gap.empty:
+        df_gap_top = rankings.gap_top
+
+        fig_gap = get_figure("gap", dataset.versao, filtros_key, chart_height, df_gap_top)
 
         # Título principal com ícone
-        st.markdown(f"""
-        <div class='section' style='text-align: center; display: flex; justify-content: center; align-items: center; gap: 12px; margin-top: 15px;'>
-            <img src="data:image/png;base64,{ICON_DETAILS}" alt="Ícone GAP" style="height: 28px; vertical-align: middle;" />
-            <h3 class='section-title' style="margin: 0;">CLIENTES COM MAIOR GAP VS TARGET ACUMULADO</h3>
-        </div>
-        """, unsafe_allow_html=True)
+        html(templates.section_header("CLIENTES COM MAIOR GAP VS TARGET ACUMULADO"))
 
-        st.plotly_chart(fig_gap, use_container_width=True)
+        chart("gap", fig_gap)
 
         # --- INSIGHTS DO GRÁFICO DE GAP ---
-        total_gap = df_gap['Gap de Realização'].sum()
-        media_gap = df_gap['Gap de Realização'].mean()
-        top_cliente_gap = df_gap.iloc[0]['Cliente']
-        top_gap_valor = df_gap.iloc[0]['Gap de Realização']
-        acima_media = (df_gap['Gap de Realização'] > media_gap).mean()
+        total_gap = m.gap_total
+        media_gap = m.gap_media
+        top_cliente_gap = m.gap_top_cliente
+        top_gap_valor = m.gap_top_valor
+        acima_media = m.gap_acima_media
         data_atual = datetime.now().strftime('%d de %B')
 
-        st.markdown(f"""
-        <div style='background-color:{COLORS['background']}; padding:10px; border-radius:5px; margin-top:10px;'>
-            <div style='display: flex; align-items: center; gap: 10px;'>
-                <img src="data:image/png;base64,{ICON_INSIGHTS}" alt="Ícone Insights" style="height: 20px;" />
-                <h5 style='margin: 0;'>INSIGHTS - GAP DE ATENDIMENTO</h5>
-            </div>
-            <p style='margin-bottom:10px;'>Com base nos dados disponíveis até o dia <b>{data_atual}</b>, os principais destaques são:</p>
-            <ul>
-                <li>O GAP TOTAL no mês corrente é de <b>{format_number(total_gap)}</b> containers</li>
-                <li>A MÉDIA de gap entre os clientes é de <b>{format_number(media_gap)}</b> containers</li>
-                <li>O MAIOR GAP é do cliente <b>{top_cliente_gap}</b> com <b>{format_number(top_gap_valor)}</b> containers</li>
-                <li>{"Mais da metade dos clientes apresentam GAP acima da média" if acima_media > 0.5 else "A maioria dos clientes está abaixo da média de GAP"}</li>
-            </ul>
-        </div>
-        """, unsafe_allow_html=True)
+        html(templates.insight_block("INSIGHTS - GAP DE ATENDIMENTO", [
+            f"O GAP TOTAL no mês corrente é de <b>{format_number(total_gap)}</b> containers",
+            f"A MÉDIA de gap entre os clientes é de <b>{format_number(media_gap)}</b> containers",
+            f"O MAIOR GAP é do cliente <b>{top_cliente_gap}</b> com <b>{format_number(top_gap_valor)}</b> containers",
+            "Mais da metade dos clientes apresentam GAP acima da média" if acima_media > 0.5 else "A maioria dos clientes está abaixo da média de GAP",
+        ], intro=f"Com base nos dados disponíveis até o dia <b>{data_atual}</b>, os principais destaques são:"))
 
         with st.expander("VER RAZÃO DO CÁLCULO DESTE GRÁFICO"):
             st.markdown("""
@@ -594,106 +554,27 @@ st.divider()
 # --- Gráfico 3: Comparativo Budget vs Realizado por Categoria ---
 if not filtered_df.empty:
     # Título principal com ícone
-    st.markdown(f"""
-    <div class='section' style='text-align: center; display: flex; justify-content: center; align-items: center; gap: 12px; margin-top: 15px;'>
-        <img src="data:image/png;base64,{ICON_DETAILS}" alt="Ícone Comparativo" style="height: 28px; vertical-align: middle;" />
-        <h3 class='section-title' style="margin: 0;">COMPARATIVO BUDGET VS REALIZADO POR CATEGORIA</h3>
-    </div>
-    """, unsafe_allow_html=True)
-
-    df_mes_atual = filtered_df.copy()
-
-    # Agrupamento
-    df_grouped_all = df_mes_atual.groupby('Cliente', as_index=False).agg({
-        'BUDGET': 'sum',
-        'Importação': 'sum',
-        'Exportação': 'sum',
-        'Cabotagem': 'sum',
-        'Quantidade_iTRACKER': 'sum'
-    }).rename(columns={'Quantidade_iTRACKER': 'Realizado (Systracker)'})
-
-    df_grouped_all['Total'] = df_grouped_all[[
-        'BUDGET', 'Importação', 'Exportação', 'Cabotagem', 'Realizado (Systracker)'
-    ]].sum(axis=1)
-
-    df_grouped = df_grouped_all.sort_values('Total', ascending=False).head(15)
-
-    df_melted = df_grouped.melt(
-        id_vars='Cliente',
-        value_vars=['BUDGET', 'Importação', 'Exportação', 'Cabotagem', 'Realizado (Systracker)'],
-        var_name='Categoria',
-        value_name='Quantidade'
-    )
-    df_melted = df_melted[df_melted['Quantidade'] > 0]
-    df_melted['Categoria_Label'] = df_melted['Categoria']
-
-    fig = px.bar(
-        df_melted,
-        x='Cliente',
-        y='Quantidade',
-        color='Categoria',
-        barmode='group',
-        height=chart_height,
-        color_discrete_map={
-            'BUDGET': '#0D47A1',
-            'Importação': '#00897B',
-            'Exportação': '#F4511E',
-            'Cabotagem': '#FFB300',
-            'Realizado (Systracker)': '#6A1B9A'
-        },
-        labels={'Quantidade': 'QTD. DE CONTAINERS'},
-        custom_data=['Categoria_Label']
-    )
-    fig.update_traces(
-        texttemplate='%{y:.0f}',
-        textposition='outside',
-        hovertemplate='<b>CLIENTE:</b> %{x}<br><b>CATEGORIA:</b> %{customdata[0]}<br><b>QTD.:</b> %{y:.0f}<extra></extra>'
-    )
-    fig.update_layout(
-        xaxis=dict(title='CLIENTE', tickangle=-30),
-        yaxis=dict(title='QTD. DE CONTAINERS', range=[0, df_melted['Quantidade'].max() * 1.1]),
-        legend=dict(orientation='h', y=-0.25, x=0.5, xanchor='center'),
-        margin=dict(l=60, r=40, t=20, b=100),
-        template='plotly_white',
-        bargap=0.25,
-        title_text="",
-        plot_bgcolor="white"
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    html(templates.section_header("COMPARATIVO BUDGET VS REALIZADO POR CATEGORIA"))
+
+    # Agrupamento (top 15 por Total já calculado no ranking)
+    df_grouped = rankings.total_top
+
+    fig = get_figure("categorias", dataset.versao, filtros_key, chart_height, df_grouped)
+    chart("categorias", fig)
 
     # Insights do gráfico
-    total_budget_all = df_grouped_all['BUDGET'].sum()
-    total_importacao = df_grouped_all['Importação'].sum()
-    total_exportacao = df_grouped_all['Exportação'].sum()
-    total_cabotagem = df_grouped_all['Cabotagem'].sum()
-    total_realizado_systracker = df_grouped_all['Realizado (Systracker)'].sum()
-    total_realizado = total_importacao + total_exportacao + total_cabotagem
-
-    overall_ratio = (total_realizado / total_budget_all * 100) if total_budget_all > 0 else 0
-    realized_categories = {
-        'Importação': total_importacao,
-        'Exportação': total_exportacao,
-        'Cabotagem': total_cabotagem,
-        'Realizado (Systracker)': total_realizado_systracker
-    }
-    top_category = max(realized_categories, key=realized_categories.get)
+    total_budget_all = m.total_budget
+    total_realizado_systracker = m.total_realizado
+    total_realizado = m.total_oportunidades
+    top_category = m.top_categoria_comparativo
     data_atual = datetime.now().strftime('%d de %B')
 
-    st.markdown(f"""
-    <div style='background-color:{COLORS['background']}; padding:10px; border-radius:5px; margin-top:10px;'>
-        <div style='display: flex; align-items: center; gap: 10px;'>
-            <img src="data:image/png;base64,{ICON_INSIGHTS}" alt="Ícone Insights" style="height: 20px;" />
-            <h5 style='margin: 0;'>INSIGHTS - COMPARATIVO BUDGET VS REALIZADO</h5>
-        </div>
-        <p style='margin-bottom:10px;'>Com base nos dados disponíveis até o dia <b>{data_atual}</b> (somente mês corrente):</p>
-        <ul>
-            <li>Budget total previsto: <b>{format_number(total_budget_all)}</b> containers</li>
-            <li>Total de containers realizados (operacional): <b>{format_number(total_realizado)}</b></li>
-            <li>Total de containers registrados (Systracker): <b>{format_number(total_realizado_systracker)}</b></li>
-            <li>Categoria com maior movimentação: <b>{top_category}</b> com <b>{format_number(realized_categories[top_category])}</b> containers</li>
-        </ul>
-    </div>
-    """, unsafe_allow_html=True)
+    html(templates.insight_block("INSIGHTS - COMPARATIVO BUDGET VS REALIZADO", [
+        f"Budget total previsto: <b>{format_number(total_budget_all)}</b> containers",
+        f"Total de containers realizados (operacional): <b>{format_number(total_realizado)}</b>",
+        f"Total de containers registrados (Systracker): <b>{format_number(total_realizado_systracker)}</b>",
+        f"Categoria com maior movimentação: <b>{top_category}</b> com <b>{format_number(m.top_categoria_comparativo_valor)}</b> containers",
+    ], intro=f"Com base nos dados disponíveis até o dia <b>{data_atual}</b> (somente mês corrente):"))
 
     with st.expander("VER RAZÃO DO CÁLCULO DESTE GRÁFICO"):
         st.markdown("""
@@ -711,59 +592,15 @@ st.divider()
 
 # --- Gráfico 4: Aproveitamento de Oportunidades por Cliente ---
 if not filtered_df.empty:
-    opp_df = filtered_df[(filtered_df['Importação'] + filtered_df['Exportação'] + filtered_df['Cabotagem']) > 0].copy()
-    if not opp_df.empty:
+    if not rankings.aproveitamento_top.empty:
         # Título principal com ícone
-        st.markdown(f"""
-        <div class='section' style='text-align: center; display: flex; justify-content: center; align-items: center; gap: 12px; margin-top: 15px;'>
-            <img src="data:image/png;base64,{ICON_DETAILS}" alt="Ícone Oportunidades" style="height: 28px; vertical-align: middle;" />
-            <h3 class='section-title' style="margin: 0;">APROVEITAMENTO DE OPORTUNIDADES POR CLIENTE</h3>
-        </div>
-        """, unsafe_allow_html=True)
-
-        # Agrupamento e cálculo
-        df_graph2 = opp_df.groupby('Cliente', as_index=False).agg({
-            'Importação': 'sum',
-            'Exportação': 'sum',
-            'Cabotagem': 'sum',
-            'Quantidade_iTRACKER': 'sum'
-        })
-        df_graph2['Total_Oportunidades'] = df_graph2[['Importação', 'Exportação', 'Cabotagem']].sum(axis=1)
-        df_graph2['Aproveitamento'] = (df_graph2['Quantidade_iTRACKER'] / df_graph2['Total_Oportunidades']) * 100
-        df_graph2 = df_graph2.sort_values('Aproveitamento', ascending=False).head(15)
-
-        # Gráfico
-        fig2 = px.bar(
-            df_graph2,
-            x='Cliente',
-            y='Aproveitamento',
-            color='Aproveitamento',
-            color_continuous_scale=px.colors.sequential.Blues,
-            text_auto='.1f',
-            labels={'Aproveitamento': 'TAXA DE APROVEITAMENTO (%)'},
-            custom_data=['Total_Oportunidades', 'Quantidade_iTRACKER']
-        )
-        fig2.update_traces(
-            texttemplate='%{y:.1f}%',
-            textposition='outside',
-            hovertemplate=(
-                '<b>CLIENTE:</b> %{x}<br>'
-                '<b>TAXA DE APROVEITAMENTO:</b> %{y:.1f}%<br>'
-                '<b>TOTAL OPORTUNIDADES:</b> %{customdata[0]:,.0f}<br>'
-                '<b>REALIZADO:</b> %{customdata[1]:,.0f}<extra></extra>'
-            )
-        )
-        fig2.update_layout(
-            xaxis_title='CLIENTE',
-            yaxis_title='TAXA DE APROVEITAMENTO (%)',
-            coloraxis_colorbar=dict(title='APROVEITAMENTO (%)'),
-            height=chart_height,
-            template="plotly",
-            margin=dict(l=60, r=60, t=30, b=60),
-            xaxis=dict(tickangle=-45),
-            yaxis=dict(range=[0, min(150, df_graph2['Aproveitamento'].max() * 1.1)])
-        )
-        st.plotly_chart(fig2, use_container_width=True)
+        html(templates.section_header("APROVEITAMENTO DE OPORTUNIDADES POR CLIENTE"))
+
+        # Agrupamento e cálculo (top 15 já calculado no ranking)
+        df_graph2 = rankings.aproveitamento_top
+
+        fig2 = get_figure("aproveitamento", dataset.versao, filtros_key, chart_height, df_graph2)
+        chart("aproveitamento", fig2)
 
         with st.expander("VER RAZÃO DO CÁLCULO DESTE GRÁFICO"):
             st.markdown("""
@@ -775,139 +612,164 @@ if not filtered_df.empty:
             """)
 
         # Insights
-        media_aproveitamento = df_graph2['Aproveitamento'].mean()
-        melhor_cliente = df_graph2.iloc[0]['Cliente']
-        melhor_aproveitamento = df_graph2.iloc[0]['Aproveitamento']
-
-        st.markdown(f"""
-        <div style='background-color:{COLORS['background']}; padding:10px; border-radius:5px; margin-top:10px;'>
-            <div style='display: flex; align-items: center; gap: 10px;'>
-                <img src="data:image/png;base64,{ICON_INSIGHTS}" alt="Ícone Insights" style="height: 20px;" />
-                <h5 style='margin: 0;'>INSIGHTS - APROVEITAMENTO</h5>
-            </div>
-            <ul>
-                <li>A TAXA MÉDIA DE APROVEITAMENTO DE OPORTUNIDADES É DE <b>{media_aproveitamento:.1f}%</b></li>
-                <li>O CLIENTE COM MELHOR APROVEITAMENTO É <b>{melhor_cliente}</b> COM <b>{melhor_aproveitamento:.1f}%</b></li>
-                <li>{"A MAIORIA DOS CLIENTES ESTÁ ABAIXO DA META MÍNIMA DE 50%" if media_aproveitamento < 50 else "A MAIORIA DOS CLIENTES ATINGE PELO MENOS A META MÍNIMA DE 50%"}</li>
-            </ul>
-        </div>
-        """, unsafe_allow_html=True)
+        media_aproveitamento = m.aprov_media
+        melhor_cliente = m.aprov_melhor_cliente
+        melhor_aproveitamento = m.aprov_melhor_valor
+
+        html(templates.insight_block("INSIGHTS - APROVEITAMENTO", [
+            f"A TAXA MÉDIA DE APROVEITAMENTO DE OPORTUNIDADES É DE <b>{media_aproveitamento:.1f}%</b>",
+            f"O CLIENTE COM MELHOR APROVEITAMENTO É <b>{melhor_cliente}</b> COM <b>{melhor_aproveitamento:.1f}%</b>",
+            "A MAIORIA DOS CLIENTES ESTÁ ABAIXO DA META MÍNIMA DE 50%" if media_aproveitamento < 50 else "A MAIORIA DOS CLIENTES ATINGE PELO MENOS A META MÍNIMA DE 50%",
+        ]))
     else:
         st.info("SEM DADOS DE OPORTUNIDADES DISPONÍVEIS PARA OS FILTROS SELECIONADOS.")
 
 st.divider()
 
 # --- Gráfico 5: CLIENTES FORA DO BUDGET COM OPERAÇÕES REALIZADAS ---
-df_no_budget = filtered_df[
-    ((filtered_df['BUDGET'].isna()) | (filtered_df['BUDGET'] == 0)) &
-    (filtered_df['Quantidade_iTRACKER'] > 0)
-]
-
-if not df_no_budget.empty:
-    df_graph = df_no_budget.groupby("Cliente", as_index=False)['Quantidade_iTRACKER'].sum()
-    df_graph = df_graph.sort_values('Quantidade_iTRACKER', ascending=False).head(15)
-
-    fig_no_budget = px.bar(
-        df_graph,
-        x='Quantidade_iTRACKER',
-        y='Cliente',
-        orientation='h',
-        text='Quantidade_iTRACKER',
-        color='Quantidade_iTRACKER',
-        color_continuous_scale=px.colors.sequential.Oranges,
-    )
-    fig_no_budget.update_layout(
-        height=chart_height,
-        yaxis=dict(autorange="reversed"),
-        margin=dict(l=60, r=30, t=40, b=60),
-        plot_bgcolor="white"
-    )
-    fig_no_budget.update_traces(texttemplate='%{text}', textposition='outside')
+if not rankings.sem_budget_top.empty:
+    df_graph = rankings.sem_budget_top
+
+    fig_no_budget = get_figure("sem_budget", dataset.versao, filtros_key, chart_height, df_graph)
 
     # Título com ícone
-    st.markdown(f"""
-    <div class='section' style='text-align: center; display: flex; justify-content: center; align-items: center; gap: 12px; margin-top: 15px;'>
-        <img src="data:image/png;base64,{ICON_DETAILS}" alt="Ícone Fora do Budget" style="height: 28px; vertical-align: middle;" />
-        <h3 class='section-title' style="margin: 0;">CLIENTES FORA DO BUDGET COM OPERAÇÕES REALIZADAS</h3>
-    </div>
-    """, unsafe_allow_html=True)
+    html(templates.section_header("CLIENTES FORA DO BUDGET COM OPERAÇÕES REALIZADAS"))
 
-    st.plotly_chart(fig_no_budget, use_container_width=True)
+    chart("sem_budget", fig_no_budget)
 
     # Insights
-    total_clientes_sem_budget = df_graph['Cliente'].nunique()
-    media_realizados = df_graph['Quantidade_iTRACKER'].mean()
-    top_cliente = df_graph.iloc[0]['Cliente']
-    top_valor = df_graph.iloc[0]['Quantidade_iTRACKER']
-    acima_da_media = (df_graph['Quantidade_iTRACKER'] > media_realizados).mean()
+    total_clientes_sem_budget = m.sem_budget_clientes_top
+    media_realizados = m.sem_budget_media
+    top_cliente = m.sem_budget_top_cliente
+    top_valor = m.sem_budget_top_valor
+    acima_da_media = m.sem_budget_acima_media
     data_atual = datetime.now().strftime('%d de %B')
 
-    st.markdown(f"""
-    <div style='background-color:{COLORS['background']}; padding:10px; border-radius:5px; margin-top:10px;'>
-        <div style='display: flex; align-items: center; gap: 10px;'>
-            <img src="data:image/png;base64,{ICON_INSIGHTS}" alt="Ícone Insights" style="height: 20px;" />
-            <h5 style='margin: 0;'>INSIGHTS - CLIENTES FORA DO BUDGET</h5>
-        </div>
-        <p style='margin-bottom:10px;'>Com base nas movimentações registradas até <b>{data_atual}</b>, destacamos:</p>
-        <ul>
-            <li><b>{total_clientes_sem_budget}</b> clientes realizaram operações sem orçamento previsto</li>
-            <li>A MÉDIA de containers movimentados por esses clientes é <b>{format_number(media_realizados)}</b></li>
-            <li>O cliente com maior volume é <b>{top_cliente}</b>, com <b>{format_number(top_valor)}</b> containers</li>
-            <li>{'Mais da metade dos clientes movimentaram acima da média' if acima_da_media > 0.5 else 'A maioria dos clientes movimentou abaixo da média'}</li>
-        </ul>
-    </div>
-    """, unsafe_allow_html=True)
+    html(templates.insight_block("INSIGHTS - CLIENTES FORA DO BUDGET", [
+        f"<b>{total_clientes_sem_budget}</b> clientes realizaram operações sem orçamento previsto",
+        f"A MÉDIA de containers movimentados por esses clientes é <b>{format_number(media_realizados)}</b>",
+        f"O cliente com maior volume é <b>{top_cliente}</b>, com <b>{format_number(top_valor)}</b> containers",
+        'Mais da metade dos clientes movimentaram acima da média' if acima_da_media > 0.5 else 'A maioria dos clientes movimentou abaixo da média',
+    ], intro=f"Com base nas movimentações registradas até <b>{data_atual}</b>, destacamos:"))
+
+st.divider()
+
+# --- Gráfico 6: Tendência mensal (MoM, YTD e móvel de 3 meses) ---
+df_tendencia = get_monthly_trend(dataset.versao, tuple(clientes_filtro), get_trends(dataset.versao, dataset))
+meses_com_dados = df_tendencia.index[(df_tendencia['BUDGET'] > 0) | (df_tendencia['Realizado'] > 0)]
+if len(meses_com_dados):
+    mes_ref = max(mes_selecionado) if mes_selecionado else meses_com_dados.max()
+    ref = df_tendencia.loc[mes_ref]
+
+    html(templates.section_header("TENDÊNCIA MENSAL: MÊS A MÊS, ACUMULADO NO ANO E MÓVEL DE 3 MESES"))
+
+    fig_tendencia = get_figure("tendencia", dataset.versao, (tuple(clientes_filtro),), chart_height, df_tendencia)
+    chart("tendencia", fig_tendencia)
+
+    var_mom_pct = "N/A" if pd.isna(ref['Var_MoM_%']) else f"{ref['Var_MoM_%']:+.1f}%"
+    html(templates.insight_block(f"INSIGHTS - TENDÊNCIA ({meses_map.get(mes_ref, mes_ref).upper()})", [
+        f"Variação do realizado em relação ao mês anterior: <b>{ref['Var_MoM']:+,.0f}</b> containers ({var_mom_pct})",
+        f"Acumulado no ano: <b>{format_number(ref['YTD_Realizado'])}</b> realizados para um budget de <b>{format_number(ref['YTD_Budget'])}</b> ({format_percent(ref['YTD_Performance'])})",
+        f"Performance móvel dos últimos 3 meses: {format_percent(ref['Perf_3M'])}",
+    ]))
+
+    with st.expander("VER RAZÃO DO CÁLCULO DESTE GRÁFICO"):
+        st.markdown("""
+        **DETALHAMENTO DO CÁLCULO:**
+        - **FILTRAGEM:** Usa os clientes selecionados (todos os meses do ano).
+        - **MÊS A MÊS:** REALIZADO do mês menos REALIZADO do mês anterior.
+        - **YTD:** Soma de BUDGET e REALIZADO de janeiro até o mês; performance = REALIZADO / BUDGET * 100.
+        - **MÓVEL 3 MESES:** Mesma razão, somando apenas os três últimos meses.
+        """)
+
+st.divider()
+
+# --- Anomalias detectadas (mediana/MAD entre clientes e no histórico de cada cliente) ---
+anomalias = flagged(get_anomalies(dataset.versao, dataset), tuple(mes_selecionado), tuple(clientes_filtro))
+if not anomalias.empty:
+    html(templates.section_header("ALERTAS DE COMPORTAMENTO ATÍPICO", "insights"))
+    st.caption(f"{len(anomalias)} combinações cliente/mês fora do padrão nos filtros atuais (maiores desvios primeiro).")
+    st.dataframe(
+        anomalias[['Cliente', 'MÊS', 'Realizado', 'Oportunidades', 'Gap', 'score', 'motivos']].head(20),
+        hide_index=True,
+        use_container_width=True
+    )
+    with st.expander("VER RAZÃO DO CÁLCULO DESTES ALERTAS"):
+        st.markdown("""
+        **DETALHAMENTO DO CÁLCULO:**
+        - **AGRUPAMENTO:** REALIZADO, OPORTUNIDADES e GAP somados por CLIENTE e MÊS.
+        - **Z ROBUSTO:** 0,6745 * (VALOR - MEDIANA) / MAD, entre os clientes do mesmo mês e no histórico do próprio cliente.
+        - **ALERTA:** |Z| acima de 3,5, realização caindo a zero ou pico de oportunidades sem realização.
+        """)
+    st.divider()
+
+# --- Simulador de cenários de budget ---
+por_cliente = rankings.por_cliente
+if not filtered_df.empty and (por_cliente['BUDGET'] > 0).any():
+    with st.expander("SIMULADOR DE CENÁRIOS DE BUDGET"):
+        clientes_com_budget = por_cliente.index[por_cliente['BUDGET'] > 0].tolist()
+        sim_col1, sim_col2, sim_col3, sim_col4 = st.columns([2, 2, 2, 2])
+        with sim_col1:
+            ajuste_geral = st.slider("Ajuste geral do budget (%)", -50, 50, -10, 5)
+        with sim_col2:
+            origem = st.selectbox("Mover budget de", clientes_com_budget)
+        with sim_col3:
+            destino = st.selectbox("Para", por_cliente.index.tolist())
+        with sim_col4:
+            fracao = st.slider("Parcela movida (%)", 0, 100, 20, 5)
+
+        engine = ScenarioEngine(por_cliente)
+        engine.scale(f"AJUSTE GERAL {ajuste_geral:+d}%", 1 + ajuste_geral / 100)
+        if origem != destino:
+            engine.transfer(f"{fracao}% DE {origem} PARA {destino}", origem, destino, fracao / 100)
+        cenarios = engine.run()
+
+        st.dataframe(cenarios.summary().round(1), hide_index=True, use_container_width=True)
+
+        # Clientes que mudam de faixa em algum cenário
+        mudou = (cenarios.classe[1:] != cenarios.classe[0]).any(axis=0) & (cenarios.budget > 0).any(axis=0)
+        if mudou.any():
+            # Situação atual de cada cliente no recorte, do agregado já usado nos rankings
+            comparativo = compute_metrics_batch(filtered_df, por_cliente=por_cliente).reset_index()[mudou][
+                ['Cliente', 'BUDGET', 'Quantidade_iTRACKER', 'Performance', 'Aproveitamento', 'Classe']
+            ]
+            for k, nome in enumerate(cenarios.nomes[1:], start=1):
+                comparativo[nome] = cenarios.by_client(k)['Classe'][mudou].to_numpy()
+            st.caption(f"{int(mudou.sum())} cliente(s) mudam de faixa de performance:")
+            st.dataframe(comparativo.round(1), hide_index=True, use_container_width=True)
+
+        st.markdown("""
+        **DETALHAMENTO DO CÁLCULO:**
+        - **PERFORMANCE:** REALIZADO / NOVO BUDGET * 100, por cliente e no total.
+        - **FAIXAS:** CRÍTICO (<70%), ATENÇÃO (70-100%) e META ATINGIDA (≥100%).
+        - **GAP:** Target do novo budget no mês corrente (NOVO BUDGET / 30 * DIA) menos o realizado do mês.
+        """)
 
 st.divider()
 
 # --- Conclusões e Recomendações ---
 if not filtered_df.empty:
     # Título principal com ícone IA
-    st.markdown(f"""
-    <div class='section' style='text-align: center; display: flex; justify-content: center; align-items: center; gap: 12px;'>
-        <img src="data:image/png;base64,{ICON_IA}" alt="Ícone IA" style="height: 28px; vertical-align: middle;" />
-        <h3 class='section-title' style="margin: 0;">CONCLUSÕES E RECOMENDAÇÕES iTracker HUB IA</h3>
-    </div>
-    """, unsafe_allow_html=True)
-
-    # Cálculo de métricas
-    total_budget = filtered_df['BUDGET'].sum()
-    total_realizado = filtered_df['Quantidade_iTRACKER'].sum()
-    performance_geral = (total_realizado / total_budget) * 100 if total_budget > 0 else 0
-    total_oportunidades = (
-        filtered_df['Importação'].sum() +
-        filtered_df['Exportação'].sum() +
-        filtered_df['Cabotagem'].sum()
-    )
-    aproveitamento_geral = (total_realizado / total_oportunidades) * 100 if total_oportunidades > 0 else 0
+    html(templates.section_header("CONCLUSÕES E RECOMENDAÇÕES iTracker HUB IA", "ia", topo=False))
+
+    # Métricas já calculadas pelo motor de KPIs
+    performance_geral = m.performance
+    aproveitamento_geral = m.aproveitamento
     data_atual = datetime.now().strftime('%d de %B')
 
-    total_registros = filtered_df.shape[0]
-    top_clientes = filtered_df.groupby('Cliente')['Quantidade_iTRACKER'].sum().nlargest(5)
-    percent_top5 = (top_clientes.sum() / total_realizado) * 100 if total_realizado > 0 else 0
-
-    clientes_prioritarios = filtered_df.groupby('Cliente')[['BUDGET', 'Quantidade_iTRACKER']].sum()
-    clientes_prioritarios['Performance'] = (
-        clientes_prioritarios['Quantidade_iTRACKER'] / clientes_prioritarios['BUDGET']
-    ) * 100
-    threshold_budget = clientes_prioritarios['BUDGET'].median()
-    clientes_prioritarios = clientes_prioritarios[
-        (clientes_prioritarios['BUDGET'] > threshold_budget) &
-        (clientes_prioritarios['Performance'] < 70) &
-        (clientes_prioritarios['Performance'] > 0)
-    ].sort_values(['BUDGET', 'Performance'])
-    top_prioritarios = clientes_prioritarios.head(3)
-
-    categorias = {
-        'Importação': filtered_df['Importação'].sum(),
-        'Exportação': filtered_df['Exportação'].sum(),
-        'Cabotagem': filtered_df['Cabotagem'].sum()
-    }
-    top_categoria = max(categorias, key=categorias.get)
-    operando_sem_budget = filtered_df[
-        (filtered_df['BUDGET'].fillna(0) == 0) &
-        (filtered_df['Quantidade_iTRACKER'] > 0)
-    ]['Cliente'].nunique()
+    total_registros = m.total_registros
+    percent_top5 = m.percent_top5
+    top_categoria = m.top_categoria
+    operando_sem_budget = m.clientes_sem_budget
+
+    # Clientes de cada segmento (segmentação da versão inteira) presentes no recorte
+    clientes_recorte = rankings.por_cliente.index
+    top_prioritarios = segmentos.top("PRIORITÁRIOS", 3, clientes=clientes_recorte)
+    top_em_queda = segmentos.top("EM QUEDA", 3, clientes=clientes_recorte)
+    top_em_crescimento = segmentos.top("EM CRESCIMENTO", 3, por='Tendência', clientes=clientes_recorte)
+
+    def tendencia_txt(valor):
+        return "N/A" if pd.isna(valor) else f"{valor:+.1f} p.p."
 
     # Montagem das recomendações
     recomendacoes_html = ""
@@ -926,43 +788,88 @@ if not filtered_df.empty:
         recomendacoes_html += "<li><b>PROCESSOS EFICIENTES:</b> O aproveitamento é elevado (>70%). Explorar novas oportunidades e consolidar as estratégias atuais.</li>"
 
     if not top_prioritarios.empty:
-        recomendacoes_html += "<li><b>FOCO EM CLIENTES PRIORITÁRIOS:</b> Empresas com performance abaixo da meta:<ul>"
+        recomendacoes_html += "<li><b>FOCO EM CLIENTES PRIORITÁRIOS:</b> Budget alto com performance abaixo dos demais (maior volume não realizado primeiro):<ul>"
         for cliente, row in top_prioritarios.iterrows():
-            recomendacoes_html += f"<li><b>{cliente}</b>: Performance de {row['Performance']:.1f}% com budget de {format_number(row['BUDGET'])}</li>"
+            recomendacoes_html += f"<li><b>{cliente}</b>: Performance de {row['Performance']:.1f}% com budget de {format_number(row['BUDGET'])} ({format_number(row['Budget não realizado'])} não realizados)</li>"
+        recomendacoes_html += "</ul></li>"
+
+    if not top_em_queda.empty:
+        recomendacoes_html += "<li><b>TENDÊNCIA DE QUEDA:</b> Performance dos últimos 3 meses abaixo da acumulada no ano. Entender a causa antes que o gap aumente:<ul>"
+        for cliente, row in top_em_queda.iterrows():
+            recomendacoes_html += f"<li><b>{cliente}</b>: {tendencia_txt(row['Tendência'])} (performance de {row['Performance']:.1f}%)</li>"
+        recomendacoes_html += "</ul></li>"
+
+    if not top_em_crescimento.empty:
+        recomendacoes_html += "<li><b>CLIENTES EM CRESCIMENTO:</b> Performance recente acima da acumulada no ano. Avaliar ampliação do budget:<ul>"
+        for cliente, row in top_em_crescimento.iterrows():
+            recomendacoes_html += f"<li><b>{cliente}</b>: {tendencia_txt(row['Tendência'])} (performance de {row['Performance']:.1f}%)</li>"
         recomendacoes_html += "</ul></li>"
 
     # Renderização final
-    st.markdown(f"""
-    <div style='background-color:{COLORS['background']}; padding:15px; border-radius:8px;'>
-        <div style='display: flex; align-items: center; gap: 10px; margin-bottom: 10px;'>
-            <img src="data:image/png;base64,{ICON_INSIGHTS}" alt="Ícone Insights" style="height: 24px;" />
-            <h4 style='margin: 0;'>ANÁLISE DE PERFORMANCE E CONCLUSÕES</h4>
-        </div>
-        <p>Dados até <b>{data_atual.upper()}</b> ({total_registros} registros filtrados):</p>
-        <ul>
-            <li><b>Performance geral:</b> {format_percent(performance_geral)} do budget projetado.</li>
-            <li><b>Aproveitamento total:</b> {format_percent(aproveitamento_geral)} das oportunidades geradas.</li>
-            <li><b>Top 5 clientes:</b> {percent_top5:.1f}% do total realizado.</li>
-            <li><b>Categoria mais ativa:</b> {top_categoria} com {format_number(categorias[top_categoria])} containers.</li>
-            <li><b>Clientes sem budget:</b> {operando_sem_budget} cliente(s).</li>
-        </ul>
-        <div style='display: flex; align-items: center; gap: 10px; margin-top: 15px; margin-bottom: 10px;'>
-            <img src="data:image/png;base64,{ICON_RECOMENDACOES}" alt="Ícone Recomendações" style="height: 24px;" />
-            <h4 style='margin: 0;'>RECOMENDAÇÕES E AÇÕES</h4>
-        </div>
-        <ol>
-            {recomendacoes_html}
-        </ol>
-    </div>
-    """, unsafe_allow_html=True)
+    html(templates.conclusions_block(
+        f"Dados até <b>{data_atual.upper()}</b> ({total_registros} registros filtrados):",
+        [
+            f"<b>Performance geral:</b> {format_percent(performance_geral)} do budget projetado.",
+            f"<b>Aproveitamento total:</b> {format_percent(aproveitamento_geral)} das oportunidades geradas.",
+            f"<b>Top 5 clientes:</b> {percent_top5:.1f}% do total realizado.",
+            f"<b>Categoria mais ativa:</b> {top_categoria} com {format_number(m.top_categoria_valor)} containers.",
+            f"<b>Clientes sem budget:</b> {operando_sem_budget} cliente(s).",
+        ],
+        recomendacoes_html,
+    ))
+
+    # Perguntas livres ao HUB IA (apenas com chave da OpenAI configurada nos secrets)
+    if "openai" in st.secrets:
+        @st.cache_resource
+        def get_answer_cache():
+            return AnswerCache()
+
+        @st.cache_resource
+        def get_client_store():
+            return open_store()
+
+        # Recriado apenas quando a versão do banco muda; o cache de respostas também é chaveado pela versão
+        @st.cache_resource(max_entries=2)
+        def get_ia_hub(versao):
+            dados_estruturados = get_client_store().to_dict()
+            return IAHub(dados_estruturados, OpenAIModel(st.secrets["openai"]["api_key"]), get_answer_cache())
+
+        pergunta = st.text_input("Pergunte ao iTracker HUB IA", placeholder="Ex.: Como está a Aliança em abril?")
+        if pergunta:
+            try:
+                with st.spinner("Consultando o iTracker HUB IA..."):
+                    resposta = get_ia_hub(get_client_store().versao).ask(pergunta)
+            except Exception as e:
+                st.error(f"Não foi possível consultar o iTracker HUB IA: {e}")
+            else:
+                st.markdown(resposta)
 
     st.divider()
 
+# Relatório de qualidade da versão carregada (calculado uma vez por versão)
+qualidade = dataset.qualidade
+with st.sidebar.expander("Qualidade dos dados"):
+    st.caption(f"{qualidade.linhas_validas} de {qualidade.linhas_lidas} linhas válidas "
+               f"({qualidade.linhas_rejeitadas} rejeitadas sem cliente)")
+    invalidos = qualidade.as_frame()
+    if invalidos.empty:
+        st.caption("Nenhum valor inválido nas colunas numéricas.")
+    else:
+        st.dataframe(invalidos, hide_index=True, use_container_width=True)
+
+# Acertos do cache por etapa (acumulados no processo)
+with st.sidebar.expander("Cache por etapa"):
+    st.caption(f"Versão dos dados: {dataset.versao}")
+    st.dataframe(cache_stats(), hide_index=True, use_container_width=True)
+
 # --- Footer ---
-st.markdown(f"""
-<div class="custom-footer">
-    <span>📅 ATUALIZADO EM: {current_date}</span> | 
-    <span>📧 EMAIL: COMERCIAL@EMPRESA.COM</span> | 
-    <span>📞 TELEFONE: (21) 99999-9999</span>
-</div>
-""", unsafe_allow_html=True)
+html(templates.footer(data_date))
+
+# Orçamento de bytes do rerun (o histórico fica no processo); em modo estrito
+# check() levanta PayloadBudgetExceeded em vez de só avisar
+dentro_do_orcamento = payload.check()
+with st.sidebar.expander("Payload do rerun"):
+    st.caption(f"{payload.total / 1024:.0f} KB enviados (orçamento: {payload.budget / 1024:.0f} KB)")
+    st.dataframe(pd.DataFrame(recent_reruns()[-10:]), hide_index=True, use_container_width=True)
+if not dentro_do_orcamento:
+    st.sidebar.warning("Este rerun passou do orçamento de bytes enviado ao navegador.")
@@ -0,0 +1,215 @@
+# matching.py
+
+import hashlib
+import json
+import math
+import os
+import re
+from collections import defaultdict
+
+from utils_dados_clientes import normalizar_texto
+
+CACHE_FILE = os.path.join(".cache", "matches_clientes.json")
+CONTAS_FILE = "contas_clientes.json"  # conta -> entidades de clientes.txt que pertencem a ela
+
+# Termos societários e conectivos que não ajudam a distinguir clientes
+STOPWORDS = {
+    "LTDA", "LIMITADA", "SA", "S", "A", "ME", "EPP", "EIRELI", "INC", "CO", "CORP",
+    "DO", "DA", "DE", "DOS", "DAS", "E", "EM", "THE", "OF", "AND", "&",
+}
+MAX_BLOCK = 200        # tokens presentes em mais clientes que isso não geram candidatos
+MIN_TOKEN_SIM = 0.6    # similaridade mínima (Dice de trigramas) entre tokens
+THRESHOLD = 0.5        # score mínimo para aceitar um match
+
+
+def tokenize(nome):
+    """Tokens significativos do nome, já normalizados por normalizar_texto."""
+    texto = re.sub(r"[^A-Z0-9]+", " ", normalizar_texto(nome))
+    return [t for t in texto.split() if t not in STOPWORDS]
+
+
+def _trigramas(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _dice(a, b):
+    return 2 * len(a & b) / (len(a) + len(b)) if a and b else 0.0
+
+
+def load_aliases(path="clientes.txt", contas_path=CONTAS_FILE):
+    """
+    Lê a lista de clientes e associa cada entidade à sua conta.
+
+    As contas com mais de uma entidade (ex.: as três entidades SAMSUNG) vêm
+    de um arquivo explícito; o nome não basta para agrupar (OLAM ESTÉTICA
+    AUTOMOTIVA não é da conta OLAM). As demais entidades são a própria conta.
+
+    Parâmetros:
+        path (str): Lista de clientes, uma entidade por linha.
+        contas_path (str): JSON com conta -> lista de entidades (opcional).
+
+    Retorna:
+        dict: Nome da entidade -> nome canônico da conta.
+    """
+    with open(path, encoding="utf-8") as f:
+        aliases = {linha.strip(): normalizar_texto(linha) for linha in f if linha.strip()}
+    try:
+        with open(contas_path, encoding="utf-8") as f:
+            contas = json.load(f)
+    except OSError:
+        contas = {}
+    for conta, entidades in contas.items():
+        for nome in entidades:
+            aliases[nome] = conta
+    return aliases
+
+
+class ClientMatcher:
+    """
+    Associa nomes brutos de importadores/exportadores aos clientes canônicos.
+
+    Em vez de comparar cada nome com todos os clientes, usa índices invertidos
+    (token -> clientes e trigrama -> tokens do vocabulário) para gerar poucos
+    candidatos por nome, pontuados por sobreposição de tokens ponderada por IDF.
+
+    O cache guarda em separado os matches confirmados (confirm), que valem
+    sempre, e os palpites automáticos, que só valem para a mesma lista de
+    clientes: nomes já vistos não são pontuados de novo.
+
+    Parâmetros:
+        canonicos (dict | iterable): Nomes conhecidos (nome -> canônico) ou lista de canônicos.
+        cache_path (str, opcional): Arquivo JSON com os matches confirmados e os palpites.
+    """
+
+    def __init__(self, canonicos, cache_path=CACHE_FILE):
+        if not isinstance(canonicos, dict):
+            canonicos = {nome: normalizar_texto(nome) for nome in canonicos}
+        self._nomes = list(canonicos)
+        self._canonico = [canonicos[n] for n in self._nomes]
+        self._tokens = [set(tokenize(n)) for n in self._nomes]
+
+        self._postings = defaultdict(list)
+        for i, tokens in enumerate(self._tokens):
+            for t in tokens:
+                self._postings[t].append(i)
+        n = max(len(self._nomes), 1)
+        self._idf = {t: math.log(1 + n / len(ids)) for t, ids in self._postings.items()}
+        self._tri_index = defaultdict(set)
+        for t in self._postings:
+            for g in _trigramas(t):
+                self._tri_index[g].add(t)
+
+        self._exatos = {normalizar_texto(nome): c for nome, c in zip(self._nomes, self._canonico)}
+        self._assinatura = hashlib.sha1(
+            json.dumps(sorted(canonicos.items()), ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+        self._cache_path = cache_path
+        self._confirmados, self._palpites = self._load_cache()
+
+    def _similar_tokens(self, token):
+        # Tokens do vocabulário parecidos com `token` (tolera erros de digitação)
+        if token in self._postings:
+            return {token: 1.0}
+        tri = _trigramas(token)
+        candidatos = set()
+        for g in tri:
+            candidatos |= self._tri_index.get(g, set())
+        similares = {}
+        for t in candidatos:
+            sim = _dice(tri, _trigramas(t))
+            if sim >= MIN_TOKEN_SIM:
+                similares[t] = sim
+        return similares
+
+    def score(self, nome):
+        """
+        Retorna o melhor (canônico, score) para o nome bruto, ou (None, 0.0).
+        """
+        exato = self._exatos.get(normalizar_texto(nome))
+        if exato is not None:
+            return exato, 1.0
+        tokens = set(tokenize(nome))
+        if not tokens:
+            return None, 0.0
+
+        # Blocagem: só clientes que compartilham algum token (exato ou parecido)
+        acumulado = defaultdict(float)
+        peso_query = 0.0
+        for t in tokens:
+            similares = self._similar_tokens(t)
+            peso_query += max((self._idf[v] for v in similares), default=math.log(1 + len(self._nomes)))
+            # Cada token da consulta conta uma vez por candidato (o melhor token parecido)
+            melhor_por_cand = {}
+            for v, sim in similares.items():
+                ids = self._postings[v]
+                if len(ids) > MAX_BLOCK:
+                    continue
+                for i in ids:
+                    melhor_por_cand[i] = max(melhor_por_cand.get(i, 0.0), self._idf[v] * sim)
+            for i, peso in melhor_por_cand.items():
+                acumulado[i] += peso
+
+        melhor, melhor_score = None, 0.0
+        for i, comum in acumulado.items():
+            peso_cand = sum(self._idf[t] for t in self._tokens[i])
+            # Ochiai ponderado: intersecção / média geométrica dos pesos. Ao
+            # contrário do Jaccard, um nome curto ("SAMSUNG SDS") ainda casa
+            # com a razão social longa que o contém
+            s = comum / math.sqrt(peso_query * peso_cand)
+            if s > melhor_score:
+                melhor, melhor_score = self._canonico[i], s
+        if melhor_score < THRESHOLD:
+            return None, melhor_score
+        return melhor, melhor_score
+
+    def match(self, nome):
+        """Canônico do nome bruto (confirmado, exato ou palpite do cache), ou None."""
+        if nome in self._confirmados:
+            return self._confirmados[nome]
+        exato = self._exatos.get(normalizar_texto(nome))
+        if exato is not None:
+            return exato
+        if nome not in self._palpites:
+            self._palpites[nome], _ = self.score(nome)
+        return self._palpites[nome]
+
+    def match_many(self, nomes, salvar=True):
+        """
+        Mapeia vários nomes brutos; apenas nomes ainda não vistos são pontuados.
+
+        Retorna:
+            dict: Nome bruto -> canônico (None quando não há match).
+        """
+        vistos = len(self._palpites)
+        resultado = {nome: self.match(nome) for nome in set(nomes)}
+        if salvar and len(self._palpites) > vistos:
+            self.save_cache()
+        return resultado
+
+    def confirm(self, nome, canonico):
+        """Registra um match confirmado (vale mesmo que a lista de clientes mude)."""
+        self._confirmados[nome] = canonico
+        self._palpites.pop(nome, None)
+
+    def _load_cache(self):
+        if not self._cache_path:
+            return {}, {}
+        try:
+            with open(self._cache_path, encoding="utf-8") as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            return {}, {}
+        # Palpites automáticos só valem para a lista de clientes em que foram calculados
+        palpites = dados.get("palpites", {}) if dados.get("assinatura") == self._assinatura else {}
+        return dados.get("confirmados", {}), palpites
+
+    def save_cache(self):
+        if not self._cache_path:
+            return
+        os.makedirs(os.path.dirname(self._cache_path) or ".", exist_ok=True)
+        tmp = self._cache_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"assinatura": self._assinatura, "confirmados": self._confirmados,
+                       "palpites": self._palpites}, f, ensure_ascii=False)
+        os.replace(tmp, self._cache_path)
@@ -1,5 +1,6 @@
 # metrics.py
 
+import numpy as np
 import pandas as pd
 
 def format_number(num):
@@ -28,3 +29,92 @@ def custom_round(x):
         return int(x) + 1
     else:
         return int(x)
+
+
+# --- Versões vetorizadas (Series/ndarray), com a mesma saída das funções acima ---
+
+# Classes de performance: índice 0 = crítico (<70), 1 = atenção (70-99), 2 = meta (>=100)
+CLASSES_PERFORMANCE = np.array(['CRÍTICO', 'ATENÇÃO', 'META ATINGIDA'], dtype=object)
+
+
+def _como_array(values):
+    return np.asarray(values, dtype=float)
+
+
+def _devolver(values, resultado):
+    # Series entra, Series sai (mesmo índice); qualquer outra entrada vira ndarray
+    if isinstance(values, pd.Series):
+        return pd.Series(resultado, index=values.index, name=values.name)
+    return resultado
+
+
+def _formatar(fmt, arr):
+    """
+    Aplica `fmt % valor` uma vez por valor distinto e espalha o resultado.
+
+    Usa a mesma formatação do Python (saída idêntica às f-strings). A
+    deduplicação é feita pelos bits do float, então -0.0 e 0.0 continuam
+    distintos, como na versão escalar.
+    """
+    saida = np.empty(len(arr), dtype=object)
+    if len(arr):
+        _, pos, inv = np.unique(arr.view(np.int64), return_index=True, return_inverse=True)
+        saida[:] = np.char.mod(fmt, arr[pos]).astype(object)[inv.reshape(-1)]
+    return saida
+
+
+def classify_performance(values):
+    """
+    Classe de performance de cada valor (0 = crítico, 1 = atenção, 2 = meta).
+
+    NaN cai em crítico, como nas comparações da versão escalar.
+    """
+    arr = _como_array(values)
+    return _devolver(values, np.select([arr >= 100, arr >= 70], [2, 1], default=0).astype(np.int8))
+
+
+def format_fixed_array(values, decimals=1, suffix=""):
+    """Equivalente vetorizado de f'{x:.{decimals}f}{suffix}'."""
+    arr = _como_array(values).ravel()
+    texto = _formatar(f"%.{decimals}f", arr)
+    if suffix:
+        texto = texto + suffix
+    return _devolver(values, texto)
+
+
+def format_number_array(values):
+    """Equivalente vetorizado de format_number."""
+    arr = _como_array(values).ravel()
+    saida = np.empty(len(arr), dtype=object)
+    milhoes = arr >= 1000000
+    milhares = ~milhoes & (arr >= 1000)
+    demais = ~(milhoes | milhares)
+    saida[milhoes] = _formatar("%.2f", arr[milhoes] / 1000000) + "M"
+    saida[milhares] = _formatar("%.1f", arr[milhares] / 1000) + "K"
+    saida[demais] = _formatar("%.0f", arr[demais])
+    return _devolver(values, saida)
+
+
+def format_percent_array(values, positive_is_good=True):
+    """Equivalente vetorizado de format_percent (HTML com a cor do threshold)."""
+    arr = _como_array(values).ravel()
+    cores = np.array(['red', 'orange', 'green'] if positive_is_good else ['green', 'orange', 'red'], dtype=object)
+    saida = ("<span style='color:" + cores[classify_performance(arr)] + ";font-weight:bold'>"
+             + _formatar("%.1f", arr) + "%</span>")
+    saida[np.isnan(arr)] = "N/A"
+    return _devolver(values, saida)
+
+
+def custom_round_array(values):
+    """
+    Equivalente vetorizado de custom_round: trunca e soma 1 quando a parte
+    fracionária passa de 0.5. Retorna int64; se houver NaN/inf, mantém float
+    com esses valores (a versão escalar levantaria erro).
+    """
+    arr = _como_array(values)
+    truncado = np.trunc(arr)
+    with np.errstate(invalid='ignore'):  # inf - inf
+        resultado = np.where(arr - truncado > 0.5, truncado + 1, truncado)
+    if np.isfinite(resultado).all():
+        resultado = resultado.astype(np.int64)
+    return _devolver(values, resultado)
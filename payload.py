@@ -0,0 +1,123 @@
+# payload.py
+
+import os
+import threading
+from collections import deque
+
+import numpy as np
+import plotly.io as pio
+
+# Orçamento padrão de bytes enviados ao navegador por rerun (gráficos + HTML)
+BUDGET_BYTES = 1_500_000
+# Com esta variável definida (CI, carga_dashboard.py) o dashboard roda em modo
+# estrito: o rerun que passa do orçamento termina com PayloadBudgetExceeded
+ENV_ESTRITO = "DASH_PAYLOAD_ESTRITO"
+# Casas decimais mantidas nos arrays dos gráficos (os textos exibem no máximo 1)
+CASAS_DECIMAIS = 4
+
+_ARRAYS_TRACE = ('x', 'y', 'customdata')
+
+
+class PayloadBudgetExceeded(RuntimeError):
+    """Levantado pelo monitor em modo estrito quando o rerun passa do orçamento."""
+
+
+def _compact_array(values, casas=CASAS_DECIMAIS):
+    """
+    Menor representação JSON de um array numérico: inteiros quando todos os
+    valores são inteiros, senão floats arredondados para `casas` decimais.
+    Arrays não numéricos (nomes de clientes) voltam sem alteração.
+    """
+    if values is None or isinstance(values, (str, dict)):
+        return values
+    arr = np.asarray(values)
+    if arr.dtype.kind in 'iub':
+        return arr.astype(np.int64)
+    if arr.dtype.kind != 'f':
+        return values
+    if np.isfinite(arr).all() and (arr == np.round(arr)).all():
+        return arr.astype(np.int64)
+    return np.round(arr, casas)
+
+
+def compact_figure(fig, casas=CASAS_DECIMAIS):
+    """
+    Reduz o JSON de uma figura antes de ela ir para o navegador.
+
+    - x, y, customdata e cores numéricas dos marcadores viram arrays inteiros
+      ou floats arredondados (em vez de float64 com 17 dígitos);
+    - textos por ponto são removidos quando a figura já tem um texttemplate
+      que gera o mesmo texto a partir dos próprios dados.
+
+    Altera e devolve a própria figura.
+    """
+    for trace in fig.data:
+        for attr in _ARRAYS_TRACE:
+            valores = getattr(trace, attr, None)
+            if valores is not None:
+                trace[attr] = _compact_array(valores, casas)
+        marker = getattr(trace, 'marker', None)
+        if marker is not None and marker.color is not None and not isinstance(marker.color, str):
+            marker.color = _compact_array(marker.color, casas)
+        if getattr(trace, 'texttemplate', None) and '%{text' not in trace.texttemplate:
+            trace.text = None
+    return fig
+
+
+def figure_bytes(fig):
+    """Tamanho em bytes do JSON enviado ao navegador para a figura."""
+    return len(pio.to_json(fig, validate=False).encode('utf-8'))
+
+
+_lock = threading.Lock()
+_historico = deque(maxlen=200)
+
+
+class PayloadMonitor:
+    """
+    Soma os bytes enviados em um rerun e compara com o orçamento.
+
+    Cada sessão cria um monitor por rerun, registra os gráficos e blocos HTML
+    à medida que são renderizados e chama `check()` no fim. O total de cada
+    rerun fica em um histórico do processo (`recent_reruns`). `strict` não
+    informado segue a variável DASH_PAYLOAD_ESTRITO.
+    """
+
+    def __init__(self, budget=BUDGET_BYTES, strict=None):
+        self.budget = budget
+        self.strict = bool(os.environ.get(ENV_ESTRITO)) if strict is None else strict
+        self.itens = {}
+
+    def add(self, nome, n_bytes):
+        self.itens[nome] = self.itens.get(nome, 0) + n_bytes
+
+    @property
+    def total(self):
+        return sum(self.itens.values())
+
+    @property
+    def excedeu(self):
+        return self.total > self.budget
+
+    def check(self):
+        """
+        Registra o rerun no histórico e aplica o orçamento.
+
+        Retorna:
+            bool: True se o rerun ficou dentro do orçamento. Em modo estrito,
+            levanta PayloadBudgetExceeded em vez de retornar False.
+        """
+        with _lock:
+            _historico.append({'total': self.total, 'budget': self.budget, **self.itens})
+        if self.excedeu and self.strict:
+            maiores = sorted(self.itens.items(), key=lambda kv: kv[1], reverse=True)[:3]
+            raise PayloadBudgetExceeded(
+                f"Rerun com {self.total} bytes (orçamento {self.budget}). Maiores itens: {maiores}"
+            )
+        return not self.excedeu
+
+
+def recent_reruns():
+    """Totais dos últimos reruns do processo (mais recente por último)."""
+    with _lock:
+        return list(_historico)
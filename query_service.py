@@ -0,0 +1,198 @@
+# query_service.py
+#
+# Serviço HTTP local (asyncio, sem dependências extras) que consulta os dados
+# estruturados dos clientes no ClientStore (SQLite) e responde em JSON.
+#
+#   python query_service.py [porta] [caminho_banco]
+#
+# Rotas:
+#   GET /versao
+#   GET /clientes/<cliente>            todos os meses do cliente
+#   GET /clientes/<cliente>?mes=4      um mês do cliente
+#   GET /agregados?mes=4               somas de todos os clientes (mês opcional)
+#   GET /ranking?metrica=gap_realizacao&mes=4&n=10&ordem=desc
+
+import asyncio
+import json
+import sqlite3
+import sys
+from collections import OrderedDict
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from client_store import DB_FILE, open_store
+from utils_dados_clientes import normalizar_texto
+
+DEFAULT_PORT = 8765
+CACHE_MAX = 1024
+CHECK_INTERVAL = 5  # segundos entre verificações de nova versão do banco
+SOMAVEIS = ["budget", "importacao", "exportacao", "cabotagem", "quantidade_itracker",
+            "target_acumulado", "gap_realizacao"]
+METRICAS = SOMAVEIS + ["aproveitamento_oportunidade", "realizacao_budget",
+                       "desvio_budget_vs_oportunidade", "target_diario_esperado"]
+
+
+class QueryError(Exception):
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+
+class ClientDataIndex:
+    """
+    Consultas sobre o ClientStore, com o cache de respostas serializadas
+    invalidado quando a versão do banco muda.
+
+    Parâmetros:
+        store (ClientStore): Banco dos dados estruturados.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.versao = None
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.reload()
+
+    def reload(self):
+        versao = self.store.versao
+        if versao == self.versao:
+            return False
+        self.versao = versao
+        self._cache.clear()
+        return True
+
+    def cached(self, chave, calcular):
+        """Retorna a resposta serializada do cache (chave inclui a versão dos dados)."""
+        chave = (self.versao,) + chave
+        corpo = self._cache.get(chave)
+        if corpo is not None:
+            self._cache.move_to_end(chave)
+            self.hits += 1
+            return corpo
+        self.misses += 1
+        corpo = json.dumps(calcular(), ensure_ascii=False).encode("utf-8")
+        self._cache[chave] = corpo
+        if len(self._cache) > CACHE_MAX:
+            self._cache.popitem(last=False)
+        return corpo
+
+    def cliente(self, nome, mes=None):
+        chave = normalizar_texto(nome)
+        meses = self.store.client_months(chave)
+        if not meses:
+            raise QueryError(404, f"Cliente '{chave}' não encontrado na base de dados.")
+        if mes is None:
+            return {"cliente": chave, "meses": meses}
+        if mes not in meses:
+            raise QueryError(404, f"Não há dados registrados para o cliente '{chave}' no mês {mes}.")
+        return {"cliente": chave, "mes": int(mes), **meses[mes]}
+
+    def agregados(self, mes=None):
+        totais = self.store.totals(SOMAVEIS, mes)
+        clientes = totais.pop("clientes")
+        budget = totais["budget"]
+        oportunidades = totais["importacao"] + totais["exportacao"] + totais["cabotagem"]
+        return {
+            "mes": int(mes) if mes else None,
+            "clientes": clientes,
+            **{k: round(v, 2) for k, v in totais.items()},
+            "realizacao_budget": round(totais["quantidade_itracker"] / budget * 100, 2) if budget else 0.0,
+            "aproveitamento_oportunidade": (
+                round(totais["quantidade_itracker"] / oportunidades * 100, 2) if oportunidades else 0.0
+            ),
+        }
+
+    def ranking(self, metrica, mes=None, n=10, ordem="desc"):
+        if metrica not in METRICAS:
+            raise QueryError(400, f"Métrica desconhecida: {metrica}")
+        itens = [{"cliente": c, "mes": m, metrica: valor} for c, m, valor in self.store.top(metrica, mes, n, ordem)]
+        return {"metrica": metrica, "mes": int(mes) if mes else None, "itens": itens}
+
+
+def route(index, alvo):
+    """Resolve a rota e devolve (status, corpo JSON em bytes)."""
+    url = urlsplit(alvo)
+    partes = [unquote(p) for p in url.path.strip("/").split("/") if p]
+    query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+    mes = query.get("mes")
+    if mes is not None and not mes.isdigit():
+        raise QueryError(400, "Parâmetro 'mes' deve ser numérico.")
+    mes = str(int(mes)) if mes else None
+
+    if partes == ["versao"]:
+        return 200, json.dumps({"versao": index.versao, "cache_hits": index.hits,
+                                "cache_misses": index.misses}).encode("utf-8")
+    if len(partes) == 2 and partes[0] == "clientes":
+        return 200, index.cached(("cliente", normalizar_texto(partes[1]), mes),
+                                 lambda: index.cliente(partes[1], mes))
+    if partes == ["agregados"]:
+        return 200, index.cached(("agregados", mes), lambda: index.agregados(mes))
+    if partes == ["ranking"]:
+        metrica = query.get("metrica", "gap_realizacao")
+        n = int(query["n"]) if query.get("n", "").isdigit() else 10
+        ordem = query.get("ordem", "desc")
+        return 200, index.cached(("ranking", metrica, mes, n, ordem),
+                                 lambda: index.ranking(metrica, mes, n, ordem))
+    raise QueryError(404, "Rota não encontrada.")
+
+
+async def handle(index, reader, writer):
+    try:
+        while True:
+            linha = await reader.readline()
+            if not linha:
+                break
+            metodo, alvo, _ = linha.decode("latin-1").split(" ", 2)
+            keep_alive = True
+            while True:
+                cabecalho = await reader.readline()
+                if cabecalho in (b"\r\n", b"\n", b""):
+                    break
+                if cabecalho.lower().startswith(b"connection:") and b"close" in cabecalho.lower():
+                    keep_alive = False
+            try:
+                if metodo != "GET":
+                    raise QueryError(405, "Apenas GET é suportado.")
+                status, corpo = route(index, alvo)
+            except QueryError as e:
+                status, corpo = e.status, json.dumps({"erro": e.mensagem}, ensure_ascii=False).encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'ERRO'}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(corpo)}\r\n"
+                f"X-Data-Version: {index.versao}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + corpo
+            )
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def watch_version(index):
+    # Acompanha a versão do banco (gravações da reconciliação); o cache é invalidado junto
+    while True:
+        await asyncio.sleep(CHECK_INTERVAL)
+        try:
+            index.reload()
+        except sqlite3.Error:
+            continue
+
+
+async def serve(path_db=DB_FILE, host="127.0.0.1", port=DEFAULT_PORT):
+    index = ClientDataIndex(open_store(path_db))
+    server = await asyncio.start_server(lambda r, w: handle(index, r, w), host, port)
+    print(f"🚀 Servindo {path_db} (versão {index.versao}) em http://{host}:{port}")
+    async with server:
+        await asyncio.gather(server.serve_forever(), watch_version(index))
+
+
+if __name__ == "__main__":
+    porta = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
+    caminho = sys.argv[2] if len(sys.argv) > 2 else DB_FILE
+    asyncio.run(serve(caminho, port=porta))
@@ -0,0 +1,214 @@
+# rankings.py
+
+from dataclasses import dataclass, replace
+
+import numpy as np
+import pandas as pd
+
+from metrics import custom_round_array
+
+TOP_N = 15
+
+
+@dataclass(frozen=True)
+class ClientRankings:
+    """
+    Rankings por cliente usados pelos gráficos e pelas recomendações.
+
+    Os campos `*_top` já vêm ordenados e limitados a N clientes; `gap_all` e
+    `total_all` guardam o agregado completo usado nos blocos de insights e
+    `por_cliente` o agregado de onde todos os rankings foram derivados.
+    """
+    performance_top: pd.DataFrame
+    gap_top: pd.DataFrame
+    gap_all: pd.DataFrame
+    total_top: pd.DataFrame
+    total_all: pd.DataFrame
+    aproveitamento_top: pd.DataFrame
+    sem_budget_top: pd.DataFrame
+    sem_budget_all: pd.DataFrame
+    realizado_top5: pd.Series
+    por_cliente: pd.DataFrame
+
+
+def top_n(df, col, n=TOP_N, ascending=False):
+    """
+    Retorna as N linhas com maior (ou menor) valor em `col`, já ordenadas.
+
+    Usa seleção parcial (np.argpartition, O(n)) e ordena apenas as N linhas
+    escolhidas, em vez de ordenar o agregado inteiro. NaN fica por último.
+    """
+    if len(df) <= n:
+        return df.sort_values(col, ascending=ascending)
+    key = df[col].to_numpy(dtype=float)
+    key = key if ascending else -key
+    key = np.where(np.isnan(key), np.inf, key)
+    idx = np.argpartition(key, n - 1)[:n]
+    return df.iloc[idx].sort_values(col, ascending=ascending)
+
+
+def aggregate_by_client(df, mes_gap):
+    """
+    Agrega todas as métricas por cliente em um único groupby.
+
+    Além das somas simples, inclui colunas condicionais para cada recorte dos
+    gráficos (linhas com BUDGET > 0, com oportunidades, fora do budget e do mês
+    de referência do GAP) e a contagem de linhas do cliente (`linhas`) e de
+    cada recorte (`*_linhas`).
+
+    Parâmetros:
+        df (DataFrame): Recorte já filtrado (meses/clientes).
+        mes_gap (int): Mês usado no ranking de GAP.
+
+    Retorna:
+        DataFrame: Uma linha por cliente, indexado por Cliente.
+    """
+    budget = df['BUDGET'].to_numpy(dtype=float)
+    importacao = df['Importação'].to_numpy(dtype=float)
+    exportacao = df['Exportação'].to_numpy(dtype=float)
+    cabotagem = df['Cabotagem'].to_numpy(dtype=float)
+    realizado = df['Quantidade_iTRACKER'].to_numpy(dtype=float)
+    target = df['Target Acumulado'].to_numpy(dtype=float)
+    gap = df['Gap de Realização'].to_numpy(dtype=float)
+
+    com_budget = budget > 0
+    com_opp = (importacao + exportacao + cabotagem) > 0
+    sem_budget = (np.isnan(budget) | (budget == 0)) & (realizado > 0)
+    no_mes = df['MÊS'].to_numpy() == mes_gap
+
+    # Valores fora do recorte viram 0 (NaN dentro do recorte é ignorado pela soma, como antes)
+    def em(mask, valores):
+        return np.where(mask, valores, 0.0)
+
+    colunas = pd.DataFrame({
+        'Cliente': df['Cliente'].to_numpy(),
+        'BUDGET': budget,
+        'Importação': importacao,
+        'Exportação': exportacao,
+        'Cabotagem': cabotagem,
+        'Quantidade_iTRACKER': realizado,
+        'perf_linhas': com_budget,
+        'perf_BUDGET': em(com_budget, budget),
+        'perf_iTRACKER': em(com_budget, realizado),
+        'opp_linhas': com_opp,
+        'opp_Importação': em(com_opp, importacao),
+        'opp_Exportação': em(com_opp, exportacao),
+        'opp_Cabotagem': em(com_opp, cabotagem),
+        'opp_iTRACKER': em(com_opp, realizado),
+        'sb_linhas': sem_budget,
+        'sb_iTRACKER': em(sem_budget, realizado),
+        'linhas': np.ones(len(df), dtype=np.int64),
+        'gap_linhas': no_mes,
+        'gap_BUDGET': em(no_mes, budget),
+        'gap_Target': em(no_mes, target),
+        'gap_iTRACKER': em(no_mes, realizado),
+        'gap_Gap': em(no_mes, gap),
+    })
+    return colunas.groupby('Cliente', sort=True).sum()
+
+
+def rankings_from_aggregate(agg, n=TOP_N):
+    """Monta os rankings dos gráficos a partir do agregado por cliente."""
+    # Performance vs Budget (apenas clientes com BUDGET > 0)
+    perf = agg.loc[agg['perf_linhas'] > 0, ['perf_BUDGET', 'perf_iTRACKER']].rename(
+        columns={'perf_BUDGET': 'BUDGET', 'perf_iTRACKER': 'Quantidade_iTRACKER'}
+    ).reset_index()
+    perf['Performance'] = (perf['Quantidade_iTRACKER'] / perf['BUDGET']) * 100
+
+    # GAP de atendimento do mês de referência
+    gap = agg.loc[agg['gap_linhas'] > 0, ['gap_Target', 'gap_iTRACKER', 'gap_Gap']].rename(
+        columns={'gap_Target': 'Target Acumulado', 'gap_iTRACKER': 'Quantidade_iTRACKER',
+                 'gap_Gap': 'Gap de Realização'}
+    ).reset_index()
+    gap['Gap de Realização'] = custom_round_array(gap['Gap de Realização'])
+
+    # Comparativo por categoria
+    total = agg[['BUDGET', 'Importação', 'Exportação', 'Cabotagem', 'Quantidade_iTRACKER']].rename(
+        columns={'Quantidade_iTRACKER': 'Realizado (Systracker)'}
+    ).reset_index()
+    total['Total'] = total[[
+        'BUDGET', 'Importação', 'Exportação', 'Cabotagem', 'Realizado (Systracker)'
+    ]].sum(axis=1)
+
+    # Aproveitamento de oportunidades (apenas clientes com oportunidades)
+    aprov = agg.loc[agg['opp_linhas'] > 0, [
+        'opp_Importação', 'opp_Exportação', 'opp_Cabotagem', 'opp_iTRACKER'
+    ]].rename(columns={
+        'opp_Importação': 'Importação', 'opp_Exportação': 'Exportação',
+        'opp_Cabotagem': 'Cabotagem', 'opp_iTRACKER': 'Quantidade_iTRACKER'
+    }).reset_index()
+    aprov['Total_Oportunidades'] = aprov[['Importação', 'Exportação', 'Cabotagem']].sum(axis=1)
+    aprov['Aproveitamento'] = (aprov['Quantidade_iTRACKER'] / aprov['Total_Oportunidades']) * 100
+
+    # Clientes fora do budget com operações realizadas
+    sem_budget = agg.loc[agg['sb_linhas'] > 0, ['sb_iTRACKER']].rename(
+        columns={'sb_iTRACKER': 'Quantidade_iTRACKER'}
+    ).reset_index()
+
+    # Entrada das recomendações (os clientes prioritários vêm de segments.py)
+    realizado_top5 = agg['Quantidade_iTRACKER'].nlargest(5)
+
+    return ClientRankings(
+        performance_top=top_n(perf, 'Performance', n),
+        gap_top=top_n(gap, 'Gap de Realização', n),
+        gap_all=gap,
+        total_top=top_n(total, 'Total', n),
+        total_all=total,
+        aproveitamento_top=top_n(aprov, 'Aproveitamento', n),
+        sem_budget_top=top_n(sem_budget, 'Quantidade_iTRACKER', n),
+        sem_budget_all=sem_budget,
+        realizado_top5=realizado_top5,
+        por_cliente=agg,
+    )
+
+
+def compute_rankings(df, mes_gap, n=TOP_N):
+    """
+    Calcula todos os rankings a partir de um recorte da base.
+
+    Parâmetros:
+        df (DataFrame): Recorte já filtrado (meses/clientes).
+        mes_gap (int): Mês usado no ranking de GAP (o mês corrente no dashboard).
+        n (int): Tamanho dos rankings dos gráficos.
+
+    Retorna:
+        ClientRankings: Rankings prontos para os gráficos.
+    """
+    return rankings_from_aggregate(aggregate_by_client(df, mes_gap), n)
+
+
+def build_monthly_rankings(df, n=TOP_N):
+    """
+    Pré-calcula os rankings de cada mês da base (uma vez por versão dos dados).
+
+    Retorna:
+        dict: Mês -> ClientRankings (o ranking de GAP de cada mês usa o próprio mês).
+    """
+    return {
+        mes: compute_rankings(df_mes, mes, n)
+        for mes, df_mes in df.groupby('MÊS', sort=True)
+    }
+
+
+def update_monthly_rankings(anteriores, df, meses, n=TOP_N):
+    """
+    Rankings mensais da próxima versão dos dados a partir dos da versão
+    anterior: só os meses alterados são recalculados.
+
+    Parâmetros:
+        anteriores (dict): Resultado de build_monthly_rankings da versão anterior.
+        df (DataFrame): Base da nova versão.
+        meses (iterable): Meses com linhas adicionadas, removidas ou alteradas.
+
+    Retorna:
+        dict: Mês -> ClientRankings, como build_monthly_rankings.
+    """
+    meses = set(meses)
+    rankings = {mes: r for mes, r in anteriores.items() if mes not in meses}
+    rankings.update(build_monthly_rankings(df[df['MÊS'].isin(meses)], n))
+    return dict(sorted(rankings.items()))
+
+
+def without_gap(rankings):
+    """Copia os rankings com GAP vazio (recortes que não incluem o mês de referência)."""
+    return replace(rankings, gap_top=rankings.gap_top.iloc[0:0], gap_all=rankings.gap_all.iloc[0:0])
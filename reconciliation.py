@@ -0,0 +1,142 @@
+# reconciliation.py
+
+import re
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from client_store import DB_FILE, ClientStore
+from utils_dados_clientes import normalizar_texto
+
+DIAS_MES = 30  # base usada para o target diário na planilha comparativa
+
+OUTPUT_COLS = [
+    'Cliente', 'MÊS', 'BUDGET', 'Importação', 'Exportação', 'Cabotagem', 'Quantidade_iTRACKER',
+    'Aproveitamento de Oportunidade (%)', 'Realização do Budget (%)',
+    'Desvio Budget vs Oportunidade (%)', 'Target Diário Esperado', 'Target Acumulado',
+    'Gap de Realização'
+]
+
+
+def canonical_client(nome):
+    """Chave canônica do cliente: sem acentos, caixa alta e espaços simples."""
+    return re.sub(r"\s+", " ", normalizar_texto(nome))
+
+
+def _percent(num, den):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den > 0, np.round(num / den * 100, 2), 0.0)
+
+
+def _somar_por_chave(df, colunas, codigos):
+    # Chave inteira perfeita (código do cliente * 13 + mês): agregação e junção por hash
+    chave = codigos * 13 + df['MÊS'].to_numpy(dtype=np.int64)
+    return df[colunas].groupby(chave).sum()
+
+
+def reconcile(budget_df, logcomex_df, itracker_df, dia_referencia=None, canonicalizar=canonical_client):
+    """
+    Junta budget, oportunidades Logcomex e realizado iTracker por cliente canônico e mês.
+
+    Parâmetros:
+        budget_df (DataFrame): Colunas Cliente, MÊS, BUDGET.
+        logcomex_df (DataFrame): Colunas Cliente, MÊS, Importação, Exportação, Cabotagem.
+        itracker_df (DataFrame): Colunas Cliente, MÊS, Quantidade.
+        dia_referencia (int, opcional): Dia do mês usado no target acumulado (padrão: hoje).
+        canonicalizar (callable): Converte o nome bruto na chave canônica do cliente.
+
+    Retorna:
+        DataFrame: Planilha comparativa com as colunas derivadas esperadas por utils_dados_clientes.
+    """
+    if dia_referencia is None:
+        dia_referencia = datetime.now().day
+    fontes = []
+    for df in (budget_df, logcomex_df, itracker_df):
+        df = df[df['Cliente'].notna()].copy()
+        df['MÊS'] = pd.to_numeric(df['MÊS'], errors='coerce')
+        fontes.append(df[df['MÊS'].between(1, 12)])
+
+    # Fatoração conjunta dos nomes canônicos das três fontes (tabela hash única)
+    nomes = pd.concat([f['Cliente'] for f in fontes], ignore_index=True)
+    # Cada nome distinto é normalizado uma única vez
+    canonicos = nomes.map({nome: canonicalizar(nome) for nome in pd.unique(nomes)})
+    codigos, uniques = pd.factorize(canonicos)
+    limites = np.cumsum([0] + [len(f) for f in fontes])
+    cod = [codigos[limites[i]:limites[i + 1]] for i in range(3)]
+
+    budget = _somar_por_chave(fontes[0], ['BUDGET'], cod[0])
+    logcomex = _somar_por_chave(fontes[1], ['Importação', 'Exportação', 'Cabotagem'], cod[1])
+    itracker = _somar_por_chave(fontes[2], ['Quantidade'], cod[2]).rename(
+        columns={'Quantidade': 'Quantidade_iTRACKER'}
+    )
+
+    # Clientes sem budget nem oportunidade entram apenas se tiverem realizado
+    out = pd.concat([budget, logcomex, itracker], axis=1).fillna(0)
+    chave = out.index.to_numpy()
+    out.insert(0, 'Cliente', pd.Index(uniques).str.lower().to_numpy()[chave // 13])
+    out.insert(1, 'MÊS', chave % 13)
+
+    budget_v = out['BUDGET'].to_numpy(dtype=float)
+    opp = out[['Importação', 'Exportação', 'Cabotagem']].to_numpy(dtype=float).sum(axis=1)
+    realizado = out['Quantidade_iTRACKER'].to_numpy(dtype=float)
+    target_diario = np.round(budget_v / DIAS_MES, 2)
+    target_acumulado = np.round(target_diario * dia_referencia, 2)
+
+    out['Aproveitamento de Oportunidade (%)'] = _percent(realizado, opp)
+    out['Realização do Budget (%)'] = _percent(realizado, budget_v)
+    out['Desvio Budget vs Oportunidade (%)'] = _percent(opp - budget_v, budget_v)
+    out['Target Diário Esperado'] = target_diario
+    out['Target Acumulado'] = target_acumulado
+    out['Gap de Realização'] = np.round(target_acumulado - realizado, 2)
+
+    for col in ['BUDGET', 'Importação', 'Exportação', 'Cabotagem', 'Quantidade_iTRACKER']:
+        out[col] = out[col].astype(np.int64)
+    return out[OUTPUT_COLS].sort_values(['Cliente', 'MÊS']).reset_index(drop=True)
+
+
+def _canonicalizar_com(matcher):
+    def canonicalizar(nome):
+        return canonical_client(matcher.match(nome) or nome)
+    return canonicalizar
+
+
+def run_reconciliation(
+    path_budget_logcomex="comparativo_budget_vs_logcomex_final.xlsx",
+    path_itracker="contagem_por_cliente.xlsx",
+    path_saida="comparativo_final_atualizado.xlsx",
+    ano=None,
+    dia_referencia=None,
+    matcher=None,
+):
+    """
+    Lê as planilhas de entrada, reconcilia e grava a planilha comparativa em uma única escrita.
+    Com um `matching.ClientMatcher`, nomes brutos são associados aos clientes canônicos antes da junção.
+
+    Retorna:
+        DataFrame: Resultado gravado em `path_saida`.
+    """
+    budget_logcomex = pd.read_excel(path_budget_logcomex, engine='openpyxl')
+    itracker = pd.read_excel(path_itracker, engine='openpyxl')
+    if ano is not None and 'ANO' in itracker.columns:
+        itracker = itracker[itracker['ANO'] == ano]
+    resultado = reconcile(
+        budget_logcomex[['Cliente', 'MÊS', 'BUDGET']],
+        budget_logcomex[['Cliente', 'MÊS', 'Importação', 'Exportação', 'Cabotagem']],
+        itracker[['Cliente', 'MÊS', 'Quantidade']],
+        dia_referencia=dia_referencia,
+        canonicalizar=canonical_client if matcher is None else _canonicalizar_com(matcher),
+    )
+    if matcher is not None:
+        matcher.save_cache()
+    resultado.to_excel(path_saida, index=False, engine='openpyxl')
+    return resultado
+
+
+if __name__ == "__main__":
+    ano = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    df = run_reconciliation(ano=ano)
+    print(f"✅ {len(df)} linhas reconciliadas em comparativo_final_atualizado.xlsx")
+    alteradas = ClientStore().write_frame(df)
+    print(f"✅ {alteradas} linhas (cliente, mês) novas ou alteradas em {DB_FILE}")
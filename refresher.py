@@ -0,0 +1,134 @@
+# refresher.py
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+
+import pandas as pd
+
+CACHE_DIR = ".cache"
+SNAPSHOT_FILE = os.path.join(CACHE_DIR, "ultimo_dataset.pkl")
+REFRESH_INTERVAL = 300  # segundos entre verificações de nova versão no Drive
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Última versão boa da planilha: dados, versão (hash do arquivo) e horário da carga."""
+    df: pd.DataFrame
+    versao: str
+    carregado_em: datetime
+
+
+class DataRefresher:
+    """
+    Mantém a última versão boa dos dados em memória e em disco e busca
+    versões novas em uma thread de fundo (stale-while-revalidate).
+
+    Parâmetros:
+        fetch (callable): Função sem argumentos que retorna o conteúdo bruto da planilha.
+        parse (callable): Converte o conteúdo bruto em DataFrame.
+        path (str): Arquivo onde o último snapshot é persistido.
+        intervalo (int): Segundos entre atualizações em segundo plano.
+    """
+
+    def __init__(self, fetch, parse, path=SNAPSHOT_FILE, intervalo=REFRESH_INTERVAL):
+        self._fetch = fetch
+        self._parse = parse
+        self._path = path
+        self._intervalo = intervalo
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._snapshot = self._load_from_disk()
+        self.ultimo_erro = None
+        self.ultima_tentativa = None
+
+    def get(self):
+        """Retorna o snapshot atual (ou None se nunca houve carga bem-sucedida)."""
+        return self._snapshot
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="data-refresher", daemon=True)
+                self._thread.start()
+
+    def request_refresh(self):
+        """Antecipa a próxima atualização em segundo plano."""
+        self._wake.set()
+
+    def refresh_now(self):
+        """
+        Busca a planilha imediatamente e troca o snapshot se houver versão nova.
+
+        Uma busca por vez: quem chama durante uma busca em andamento (a thread
+        de fundo ou outra sessão na carga inicial) espera por ela e recebe o
+        resultado, sem baixar de novo.
+
+        Retorna:
+            Snapshot | None: Snapshot vigente após a tentativa.
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            with self._refresh_lock:
+                return self._snapshot
+        try:
+            return self._refresh()
+        finally:
+            self._refresh_lock.release()
+
+    def _refresh(self):
+        self.ultima_tentativa = datetime.now()
+        try:
+            content = self._fetch()
+        except Exception as e:
+            self.ultimo_erro = e
+            return self._snapshot
+        versao = hashlib.sha1(content).hexdigest()
+        atual = self._snapshot
+        if atual is not None and atual.versao == versao:
+            # Mesmo arquivo: mantém o snapshot (e o arquivo em disco) como está
+            self.ultimo_erro = None
+            return atual
+        try:
+            novo = Snapshot(self._parse(content), versao, datetime.now())
+        except Exception as e:
+            self.ultimo_erro = e
+            return self._snapshot
+        self._save_to_disk(novo)
+        # Troca atômica: leitores veem o snapshot antigo ou o novo, nunca um parcial
+        self._snapshot = novo
+        self.ultimo_erro = None
+        return novo
+
+    def _loop(self):
+        while True:
+            self.refresh_now()
+            self._wake.wait(self._intervalo)
+            self._wake.clear()
+
+    def _load_from_disk(self):
+        try:
+            with open(self._path, "rb") as f:
+                snapshot = pickle.load(f)
+            return snapshot if isinstance(snapshot, Snapshot) else None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+
+    def _save_to_disk(self, snapshot):
+        # Escreve em arquivo temporário e renomeia, para nunca deixar um arquivo parcial
+        pasta = os.path.dirname(self._path) or "."
+        os.makedirs(pasta, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
@@ -0,0 +1,157 @@
+# scenarios.py
+
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from metrics import CLASSES_PERFORMANCE, classify_performance
+
+DIAS_MES = 30  # mesma base do target diário da planilha (reconciliation.DIAS_MES)
+
+
+def reference_day(target, budget):
+    """
+    Dia do mês usado no target acumulado da planilha (target = budget / 30 * dia),
+    recuperado das linhas com budget. Sem nenhum budget, usa o dia de hoje,
+    como a reconciliação.
+    """
+    com_budget = budget > 0
+    total = budget[com_budget].sum()
+    if total <= 0:
+        return datetime.now().day
+    return int(round(np.nansum(target[com_budget]) / total * DIAS_MES))
+
+
+@dataclass(frozen=True)
+class ScenarioResult:
+    """
+    Resultado de K cenários sobre C clientes.
+
+    As matrizes têm forma (K, C): linha = cenário, coluna = cliente.
+    `classe` usa os índices de metrics.classify_performance
+    (0 = crítico, 1 = atenção, 2 = meta atingida).
+    """
+    nomes: list
+    clientes: np.ndarray
+    realizado: np.ndarray
+    budget: np.ndarray
+    performance: np.ndarray
+    classe: np.ndarray
+    gap: np.ndarray
+
+    def summary(self):
+        """Uma linha por cenário com totais, performance geral, clientes por classe e GAP."""
+        com_budget = self.budget > 0
+        budget_total = self.budget.sum(axis=1)
+        # Mesma performance geral dos KPIs: todo o realizado sobre todo o budget
+        with np.errstate(divide='ignore', invalid='ignore'):
+            performance = np.where(budget_total > 0, self.realizado.sum() / budget_total * 100, np.nan)
+        resumo = pd.DataFrame({
+            'Cenário': self.nomes,
+            'Budget total': budget_total,
+            'Performance (%)': performance,
+        })
+        for i, nome in enumerate(CLASSES_PERFORMANCE):
+            resumo[nome] = ((self.classe == i) & com_budget).sum(axis=1)
+        resumo['GAP total'] = self.gap.sum(axis=1)
+        return resumo
+
+    def by_client(self, cenario):
+        """Budget, performance, classe e GAP de cada cliente em um cenário."""
+        k = self.nomes.index(cenario) if isinstance(cenario, str) else cenario
+        return pd.DataFrame({
+            'Cliente': self.clientes,
+            'BUDGET': self.budget[k],
+            'Performance': self.performance[k],
+            'Classe': CLASSES_PERFORMANCE[self.classe[k]],
+            'Gap de Realização': self.gap[k],
+        })
+
+
+class ScenarioEngine:
+    """
+    Simulador de cenários de budget sobre o agregado por cliente.
+
+    Um cenário é um vetor com o novo budget de cada cliente. O GAP é
+    recalculado com o target do novo budget no mês de referência
+    (target = budget / 30 * dia). A parte do budget que cai nesse mês segue a
+    proporção atual do cliente; cliente hoje sem budget recebe o novo budget
+    dividido igualmente entre os seus meses. Todos os cenários são avaliados
+    juntos por broadcasting (K cenários × C clientes).
+
+    Parâmetros:
+        por_cliente (DataFrame): Agregado de rankings.aggregate_by_client
+            (indexado por Cliente).
+        dia (int, opcional): Dia do target acumulado (padrão: o da própria planilha).
+    """
+
+    def __init__(self, por_cliente, dia=None):
+        self.clientes = por_cliente.index.to_numpy()
+        self._idx = {c: i for i, c in enumerate(self.clientes)}
+        self.budget = por_cliente['BUDGET'].to_numpy(dtype=float)
+        self.realizado = por_cliente['Quantidade_iTRACKER'].to_numpy(dtype=float)
+        self.realizado_gap = por_cliente['gap_iTRACKER'].to_numpy(dtype=float)
+        budget_gap = por_cliente['gap_BUDGET'].to_numpy(dtype=float)
+        linhas = por_cliente['linhas'].to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.parcela_gap = np.where(
+                self.budget > 0, budget_gap / self.budget,
+                np.where(linhas > 0, por_cliente['gap_linhas'].to_numpy(dtype=float) / linhas, 0.0),
+            )
+        self.dia = dia if dia is not None else reference_day(
+            por_cliente['gap_Target'].to_numpy(dtype=float), budget_gap)
+        self._nomes = []
+        self._vetores = []
+
+    # --- Montagem dos cenários ---
+
+    def add(self, nome, budget):
+        """Adiciona um cenário com o vetor completo de budgets (um valor por cliente)."""
+        budget = np.asarray(budget, dtype=float)
+        if budget.shape != self.budget.shape:
+            raise ValueError(f"Cenário '{nome}' com {budget.shape[0]} budgets para {len(self.budget)} clientes")
+        self._nomes.append(nome)
+        self._vetores.append(budget)
+        return self
+
+    def scale(self, nome, fator, clientes=None):
+        """Multiplica o budget de todos os clientes (ou só dos informados) por `fator`."""
+        fatores = np.ones_like(self.budget)
+        if clientes is None:
+            fatores[:] = fator
+        else:
+            fatores[[self._idx[c] for c in clientes]] = fator
+        return self.add(nome, self.budget * fatores)
+
+    def transfer(self, nome, origem, destino, fracao):
+        """Move `fracao` do budget do cliente `origem` para o cliente `destino`."""
+        budget = self.budget.copy()
+        movido = budget[self._idx[origem]] * fracao
+        budget[self._idx[origem]] -= movido
+        budget[self._idx[destino]] += movido
+        return self.add(nome, budget)
+
+    # --- Avaliação ---
+
+    def run(self, matriz=None, nomes=None):
+        """
+        Avalia os cenários adicionados (ou uma matriz K × C de budgets já pronta).
+
+        Retorna:
+            ScenarioResult: Performance, classe e GAP de todos os clientes em todos os cenários.
+        """
+        if matriz is None:
+            nomes = ['ATUAL'] + self._nomes
+            matriz = np.vstack([self.budget] + self._vetores)
+        else:
+            matriz = np.atleast_2d(np.asarray(matriz, dtype=float))
+            nomes = list(nomes) if nomes is not None else [f"Cenário {i + 1}" for i in range(len(matriz))]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            performance = np.where(matriz > 0, self.realizado / matriz * 100, np.nan)
+        classe = classify_performance(performance)
+        target = matriz * self.parcela_gap / DIAS_MES * self.dia
+        gap = target - self.realizado_gap
+        return ScenarioResult(nomes, self.clientes, self.realizado, matriz, performance, classe, gap)
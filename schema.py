@@ -0,0 +1,110 @@
+# schema.py
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class Coluna:
+    """Regra de uma coluna da planilha."""
+    nome: str
+    tipo: str  # 'cliente' ou 'numero'
+    obrigatoria: bool = True
+    minimo: float = None
+    maximo: float = None
+
+
+# Layout da planilha do Drive. Colunas não listadas passam sem alteração.
+SCHEMA = [
+    Coluna('Cliente', 'cliente'),
+    Coluna('MÊS', 'numero', minimo=1, maximo=12),
+    Coluna('BUDGET', 'numero'),
+    Coluna('Importação', 'numero'),
+    Coluna('Exportação', 'numero'),
+    Coluna('Cabotagem', 'numero'),
+    Coluna('Quantidade_iTRACKER', 'numero'),
+    Coluna('Target Diário Esperado', 'numero', obrigatoria=False),
+    Coluna('Target Acumulado', 'numero'),
+    Coluna('Gap de Realização', 'numero'),
+]
+
+# Valores de cliente que invalidam a linha
+CLIENTES_INVALIDOS = {"", "UNDEFINED", "NAN", "NONE"}
+
+
+@dataclass(frozen=True)
+class QualityReport:
+    """
+    Resumo da validação de uma versão da planilha.
+
+    `convertidos_nan` conta, por coluna, os valores preenchidos que não puderam
+    ser convertidos (ou estavam fora da faixa) e viraram NaN.
+    """
+    linhas_lidas: int
+    linhas_rejeitadas: int
+    convertidos_nan: dict = field(default_factory=dict)
+    colunas_ausentes: tuple = ()
+
+    @property
+    def linhas_validas(self):
+        return self.linhas_lidas - self.linhas_rejeitadas
+
+    def as_frame(self):
+        """Uma linha por coluna com valores convertidos para NaN."""
+        return pd.DataFrame(
+            [{"coluna": col, "valores_invalidos": n} for col, n in self.convertidos_nan.items() if n],
+            columns=["coluna", "valores_invalidos"],
+        )
+
+
+def missing_columns(df, schema=SCHEMA):
+    """Colunas obrigatórias do schema que não existem no DataFrame."""
+    return [c.nome for c in schema if c.obrigatoria and c.nome not in df.columns]
+
+
+def apply_schema(df, schema=SCHEMA):
+    """
+    Valida e converte a planilha em uma única passada pelo schema.
+
+    Colunas numéricas são convertidas com pd.to_numeric (inválidos e valores
+    fora da faixa viram NaN); linhas sem cliente válido são descartadas e o
+    nome do cliente é normalizado para maiúsculas.
+
+    Parâmetros:
+        df (DataFrame): Planilha como lida do Excel.
+        schema (list): Regras das colunas.
+
+    Retorna:
+        tuple: (DataFrame limpo, QualityReport)
+    """
+    colunas = {}
+    convertidos = {}
+    validas = np.ones(len(df), dtype=bool)
+    for regra in schema:
+        if regra.nome not in df.columns:
+            continue
+        original = df[regra.nome]
+        if regra.tipo == 'cliente':
+            texto = original.astype("string").str.upper()
+            validas &= (original.notna() & ~texto.str.strip().isin(CLIENTES_INVALIDOS)).to_numpy()
+            colunas[regra.nome] = texto.astype(object)
+            continue
+        valores = pd.to_numeric(original, errors='coerce')
+        if regra.minimo is not None or regra.maximo is not None:
+            valores = valores.where(valores.between(
+                -np.inf if regra.minimo is None else regra.minimo,
+                np.inf if regra.maximo is None else regra.maximo,
+            ))
+        convertidos[regra.nome] = int((original.notna() & valores.isna()).sum())
+        colunas[regra.nome] = valores
+
+    limpo = df.assign(**colunas)[validas].reset_index(drop=True)
+    report = QualityReport(
+        linhas_lidas=len(df),
+        linhas_rejeitadas=int((~validas).sum()),
+        convertidos_nan=convertidos,
+        colunas_ausentes=tuple(c.nome for c in schema if c.nome not in df.columns),
+    )
+    return limpo, report
@@ -0,0 +1,172 @@
+# segments.py
+
+from dataclasses import dataclass
+from itertools import permutations
+
+import numpy as np
+import pandas as pd
+
+FEATURES = ['Budget', 'Performance', 'Conversão', 'Tendência']
+
+# Perfil de cada segmento em percentis (0-1) de cada feature. O k-means parte
+# desses centróides e, no fim, cada grupo recebe o nome do protótipo mais
+# próximo (pareamento um a um), então os segmentos têm o mesmo significado em
+# todas as versões dos dados.
+PROTOTIPOS = {
+    'PRIORITÁRIOS': [0.85, 0.20, 0.35, 0.45],    # budget alto, performance baixa
+    'ESTRELAS': [0.70, 0.85, 0.80, 0.60],        # performance e conversão altas
+    'EM CRESCIMENTO': [0.40, 0.55, 0.55, 0.90],  # últimos meses acima da média do ano
+    'EM QUEDA': [0.45, 0.40, 0.40, 0.10],        # últimos meses abaixo da média do ano
+    'BASE': [0.20, 0.50, 0.50, 0.50],            # budget pequeno, sem destaque
+}
+SEM_BUDGET = 'SEM BUDGET'  # operam sem budget: ficam fora do agrupamento
+SEGMENTOS = list(PROTOTIPOS) + [SEM_BUDGET]
+
+MAX_ITER = 50
+
+
+def _percentual(numerador, denominador):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominador > 0, numerador / denominador * 100, np.nan)
+
+
+def _percentis(valores):
+    """Posição de cada valor entre os demais (0-1); NaN fica no meio (0.5)."""
+    return pd.Series(valores).rank(pct=True).fillna(0.5).to_numpy()
+
+
+def kmeans(pontos, centroides, max_iter=MAX_ITER):
+    """
+    k-means vetorizado: a cada iteração as distâncias de todos os pontos a
+    todos os centróides saem de um único produto de matrizes (N × K) e os
+    novos centróides de uma soma por grupo. Grupos que ficam vazios mantêm o centróide.
+
+    Parâmetros:
+        pontos (ndarray): Matriz (N, F).
+        centroides (ndarray): Centróides iniciais (K, F).
+
+    Retorna:
+        tuple: (rótulos (N,), centróides finais (K, F)).
+    """
+    centroides = np.asarray(centroides, dtype=float)
+    k = len(centroides)
+    rotulos = np.zeros(len(pontos), dtype=np.int64)
+    for _ in range(max_iter):
+        # |x - c|² = |x|² - 2 x·c + |c|²; |x|² não muda o grupo mais próximo
+        distancias = (centroides ** 2).sum(axis=1) - 2 * pontos @ centroides.T
+        rotulos = distancias.argmin(axis=1)
+        contagem = np.bincount(rotulos, minlength=k)
+        somas = np.column_stack([np.bincount(rotulos, pontos[:, f], minlength=k) for f in range(pontos.shape[1])])
+        novos = np.where(contagem[:, None] > 0, somas / np.maximum(contagem, 1)[:, None], centroides)
+        if np.allclose(novos, centroides):
+            break
+        centroides = novos
+    return rotulos, centroides
+
+
+def _nomear(centroides, prototipos):
+    """
+    Pareamento um a um entre grupos e protótipos com a menor distância total
+    (todas as permutações: K é pequeno).
+
+    Retorna:
+        ndarray: Índice do protótipo de cada grupo.
+    """
+    custo = ((centroides[:, None, :] - prototipos[None, :, :]) ** 2).sum(axis=2)
+    ordens = np.array(list(permutations(range(len(prototipos)))))
+    totais = custo[np.arange(len(centroides)), ordens].sum(axis=1)
+    return ordens[totais.argmin()]
+
+
+@dataclass(frozen=True)
+class ClientSegments:
+    """
+    Segmento de cada cliente, calculado uma vez por versão dos dados.
+
+    `por_cliente` é indexado por Cliente, com os totais, as quatro features,
+    o segmento e o budget não realizado (max(BUDGET - realizado, 0)).
+    `centroides` tem os centróides finais de cada segmento, em percentis.
+    """
+    por_cliente: pd.DataFrame
+    centroides: pd.DataFrame
+
+    def counts(self):
+        """Clientes por segmento, na ordem de SEGMENTOS."""
+        return self.por_cliente['Segmento'].value_counts().reindex(SEGMENTOS, fill_value=0)
+
+    def members(self, segmentos):
+        """Clientes dos segmentos informados, em ordem alfabética."""
+        return self.por_cliente.index[self.por_cliente['Segmento'].isin(segmentos)].tolist()
+
+    def top(self, segmento, n=3, por='Budget não realizado', clientes=None):
+        """
+        Os N clientes de um segmento com maior valor em `por`.
+
+        Parâmetros:
+            clientes (iterable, opcional): Restringe aos clientes do recorte atual.
+        """
+        seg = self.por_cliente[self.por_cliente['Segmento'] == segmento]
+        if clientes is not None:
+            seg = seg[seg.index.isin(clientes)]
+        return seg.nlargest(n, por)
+
+
+def segment_clients(kpi_views, tendencias, mes_referencia=None):
+    """
+    Segmenta todos os clientes por tamanho do budget, performance, conversão
+    de oportunidades e tendência.
+
+    A tendência é a performance dos últimos 3 meses menos a performance do
+    ano até o mês de referência (em pontos percentuais). Cada feature vira o
+    percentil do cliente entre os que têm budget (robusto a valores extremos
+    e sem depender da escala), e o k-means agrupa a matriz clientes × features
+    partindo dos PROTOTIPOS. Clientes sem budget mas com operação entram em
+    SEM BUDGET; clientes sem nenhum valor ficam de fora.
+
+    Parâmetros:
+        kpi_views (KPIViews): KPIs materializados da versão.
+        tendencias (TrendEngine): Tendências da versão.
+        mes_referencia (int, opcional): Mês da tendência (padrão: último mês com budget ou realizado).
+
+    Retorna:
+        ClientSegments
+    """
+    totais = kpi_views.by_client()
+    totais = totais[(totais != 0).any(axis=1)]
+    budget = totais['BUDGET'].to_numpy(dtype=float)
+    oportunidades = totais['OPORTUNIDADES'].to_numpy(dtype=float)
+    realizado = totais['Quantidade_iTRACKER'].to_numpy(dtype=float)
+
+    mensal = tendencias.monthly_totals()
+    if mes_referencia is None:
+        ativos = mensal.index[(mensal['BUDGET'] > 0) | (mensal['Realizado'] > 0)]
+        mes_referencia = ativos.max() if len(ativos) else mensal.index.max()
+    comparacoes = tendencias.lookup(totais.index, np.full(len(totais), mes_referencia))
+
+    por_cliente = pd.DataFrame({
+        'BUDGET': budget,
+        'Oportunidades': oportunidades,
+        'Realizado': realizado,
+        'Performance': _percentual(realizado, budget),
+        'Conversão': _percentual(realizado, oportunidades),
+        'Tendência': (comparacoes['Perf_3M'] - comparacoes['YTD_Performance']).to_numpy(),
+        'Budget não realizado': np.maximum(budget - realizado, 0),
+    }, index=totais.index)
+
+    com_budget = budget > 0
+    pontos = np.column_stack([
+        _percentis(valores[com_budget])
+        for valores in (budget, por_cliente['Performance'].to_numpy(),
+                        por_cliente['Conversão'].to_numpy(), por_cliente['Tendência'].to_numpy())
+    ])
+    prototipos = np.array(list(PROTOTIPOS.values()))
+    rotulos, centroides = kmeans(pontos, prototipos)
+    nomes = np.array(list(PROTOTIPOS), dtype=object)[_nomear(centroides, prototipos)]
+
+    segmento = np.full(len(por_cliente), SEM_BUDGET, dtype=object)
+    segmento[com_budget] = nomes[rotulos]
+    por_cliente['Segmento'] = segmento
+    return ClientSegments(
+        por_cliente=por_cliente,
+        centroides=pd.DataFrame(centroides, index=nomes, columns=FEATURES).reindex(list(PROTOTIPOS)),
+    )
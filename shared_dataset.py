@@ -0,0 +1,311 @@
+# shared_dataset.py
+#
+# Dataset publicado em arquivos mapeados em memória para vários processos do
+# Streamlit na mesma máquina (atrás de um balanceador). Um único publicador
+# baixa a planilha, monta o dataset validado e os agregados (KPIs por
+# cliente × mês, tendências e anomalias) e grava cada versão em
+# .cache/compartilhado/<versão>/, uma coluna por arquivo .npy (colunas de
+# texto viram códigos + categorias).
+#
+# Os workers só leem: mapeiam os arquivos com np.load(mmap_mode='r'), então
+# os dados ficam uma única vez no cache de páginas do sistema, qualquer que
+# seja o número de workers, e um worker novo começa sem baixar nem processar
+# a planilha.
+#
+# A troca de versão é atômica: a pasta da versão é gravada inteira e só então
+# o arquivo ATUAL passa a apontar para ela (os.replace). Cada worker confere
+# ATUAL a cada rerun e troca sozinho para a versão nova.
+#
+#   python shared_dataset.py [--pasta .cache/compartilhado] [--intervalo 300] [--planilha arquivo.xlsx]
+#
+# E os workers:
+#   DASH_DATASET_COMPARTILHADO=1 streamlit run main.py --server.port 8501
+#   DASH_DATASET_COMPARTILHADO=1 streamlit run main.py --server.port 8502 ...
+
+import argparse
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+import tomllib
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from anomalies import anomalies_for
+from client_store import ClientStore
+from dataset import SharedDataset, build_shared_dataset
+from kpi_views import KPIViews
+from refresher import CACHE_DIR, REFRESH_INTERVAL, DataRefresher
+from schema import missing_columns
+from trends import TrendEngine
+from version_diff import VersionHistory
+
+PUBLICADO_DIR = os.path.join(CACHE_DIR, "compartilhado")
+ATUAL_FILE = "ATUAL"
+META_FILE = "meta.pkl"
+MANTER_VERSOES = 2  # versões mantidas em disco (a atual e a anterior)
+ENV_LEITOR = "DASH_DATASET_COMPARTILHADO"  # definida nos workers do dashboard
+SECRETS_FILE = os.path.join(".streamlit", "secrets.toml")
+
+# Tipos gravados como estão (números, booleanos e datas); o resto vira códigos + categorias
+_TIPOS_MAPEAVEIS = "biufcmM"
+
+
+@dataclass(frozen=True)
+class PublishedDataset:
+    """Versão publicada já mapeada: o dataset e os agregados calculados pelo publicador."""
+    dataset: SharedDataset
+    kpi_views: KPIViews
+    tendencias: TrendEngine
+
+
+def _salvar(pasta, nome, arr):
+    np.save(os.path.join(pasta, f"{nome}.npy"), np.ascontiguousarray(arr), allow_pickle=False)
+
+
+def _mapear(pasta, nome):
+    # mmap_mode='r' devolve um array somente leitura apoiado no arquivo
+    return np.load(os.path.join(pasta, f"{nome}.npy"), mmap_mode="r", allow_pickle=False)
+
+
+def _gravar_versao(pasta, dataset, kpi_views, tendencias):
+    df = dataset.df
+    colunas = []
+    for i, col in enumerate(df.columns):
+        arr = df[col].to_numpy()
+        if arr.dtype.kind in _TIPOS_MAPEAVEIS:
+            _salvar(pasta, f"col{i}", arr)
+            colunas.append((col, None))
+        else:
+            codigos, categorias = pd.factorize(arr)
+            _salvar(pasta, f"col{i}", codigos.astype(np.int32))
+            colunas.append((col, list(categorias)))
+
+    kpi_clientes, kpi_meses, cubo = kpi_views.to_arrays()
+    _salvar(pasta, "kpi_meses", kpi_meses)
+    _salvar(pasta, "kpi_cubo", cubo)
+    tend_clientes, budget, realizado, comparacoes = tendencias.to_arrays()
+    _salvar(pasta, "tend_budget", budget)
+    _salvar(pasta, "tend_realizado", realizado)
+    for i, valores in enumerate(comparacoes.values()):
+        _salvar(pasta, f"tend_comp{i}", valores)
+
+    # meta.pkl é gravado por último: a versão só vale com ele presente
+    meta = {
+        'versao': dataset.versao,
+        'carregado_em': dataset.carregado_em,
+        'qualidade': dataset.qualidade,
+        'linhas': len(df),
+        'colunas': colunas,
+        'kpi_clientes': list(kpi_clientes),
+        'tend_clientes': list(tend_clientes),
+        'tend_comparacoes': list(comparacoes),
+    }
+    with open(os.path.join(pasta, META_FILE), "wb") as f:
+        pickle.dump(meta, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _apontar(pasta, versao):
+    # Mesmo esquema do snapshot: arquivo temporário + rename
+    fd, tmp = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(versao)
+        os.replace(tmp, os.path.join(pasta, ATUAL_FILE))
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _limpar(pasta, atual, manter=MANTER_VERSOES):
+    # Workers ainda na versão antiga não são afetados: no Linux os arquivos
+    # mapeados continuam válidos depois de apagados
+    versoes = [
+        os.path.join(pasta, nome) for nome in os.listdir(pasta)
+        if not nome.startswith(".") and nome != atual and os.path.isdir(os.path.join(pasta, nome))
+    ]
+    versoes.sort(key=os.path.getmtime, reverse=True)
+    for antiga in versoes[manter - 1:]:
+        shutil.rmtree(antiga, ignore_errors=True)
+
+
+def publish(dataset, kpi_views, tendencias, pasta=PUBLICADO_DIR):
+    """
+    Grava uma versão do dataset e dos agregados e aponta ATUAL para ela.
+
+    Parâmetros:
+        dataset (SharedDataset): Dataset validado.
+        kpi_views (KPIViews): KPIs materializados da versão.
+        tendencias (TrendEngine): Tendências da versão.
+        pasta (str): Pasta compartilhada com os workers.
+
+    Retorna:
+        str: Pasta da versão publicada.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    destino = os.path.join(pasta, dataset.versao)
+    if not os.path.exists(os.path.join(destino, META_FILE)):
+        # Grava em uma pasta temporária e renomeia: ninguém vê uma versão pela metade
+        tmp = tempfile.mkdtemp(dir=pasta, prefix=".tmp-")
+        try:
+            _gravar_versao(tmp, dataset, kpi_views, tendencias)
+            shutil.rmtree(destino, ignore_errors=True)
+            os.rename(tmp, destino)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+    _apontar(pasta, dataset.versao)
+    _limpar(pasta, dataset.versao)
+    return destino
+
+
+def load_published(destino):
+    """
+    Mapeia uma versão publicada, sem copiar as colunas numéricas.
+
+    As colunas de texto são remontadas a partir dos códigos (um ponteiro por
+    linha para as categorias), pois objetos Python não podem ser mapeados.
+
+    Retorna:
+        PublishedDataset
+    """
+    with open(os.path.join(destino, META_FILE), "rb") as f:
+        meta = pickle.load(f)
+
+    colunas = {}
+    for i, (col, categorias) in enumerate(meta['colunas']):
+        arr = _mapear(destino, f"col{i}")
+        if categorias is not None:
+            # Código -1 (valor ausente) cai na última posição
+            arr = np.array(categorias + [np.nan], dtype=object)[arr]
+            arr.flags.writeable = False
+        colunas[col] = arr
+    df = pd.DataFrame(colunas, index=pd.RangeIndex(meta['linhas']), copy=False)
+    dataset = SharedDataset(df, meta['versao'], meta['carregado_em'], meta['qualidade'])
+
+    kpi_views = KPIViews.from_arrays(
+        np.array(meta['kpi_clientes'], dtype=object), _mapear(destino, "kpi_meses"), _mapear(destino, "kpi_cubo")
+    )
+    tendencias = TrendEngine.from_arrays(
+        np.array(meta['tend_clientes'], dtype=object),
+        _mapear(destino, "tend_budget"), _mapear(destino, "tend_realizado"),
+        {nome: _mapear(destino, f"tend_comp{i}") for i, nome in enumerate(meta['tend_comparacoes'])},
+    )
+    return PublishedDataset(dataset, kpi_views, tendencias)
+
+
+class SharedReader:
+    """
+    Lado dos workers: acompanha o ATUAL da pasta publicada e mantém mapeada
+    a versão vigente.
+
+    Uma instância por processo. `attach` só lê o arquivo ATUAL quando a
+    versão não mudou; quando muda, mapeia a nova versão e troca a referência
+    de uma vez (sessões no meio de um rerun terminam com a anterior).
+
+    Parâmetros:
+        pasta (str): Pasta onde o publicador grava as versões.
+    """
+
+    def __init__(self, pasta=PUBLICADO_DIR):
+        self.pasta = pasta
+        self._lock = threading.Lock()
+        self._publicado = None
+        self.ultimo_erro = None
+
+    def current_version(self):
+        """Versão apontada por ATUAL (None se nada foi publicado ainda)."""
+        try:
+            with open(os.path.join(self.pasta, ATUAL_FILE)) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def attach(self):
+        """
+        Versão publicada vigente.
+
+        Retorna:
+            PublishedDataset | None: None se nada foi publicado ainda. Se a
+            versão nova não puder ser lida, continua na anterior (ultimo_erro
+            guarda o motivo).
+        """
+        versao = self.current_version()
+        with self._lock:
+            if versao is not None and (self._publicado is None or self._publicado.dataset.versao != versao):
+                try:
+                    self._publicado = load_published(os.path.join(self.pasta, versao))
+                    self.ultimo_erro = None
+                except (OSError, ValueError, EOFError, pickle.UnpicklingError) as e:
+                    self.ultimo_erro = e
+            return self._publicado
+
+
+def publish_workbook(df, carregado_em, historico=None, pasta=PUBLICADO_DIR):
+    """
+    Monta o dataset a partir da planilha lida, calcula os agregados e publica.
+
+    Parâmetros:
+        df (DataFrame): Planilha lida (read_workbook).
+        carregado_em (datetime): Momento da carga.
+        historico (VersionHistory, opcional): Recebe a versão nova (diff e
+            armazenamento estruturado ficam a cargo do publicador).
+        pasta (str): Pasta compartilhada com os workers.
+
+    Retorna:
+        SharedDataset: Dataset publicado.
+    """
+    faltando = missing_columns(df)
+    if faltando:
+        raise ValueError(f"Colunas ausentes: {', '.join(faltando)}")
+    dataset = build_shared_dataset(df, carregado_em)
+    if historico is not None:
+        historico.observe(dataset)
+    # Anomalias já ficam gravadas por versão em .cache/anomalias/ (lidas pelos workers)
+    anomalies_for(dataset)
+    publish(dataset, KPIViews(dataset.df), TrendEngine(dataset.df), pasta)
+    return dataset
+
+
+def main():
+    # data_loader importa o Streamlit: só é carregado no processo publicador
+    from data_loader import fetch_workbook_bytes, read_workbook
+
+    parser = argparse.ArgumentParser(description="Publica o dataset do dashboard para os workers em modo leitor.")
+    parser.add_argument("--pasta", default=PUBLICADO_DIR)
+    parser.add_argument("--intervalo", type=int, default=REFRESH_INTERVAL)
+    parser.add_argument("--planilha", help="Publica uma planilha local uma vez, sem acessar o Drive")
+    args = parser.parse_args()
+
+    historico = VersionHistory(store=ClientStore())
+    if args.planilha:
+        with open(args.planilha, "rb") as f:
+            dataset = publish_workbook(read_workbook(f.read()), datetime.now(), historico, args.pasta)
+        print(f"Versão {dataset.versao} publicada em {args.pasta}")
+        return
+
+    with open(SECRETS_FILE, "rb") as f:
+        credentials_info = tomllib.load(f)["google"]
+    refresher = DataRefresher(lambda: fetch_workbook_bytes(credentials_info), read_workbook)
+    publicada = None
+    while True:
+        snapshot = refresher.refresh_now()
+        if refresher.ultimo_erro is not None:
+            print(f"{datetime.now():%H:%M:%S} Falha ao atualizar: {refresher.ultimo_erro}")
+        if snapshot is not None and snapshot.versao != publicada:
+            try:
+                dataset = publish_workbook(snapshot.df, snapshot.carregado_em, historico, args.pasta)
+                publicada = snapshot.versao
+                print(f"{datetime.now():%H:%M:%S} Versão {dataset.versao} publicada ({len(dataset.df)} linhas)")
+            except ValueError as e:
+                print(f"{datetime.now():%H:%M:%S} Planilha não publicada: {e}")
+        time.sleep(args.intervalo)
+
+
+if __name__ == "__main__":
+    main()
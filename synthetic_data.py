@@ -0,0 +1,42 @@
+# synthetic_data.py
+
+import numpy as np
+import pandas as pd
+
+
+def make_workbook_df(n_clientes=500, meses=range(1, 13), seed=42):
+    """
+    Gera uma planilha sintética com o mesmo layout da planilha do Drive,
+    usada pelos benchmarks e testes de carga.
+
+    Parâmetros:
+        n_clientes (int): Quantidade de clientes.
+        meses (iterable): Meses presentes para cada cliente.
+        seed (int): Semente do gerador aleatório.
+
+    Retorna:
+        DataFrame: Uma linha por (Cliente, MÊS).
+    """
+    rng = np.random.default_rng(seed)
+    meses = list(meses)
+    clientes = np.array([f"CLIENTE {i:05d} LTDA" for i in range(n_clientes)], dtype=object)
+    n = n_clientes * len(meses)
+    budget = rng.integers(0, 300, n) * (rng.random(n) > 0.1)
+    importacao = rng.poisson(40, n)
+    exportacao = rng.poisson(15, n)
+    cabotagem = rng.poisson(5, n)
+    realizado = np.minimum(rng.poisson(np.maximum(budget, 1) * 0.7), importacao + exportacao + cabotagem + 20)
+    target_diario = np.round(budget / 30, 2)
+    target_acumulado = np.round(target_diario * 14, 2)
+    return pd.DataFrame({
+        'Cliente': np.repeat(clientes, len(meses)),
+        'MÊS': np.tile(meses, n_clientes),
+        'BUDGET': budget,
+        'Importação': importacao,
+        'Exportação': exportacao,
+        'Cabotagem': cabotagem,
+        'Quantidade_iTRACKER': realizado,
+        'Target Diário Esperado': target_diario,
+        'Target Acumulado': target_acumulado,
+        'Gap de Realização': np.round(target_acumulado - realizado, 2),
+    })
@@ -0,0 +1,303 @@
+# templates.py
+
+import base64
+import re
+from functools import lru_cache
+from string import Formatter
+
+from detailed_table import TABLE_STYLES
+from style import COLORS, get_css
+
+TEMA = "Clean"
+
+# Ícones das seções e dos KPIs: viram classes CSS (.icone-<nome>) enviadas
+# uma vez por página, em vez de repetir o PNG em base64 em cada bloco.
+ICONES = {
+    "budget": "assets/budget-icon.png",
+    "oportunidades": "assets/oportu-icon.png",
+    "realizado": "assets/realizado-icon.png",
+    "performance": "assets/perf-bud-icon.png",
+    "titulo": "assets/titulos-icon.png",
+    "detalhes": "assets/details-icon.png",
+    "ia": "assets/ia-icon.png",
+    "insights": "assets/insights-icon.png",
+    "recomendacoes": "assets/recomen-icon.png",
+}
+LOGO = "assets/itracker_logo.png"
+
+
+def _minify(fonte):
+    # Junta as linhas e tira a indentação: o markdown do Streamlit trata
+    # linhas com 4+ espaços como bloco de código, e os espaços só ocupam bytes.
+    return re.sub(r">\s+<", "><", " ".join(linha.strip() for linha in fonte.splitlines() if linha.strip()))
+
+
+class HtmlTemplate:
+    """
+    Template compilado uma vez: a parte estática é minificada no import e os
+    pedaços viram uma única string de formato, então cada renderização é só
+    um str.format_map (em C) intercalando os valores.
+
+    Usa a sintaxe de str.format ({campo}, {{ para chave literal), sem
+    especificadores de formato: os valores chegam já formatados. Campos
+    passados em `fixos` entram na parte estática na compilação.
+    """
+
+    def __init__(self, fonte, **fixos):
+        pedacos = []
+        self.campos = []
+        for literal, campo, _, _ in Formatter().parse(_minify(fonte)):
+            if campo in fixos:
+                literal += str(fixos[campo])
+                campo = None
+            pedacos.append(literal.replace("{", "{{").replace("}", "}}"))
+            if campo is not None:
+                pedacos.append("{" + campo + "}")
+                if campo not in self.campos:
+                    self.campos.append(campo)
+        self.formato = "".join(pedacos)
+
+    def __call__(self, **valores):
+        return self.formato.format_map(valores)
+
+
+def _img_to_base64(path):
+    with open(path, "rb") as f:
+        return base64.b64encode(f.read()).decode()
+
+
+# Estilo dos componentes abaixo (antes repetido inline em cada bloco)
+_COMPONENTES_CSS = f"""
+<style>
+.icone {{ display:inline-block; flex:none; vertical-align:middle; background:center / contain no-repeat; }}
+.icone-20 {{ width:20px; height:20px; }}
+.icone-24 {{ width:24px; height:24px; }}
+.icone-28 {{ width:28px; height:28px; }}
+.icone-34 {{ width:34px; height:34px; margin-right:14px; }}
+.section-header {{ text-align:center; display:flex; justify-content:center; align-items:center; gap:12px; }}
+.section-header.topo {{ margin-top:15px; }}
+.section-header .section-title {{ margin:0; }}
+.kpi-box {{ display:flex; flex-direction:row; align-items:center; justify-content:center; padding:18px 24px;
+    border-radius:12px; background-color:#f9f9f9; border-left:6px solid #2196F3;
+    box-shadow:0 2px 6px rgba(0,0,0,0.08); min-width:200px; max-width:250px; margin:auto; }}
+.kpi-box .kpi-texto {{ display:flex; flex-direction:column; line-height:1.2; }}
+.kpi-box .kpi-rotulo {{ font-size:13px; color:#555; }}
+.kpi-box .kpi-numero {{ font-size:22px; font-weight:700; }}
+.insight {{ background-color:{COLORS['background']}; padding:10px; border-radius:5px; margin-top:10px; }}
+.insight.conclusoes {{ padding:15px; border-radius:8px; margin-top:0; }}
+.insight-titulo {{ display:flex; align-items:center; gap:10px; }}
+.insight-titulo h4, .insight-titulo h5 {{ margin:0; }}
+.conclusoes .insight-titulo {{ margin-bottom:10px; }}
+.conclusoes .insight-titulo.recomendacoes {{ margin-top:15px; }}
+.insight p {{ margin-bottom:10px; }}
+.filtros-ativos {{ background-color:#E3F2FD; padding:10px; border-radius:5px; }}
+</style>
+"""
+
+# Cabeçalho institucional (sobrepõe o título de style.get_css)
+_TITULO_CSS = """
+<style>
+    .titulo-dashboard-container {
+        position: relative;
+        display: flex;
+        justify-content: center;
+        align-items: center;
+        padding: 35px 30px;
+        border-radius: 15px;
+        background: linear-gradient(to right, #F37021, #ffffff);
+        box-shadow: 0 4px 12px rgba(0, 0, 0, 0.2);
+        text-align: center;
+    }
+    .titulo-dashboard {
+        font-size: 38px;
+        font-weight: 800;
+        color: #212529;
+        margin: 0 auto;
+    }
+    .logo-dashboard {
+        position: absolute;
+        right: 30px;
+        top: 50%;
+        transform: translateY(-50%);
+        max-height: 65px;
+        margin-right: 5%;
+    }
+    .subtitulo-dashboard {
+        position: absolute;
+        bottom: 10px;
+        right: 30px;
+        font-size: 13px;
+        font-style: italic;
+        font-weight: 400;
+        color: #8A8A8A;
+        margin: 0;
+    }
+    @media (max-width: 768px) {
+        .titulo-dashboard {
+            font-size: 28px;
+            width: 100%;
+        }
+        .logo-dashboard {
+            position: static;
+            display: block;
+            margin: 10px auto 0;
+            transform: none;
+        }
+        .subtitulo-dashboard {
+            position: static;
+            text-align: center;
+            margin-top: 10px;
+        }
+    }
+</style>
+"""
+
+
+@lru_cache(maxsize=None)
+def theme_css(tema=TEMA):
+    """style.get_css minificado, gerado uma vez por processo para cada tema."""
+    return _minify(get_css(tema))
+
+
+@lru_cache(maxsize=1)
+def icon_css():
+    """Uma regra .icone-<nome> por ícone, com o PNG embutido uma única vez."""
+    return "<style>" + "".join(
+        f".icone-{nome}{{background-image:url(data:image/png;base64,{_img_to_base64(path)})}}"
+        for nome, path in ICONES.items()
+    ) + "</style>"
+
+
+@lru_cache(maxsize=1)
+def page_css():
+    """
+    Todo o CSS compartilhado da página: tema, cabeçalho, componentes, ícones
+    e a tabela detalhada. Montado uma vez por processo e enviado uma vez por rerun.
+    """
+    return theme_css() + _minify(_TITULO_CSS) + _minify(_COMPONENTES_CSS) + icon_css() + _minify(TABLE_STYLES)
+
+
+@lru_cache(maxsize=1)
+def page_title():
+    """Cabeçalho com o logo (estático)."""
+    return _minify(f"""
+    <div class="titulo-dashboard-container">
+        <h1 class="titulo-dashboard">DASHBOARD DE ANÁLISE COMERCIAL DE CLIENTES</h1>
+        <img class="logo-dashboard" src="data:image/png;base64,{_img_to_base64(LOGO)}" alt="Logo iTracker">
+        <p class="subtitulo-dashboard">Monitoramento em tempo real do desempenho comercial</p>
+    </div>
+    """)
+
+
+_ICONE = HtmlTemplate('<span class="icone icone-{tamanho} icone-{nome}" role="img" aria-label="{rotulo}"></span>')
+
+@lru_cache(maxsize=64)
+def icon(nome, tamanho, rotulo=""):
+    return _ICONE(nome=nome, tamanho=tamanho, rotulo=rotulo)
+
+
+_SECAO = HtmlTemplate("""
+<div class='section section-header{topo}'>
+    {icone}
+    <h3 class='section-title'>{titulo}</h3>
+</div>
+""")
+
+_KPI = HtmlTemplate("""
+<div class="kpi-box">
+    {icone}
+    <div class="kpi-texto">
+        <span class="kpi-rotulo">{titulo}</span>
+        <span class="kpi-numero" style="{estilo}">{valor}</span>
+    </div>
+</div>
+""")
+
+_INSIGHT = HtmlTemplate("""
+<div class='insight'>
+    <div class='insight-titulo'>
+        {icone}
+        <h5>{titulo}</h5>
+    </div>
+    {intro}
+    <ul>{itens}</ul>
+</div>
+""", icone=icon("insights", 20, "Insights"))
+
+_CONCLUSOES = HtmlTemplate("""
+<div class='insight conclusoes'>
+    <div class='insight-titulo'>
+        {icone_insights}
+        <h4>ANÁLISE DE PERFORMANCE E CONCLUSÕES</h4>
+    </div>
+    <p>{intro}</p>
+    <ul>{itens}</ul>
+    <div class='insight-titulo recomendacoes'>
+        {icone_recomendacoes}
+        <h4>RECOMENDAÇÕES E AÇÕES</h4>
+    </div>
+    <ol>{recomendacoes}</ol>
+</div>
+""", icone_insights=icon("insights", 24, "Insights"), icone_recomendacoes=icon("recomendacoes", 24, "Recomendações"))
+
+_FILTROS = HtmlTemplate("<div class='filtros-ativos'><b>Filtros ativos:</b> {filtros}</div>")
+
+_RODAPE = HtmlTemplate("""
+<div class="custom-footer">
+    <span>📅 DADOS DE: {data}</span> |
+    <span>📧 EMAIL: COMERCIAL@EMPRESA.COM</span> |
+    <span>📞 TELEFONE: (21) 99999-9999</span>
+</div>
+""")
+
+
+def _itens(itens):
+    return "<li>" + "</li><li>".join(itens) + "</li>" if itens else ""
+
+
+# Blocos cacheados pelos próprios textos: reruns que não mudam os filtros
+# (paginação, ordenação da tabela, expanders) reaproveitam o HTML pronto.
+@lru_cache(maxsize=64)
+def section_header(titulo, icone="detalhes", topo=True):
+    """Título de seção com ícone; `topo` adiciona o espaçamento acima dos gráficos."""
+    return _SECAO(titulo=titulo, icone=icon(icone, 28, titulo), topo=" topo" if topo else "")
+
+
+@lru_cache(maxsize=256)
+def kpi_card(icone, titulo, valor, estilo=""):
+    return _KPI(icone=icon(icone, 34, titulo), titulo=titulo, valor=valor, estilo=estilo)
+
+
+def insight_block(titulo, itens, intro=""):
+    """
+    Bloco de insights de um gráfico.
+
+    Parâmetros:
+        titulo (str): Título do bloco.
+        itens (list): HTML de cada item da lista.
+        intro (str): Parágrafo opcional antes da lista.
+    """
+    return _insight_block(titulo, tuple(itens), intro)
+
+
+@lru_cache(maxsize=256)
+def _insight_block(titulo, itens, intro):
+    return _INSIGHT(titulo=titulo, intro=f"<p>{intro}</p>" if intro else "", itens=_itens(itens))
+
+
+def conclusions_block(intro, itens, recomendacoes):
+    """Análise geral e recomendações (recomendacoes já em HTML de <li>)."""
+    return _conclusions_block(intro, tuple(itens), recomendacoes)
+
+
+@lru_cache(maxsize=64)
+def _conclusions_block(intro, itens, recomendacoes):
+    return _CONCLUSOES(intro=intro, itens=_itens(itens), recomendacoes=recomendacoes)
+
+
+def active_filters(filtros):
+    return _FILTROS(filtros=" | ".join(filtros))
+
+
+def footer(data):
+    return _RODAPE(data=data)
@@ -0,0 +1,9 @@
+# conftest.py
+#
+#   python -m pytest tests
+
+import os
+import sys
+
+# Os módulos do projeto ficam na raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
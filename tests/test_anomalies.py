@@ -0,0 +1,106 @@
+# test_anomalies.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from anomalies import LIMIAR, _robust_z, flagged, score_anomalies
+
+
+def _planilha():
+    # 10 clientes × 6 meses sem nada fora do padrão, mais as anomalias conhecidas
+    linhas = []
+    for i in range(10):
+        for mes in range(1, 7):
+            linhas.append([f"C{i}", float(mes), 50.0 + i + mes, 100.0 + 2 * i + mes, 10.0 + i % 3 + mes % 2])
+    df = pd.DataFrame(linhas, columns=['Cliente', 'MÊS', 'Quantidade_iTRACKER', 'Importação', 'Gap de Realização'])
+    df = df.set_index(['Cliente', 'MÊS'])
+    df.loc[('C9', 3.0), 'Quantidade_iTRACKER'] = 500.0                     # muito acima de todos
+    df.loc[('C4', 6.0), 'Quantidade_iTRACKER'] = 0.0                       # parou de realizar
+    df.loc[('C7', 5.0), ['Quantidade_iTRACKER', 'Importação']] = [0.0, 1000.0]  # oportunidades sem realização
+    df = df.reset_index()
+    # Cliente novo: só 2 meses, sem histórico para comparar
+    novo = pd.DataFrame({'Cliente': ['NOVO', 'NOVO'], 'MÊS': [1.0, 2.0], 'Quantidade_iTRACKER': [55.0, 0.0],
+                         'Importação': [100.0, 100.0], 'Gap de Realização': [10.0, 10.0]})
+    df = pd.concat([df, novo], ignore_index=True)
+    return df.assign(Exportação=np.nan, Cabotagem=0.0)
+
+
+@pytest.fixture(scope="module")
+def anomalias():
+    return score_anomalies(_planilha()).set_index(['Cliente', 'MÊS'])
+
+
+def test_z_robusto_entre_os_clientes_do_mes():
+    valores = pd.Series([10.0, 11.0, 12.0, 13.0, 14.0, 100.0])
+    z, mediana = _robust_z(valores, np.zeros(6))
+    assert mediana.iloc[0] == 12.5
+    # MAD = 1.5: 0.6745 * (100 - 12.5) / 1.5
+    assert z.iloc[5] == pytest.approx(0.6745 * 87.5 / 1.5)
+    assert (z.iloc[:5].abs() < LIMIAR).all()
+
+
+def test_mad_zero_usa_o_desvio_medio():
+    valores = pd.Series([5.0, 5.0, 5.0, 5.0, 9.0, 7.0, 7.0, 7.0])
+    z, _ = _robust_z(valores, np.array([0, 0, 0, 0, 0, 1, 1, 1]))
+    # Grupo 0: mediana 5, MAD 0, desvio médio 0.8; grupo 1 sem dispersão: z = 0
+    assert z.iloc[4] == pytest.approx(4 / (1.2533 * 0.8))
+    assert (z.iloc[:4] == 0).all()
+    assert (z.iloc[5:] == 0).all()
+
+
+def test_outlier_entre_clientes_e_no_historico(anomalias):
+    linha = anomalias.loc[('C9', 3.0)]
+    assert linha['z_Realizado_clientes'] > LIMIAR
+    assert linha['z_Realizado_historico'] > LIMIAR
+    assert "realização atípica entre os clientes do mês" in linha['motivos']
+    assert "realização fora do histórico do cliente" in linha['motivos']
+    assert linha['score'] == max(abs(linha[c]) for c in anomalias.columns if c.startswith('z_'))
+
+
+def test_realizacao_caiu_a_zero(anomalias):
+    assert "realização caiu a zero" in anomalias.loc[('C4', 6.0), 'motivos']
+    assert "pico de oportunidades" not in anomalias.loc[('C4', 6.0), 'motivos']
+
+
+def test_pico_de_oportunidades_sem_realizacao(anomalias):
+    motivos = anomalias.loc[('C7', 5.0), 'motivos']
+    assert "pico de oportunidades sem realização" in motivos
+    assert "oportunidades fora do histórico do cliente" in motivos
+
+
+def test_cliente_sem_historico_nao_e_comparado_consigo(anomalias):
+    linha = anomalias.loc[('NOVO', 2.0)]
+    assert linha['z_Realizado_historico'] == 0.0
+    assert "caiu a zero" not in linha['motivos']
+    assert "histórico" not in linha['motivos']
+
+
+def test_so_os_outliers_sao_marcados(anomalias):
+    marcadas = flagged(anomalias.reset_index())
+    # NOVO em fevereiro não tem histórico, mas o zero destoa dos outros clientes do mês
+    assert list(zip(marcadas['Cliente'], marcadas['MÊS'])) == [('C7', 5.0), ('C9', 3.0), ('C4', 6.0), ('NOVO', 2.0)]
+    assert marcadas.loc[marcadas['Cliente'] == 'NOVO', 'motivos'].item() == "realização atípica entre os clientes do mês"
+
+
+def test_flagged_filtra_meses_e_clientes(anomalias):
+    tabela = anomalias.reset_index()
+    assert flagged(tabela, meses=[5.0])['Cliente'].tolist() == ['C7']
+    assert flagged(tabela, clientes=['C4'])['MÊS'].tolist() == [6.0]
+    assert flagged(tabela, meses=[3.0], clientes=['C4']).empty
+    assert (flagged(tabela)['motivos'] != "").all()
+
+
+def test_categoria_vazia_nao_zera_as_oportunidades():
+    df = pd.DataFrame({
+        'Cliente': ['A', 'A', 'B'],
+        'MÊS': [1.0, 1.0, 1.0],
+        'Importação': [10.0, np.nan, np.nan],
+        'Exportação': [np.nan, 3.0, np.nan],
+        'Cabotagem': [2.0, np.nan, np.nan],
+        'Quantidade_iTRACKER': [5.0, np.nan, 1.0],
+        'Gap de Realização': [0.0, 0.0, 0.0],
+    })
+    oportunidades = score_anomalies(df).set_index('Cliente')['Oportunidades']
+    assert oportunidades['A'] == 15.0
+    assert oportunidades['B'] == 0.0
@@ -0,0 +1,72 @@
+# test_client_store.py
+
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from client_store import ClientStore
+from version_diff import VersionHistory
+
+
+def _planilha(linhas):
+    colunas = ['Cliente', 'MÊS', 'BUDGET', 'Importação', 'Exportação', 'Cabotagem', 'Quantidade_iTRACKER']
+    return pd.DataFrame(linhas, columns=colunas)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ClientStore(str(tmp_path / "dados.sqlite"))
+    yield store
+    store.close()
+
+
+def test_linhas_do_mesmo_cliente_e_mes_sao_somadas(store):
+    store.write_frame(_planilha([
+        ["Aliança", 3, 100, 10, 5, 5, 30],
+        ["ALIANCA ", 3, 100, 20, 0, 0, 30],
+        ["Aliança", 4, 50, np.nan, np.nan, np.nan, 10],
+        [np.nan, 4, 999, 1, 1, 1, 1],
+    ]))
+    assert len(store) == 1
+    mes = store["ALIANCA"]["3"]
+    assert (mes["budget"], mes["importacao"], mes["quantidade_itracker"]) == (200, 30, 60)
+    assert mes["realizacao_budget"] == 30.0
+    assert mes["aproveitamento_oportunidade"] == 150.0
+    assert mes["desvio_budget_vs_oportunidade"] == -80.0
+    assert store["ALIANCA"]["4"]["importacao"] is None
+    assert store["ALIANCA"]["4"]["aproveitamento_oportunidade"] == 0.0
+
+
+def test_grava_so_as_colunas_presentes(store):
+    store.upsert({"ALIANÇA": {"3": {"budget": 100, "quantidade_itracker": 40, "realizacao_budget": 40.0,
+                                    "target_acumulado": 70, "gap_realizacao": 30}}})
+    store.write_frame(pd.DataFrame({'Cliente': ["Aliança"], 'MÊS': [3], 'Quantidade_iTRACKER': [55]}))
+    mes = store["ALIANCA"]["3"]
+    assert (mes["budget"], mes["quantidade_itracker"], mes["target_acumulado"]) == (100, 55, 70)
+    assert mes["realizacao_budget"] == 40.0  # sem BUDGET na planilha, o percentual não é recalculado
+    assert store.write_frame(pd.DataFrame({'Cliente': ["Aliança"], 'MÊS': [3]})) == 0
+
+
+def test_historico_regrava_as_chaves_tocadas_pelo_diff(store, tmp_path):
+    historico = VersionHistory(store=store, path=str(tmp_path / "linhas.pkl"))
+    historico.observe(SimpleNamespace(versao="v1", df=_planilha([
+        ["Aliança", 3.0, 100, 10, 5, 5, 30],
+        ["ALIANCA", 3.0, 100, 20, 0, 0, 30],
+        ["Braskem", 3.0, 50, 1, 1, 1, 10],
+        ["Vale", 4.0, 80, 2, 2, 2, 20],
+    ])))
+    versao = store.versao
+    diff = historico.observe(SimpleNamespace(versao="v2", df=_planilha([
+        ["Aliança", 3.0, 100, 10, 5, 5, 45],
+        ["ALIANCA", 3.0, 100, 20, 0, 0, 30],
+        ["Braskem", 3.0, 50, 1, 1, 1, 10],
+    ])))
+    assert len(diff.modificados) == 1 and len(diff.removidos) == 1
+    assert store.versao > versao
+    # A grafia que não mudou continua somada com a alterada
+    assert store["ALIANCA"]["3"]["quantidade_itracker"] == 75
+    assert store["ALIANCA"]["3"]["budget"] == 200
+    assert "VALE" not in store
+    assert store["BRASKEM"]["3"]["quantidade_itracker"] == 10
@@ -0,0 +1,134 @@
+# test_events.py
+
+import json
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from events import EventIngestor, RealtimeAggregates, parse_event
+
+CARGA = datetime(2025, 4, 17, 12, 0)
+
+
+def _dataset(versao="v1"):
+    df = pd.DataFrame({
+        'Cliente': ['ALIANÇA', 'ALIANÇA', 'BRASKEM', 'SEM MES'],
+        'MÊS': [4.0, 4.0, 4.0, np.nan],
+        'BUDGET': [100.0, 100.0, 50.0, 10.0],
+        'Target Acumulado': [40.0, 40.0, 30.0, 5.0],
+        'Quantidade_iTRACKER': [30.0, 20.0, np.nan, 1.0],
+    })
+    return SimpleNamespace(df=df, versao=versao, carregado_em=CARGA)
+
+
+def _evento(cliente, data, quantidade=None):
+    evento = {"cliente": cliente, "data": data}
+    if quantidade is not None:
+        evento["quantidade"] = quantidade
+    return json.dumps(evento, ensure_ascii=False)
+
+
+@pytest.fixture
+def sao_paulo(monkeypatch):
+    monkeypatch.setenv("TZ", "America/Sao_Paulo")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_eventos_somam_ao_realizado_da_planilha():
+    agregados = RealtimeAggregates(_dataset().df, CARGA)
+    assert agregados.apply([
+        _evento("Aliança", "2025-04-17T13:00:00"),
+        _evento("ALIANCA ", "2025-04-18T08:00:00", 4),
+    ]) == 2
+    linha = agregados.get("aliança", 4)
+    assert (linha['Cliente'], linha['Realizado planilha'], linha['Eventos']) == ('ALIANÇA', 50.0, 5.0)
+    assert linha['Performance'] == pytest.approx(55 / 200 * 100)
+    assert linha['Gap de Realização'] == 80.0 - 55.0
+    assert agregados.get("BRASKEM", 4)['Eventos'] == 0.0
+
+
+def test_eventos_ate_a_carga_e_linhas_invalidas_sao_ignorados():
+    agregados = RealtimeAggregates(_dataset().df, CARGA)
+    assert agregados.apply([
+        _evento("ALIANÇA", "2025-04-17T12:00:00"),   # no instante da carga: já está na planilha
+        _evento("ALIANÇA", "2025-04-10T09:00:00"),
+        '{"cliente": "ALIANÇA", "data": ',
+        _evento("", "2025-04-18T08:00:00"),
+        _evento("ALIANÇA", "ontem"),
+    ]) == 0
+    assert agregados.ignorados == 5
+    assert agregados.changed().empty
+
+
+def test_datas_com_fuso_viram_horario_local(sao_paulo):
+    assert parse_event(_evento("X", "2025-04-17T15:30:00+00:00"))[1] == datetime(2025, 4, 17, 12, 30)
+    agregados = RealtimeAggregates(_dataset().df, CARGA)
+    assert agregados.apply([
+        _evento("BRASKEM", "2025-04-17T14:00:00+00:00"),  # 11:00 local, antes da carga
+        _evento("BRASKEM", "2025-05-01T01:00:00+00:00"),  # 30/04 22:00 local: mês 4
+    ]) == 1
+    assert agregados.get("BRASKEM", 4)['Eventos'] == 1.0
+    assert agregados.get("BRASKEM", 5) is None
+
+
+def test_cliente_fora_da_planilha_entra_sem_budget():
+    agregados = RealtimeAggregates(_dataset().df, CARGA)
+    agregados.apply([_evento("Maersk Line", "2025-05-02T10:00:00", 3),
+                     _evento("MAERSK  LINE", "2025-05-03T10:00:00")])
+    linha = agregados.get("maersk line", 5)
+    assert (linha['Cliente'], linha['BUDGET'], linha['Eventos']) == ('MAERSK LINE', 0.0, 4.0)
+    assert np.isnan(linha['Performance'])
+    assert agregados.changed(meses=[5])['Cliente'].tolist() == ['MAERSK LINE']
+    assert agregados.changed(clientes=['ALIANÇA']).empty
+
+
+def test_ingestor_retoma_do_offset_e_guarda_a_linha_incompleta(tmp_path):
+    path = tmp_path / "eventos.jsonl"
+    path.write_text(_evento("ALIANÇA", "2025-04-18T08:00:00") + "\n", encoding="utf-8")
+    ingestor = EventIngestor(str(path))
+    agregados = ingestor.attach(_dataset())
+    assert agregados.eventos == 1
+
+    linha = _evento("ALIANÇA", "2025-04-18T09:00:00", 2).encode("utf-8")
+    with open(path, "ab") as f:
+        f.write(linha[:10])
+    ingestor._poll()
+    assert agregados.eventos == 1 and ingestor._resto == linha[:10]
+    with open(path, "ab") as f:
+        f.write(linha[10:] + b"\n")
+    ingestor._poll()
+    assert agregados.eventos == 2
+    assert agregados.get("ALIANÇA", 4)['Eventos'] == 3.0
+    ingestor._poll()  # nada novo: nada é relido
+    assert agregados.eventos == 2
+
+
+def test_ingestor_recomeca_quando_o_arquivo_e_truncado(tmp_path):
+    path = tmp_path / "eventos.jsonl"
+    path.write_text("".join(_evento("ALIANÇA", f"2025-04-18T0{h}:00:00") + "\n" for h in range(5)),
+                    encoding="utf-8")
+    ingestor = EventIngestor(str(path))
+    agregados = ingestor.attach(_dataset())
+    assert agregados.eventos == 5
+
+    path.write_text(_evento("BRASKEM", "2025-04-19T08:00:00") + "\n", encoding="utf-8")
+    ingestor._poll()
+    assert agregados.get("BRASKEM", 4)['Eventos'] == 1.0
+    assert ingestor._offset == path.stat().st_size
+
+
+def test_nova_versao_le_o_arquivo_desde_o_inicio(tmp_path):
+    path = tmp_path / "eventos.jsonl"
+    path.write_text(_evento("ALIANÇA", "2025-04-18T08:00:00") + "\n", encoding="utf-8")
+    ingestor = EventIngestor(str(path))
+    anteriores = ingestor.attach(_dataset("v1"))
+    assert ingestor.attach(_dataset("v1")) is anteriores
+    novos = ingestor.attach(_dataset("v2"))
+    assert novos is not anteriores and novos.eventos == 1
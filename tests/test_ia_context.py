@@ -0,0 +1,103 @@
+# test_ia_context.py
+
+import threading
+
+import ia_context
+from ia_context import AnswerCache, ContextBuilder, IAHub, StubModel
+
+
+def _mes(budget, realizado, gap):
+    return {
+        "budget": budget, "quantidade_itracker": realizado, "realizacao_budget": realizado / budget * 100,
+        "importacao": 10, "exportacao": 5, "cabotagem": 1, "aproveitamento_oportunidade": 50.0,
+        "gap_realizacao": gap,
+    }
+
+
+DADOS = {
+    "ALIANCA NAVEGACAO": {"3": _mes(100, 80, 20), "4": _mes(100, 90, 10)},
+    "BRASKEM SA": {"3": _mes(200, 50, 150), "4": _mes(200, 60, 140)},
+    "VALE LOGISTICA": {"4": _mes(50, 50, 0)},
+}
+
+
+def test_contexto_traz_so_o_cliente_citado():
+    contexto = ContextBuilder(DADOS).build("Como está a Aliança?")
+    assert contexto.splitlines()[0] == "ALIANCA NAVEGACAO"
+    assert "BRASKEM" not in contexto
+    assert " m3:" in contexto and " m4:" in contexto
+
+
+def test_contexto_filtra_os_meses_citados():
+    contexto = ContextBuilder(DADOS).build("Aliança em abril")
+    assert " m4:" in contexto
+    assert " m3:" not in contexto
+
+
+def test_meses_so_como_palavra_inteira():
+    builder = ContextBuilder(DADOS)
+    assert builder.months_in("Qual cliente tem o MAIOR gap?") == set()
+    assert builder.months_in("Marcos, como foi março e maio?") == {3, 5}
+    assert builder.months_in("Resultado do mês 4") == {4}
+    contexto = builder.build("Qual cliente tem o maior gap?")
+    assert " m3:" in contexto and " m4:" in contexto
+
+
+def test_sem_cliente_citado_usa_os_maiores_gaps():
+    builder = ContextBuilder(DADOS)
+    assert builder.relevant_clients("Quem está pior?") == ["BRASKEM SA", "ALIANCA NAVEGACAO", "VALE LOGISTICA"]
+
+
+def test_contexto_respeita_o_limite(monkeypatch):
+    monkeypatch.setattr(ia_context, "MAX_CONTEXT_CHARS", 150)
+    contexto = ContextBuilder(DADOS).build("Quem está pior?")
+    assert 0 < len(contexto) <= 150
+    assert contexto.splitlines()[0] == "BRASKEM SA"
+
+
+def test_cache_acerta_perguntas_equivalentes():
+    modelo = StubModel()
+    hub = IAHub(DADOS, modelo)
+    primeira = hub.ask("Como está a Aliança?")
+    assert primeira.startswith("Resposta local baseada em 1 cliente(s): ALIANCA NAVEGACAO")
+    assert hub.ask("como esta a alianca") == primeira
+    assert modelo.chamadas == 1
+    hub.ask("Como está a Braskem?")
+    assert modelo.chamadas == 2
+
+
+def test_cache_erra_quando_a_versao_muda():
+    cache, modelo = AnswerCache(), StubModel()
+    IAHub(DADOS, modelo, cache).ask("Como está a Vale?")
+    outros = dict(DADOS, **{"VALE LOGISTICA": {"4": _mes(50, 40, 10)}})
+    IAHub(outros, modelo, cache).ask("Como está a Vale?")
+    assert modelo.chamadas == 2
+
+
+def test_cache_expira_e_descarta_o_mais_antigo(monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(ia_context.time, "monotonic", lambda: agora[0])
+    cache = AnswerCache(max_entries=2, ttl=60)
+    cache.put("a", "v1", "A")
+    cache.put("b", "v1", "B")
+    assert cache.get("a", "v1") == "A"
+    cache.put("c", "v1", "C")  # "b" é o menos usado
+    assert cache.get("b", "v1") is None
+    agora[0] += 61
+    assert cache.get("a", "v1") is None
+
+
+def test_cache_aguenta_acessos_simultaneos():
+    cache = AnswerCache(max_entries=50)
+
+    def usar(n):
+        for i in range(500):
+            cache.put(f"pergunta {n} {i}", "v1", i)
+            cache.get(f"pergunta {n} {i - 1}", "v1")
+
+    threads = [threading.Thread(target=usar, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(cache._itens) == 50
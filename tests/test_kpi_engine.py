@@ -0,0 +1,51 @@
+# test_kpi_engine.py
+
+import numpy as np
+import pandas as pd
+
+from kpi_engine import compute_metrics_batch
+from rankings import aggregate_by_client
+
+
+def _planilha():
+    return pd.DataFrame({
+        'Cliente': ['A', 'A', 'B', 'B', 'C', 'D'],
+        'MÊS': [3, 4, 3, 4, 3, 4],
+        'BUDGET': [100.0, 100.0, 200.0, np.nan, 0.0, 50.0],
+        'Importação': [10.0, 10.0, np.nan, 40.0, 5.0, 0.0],
+        'Exportação': [5.0, 5.0, 20.0, 0.0, 5.0, 0.0],
+        'Cabotagem': [5.0, 5.0, 0.0, 0.0, 0.0, 0.0],
+        'Quantidade_iTRACKER': [60.0, 60.0, 150.0, 30.0, 8.0, 20.0],
+        'Target Acumulado': 0.0,
+        'Gap de Realização': 0.0,
+    })
+
+
+def test_todos_os_clientes_de_uma_vez():
+    kpis = compute_metrics_batch(_planilha())
+    assert kpis.index.tolist() == ['A', 'B', 'C', 'D']
+    assert kpis.loc['A', 'Performance'] == 60.0
+    assert kpis.loc['A', 'Aproveitamento'] == 300.0
+    assert kpis.loc['A', 'Classe'] == 'CRÍTICO'  # 60%
+    assert kpis.loc['B', 'Total_Oportunidades'] == 60.0
+    assert kpis.loc['B', 'Classe'] == 'ATENÇÃO'  # 180 / 200
+    assert np.isnan(kpis.loc['C', 'Performance']) and kpis.loc['C', 'Classe'] == 'CRÍTICO'
+    assert np.isnan(kpis.loc['D', 'Aproveitamento'])
+    assert kpis.loc['D', 'Classe'] == 'CRÍTICO'  # 40%
+
+
+def test_reaproveita_o_agregado_dos_rankings():
+    df = _planilha()
+    por_cliente = aggregate_by_client(df, mes_gap=4)
+    pd.testing.assert_frame_equal(compute_metrics_batch(df, por_cliente=por_cliente), compute_metrics_batch(df))
+
+
+def test_igual_ao_calculo_grupo_a_grupo():
+    df = _planilha()
+    kpis = compute_metrics_batch(df, by='MÊS')
+    for mes, grupo in df.groupby('MÊS'):
+        budget = np.nansum(grupo['BUDGET'])
+        realizado = np.nansum(grupo['Quantidade_iTRACKER'])
+        oportunidades = np.nansum(grupo[['Importação', 'Exportação', 'Cabotagem']].to_numpy())
+        assert kpis.loc[mes, 'Performance'] == realizado / budget * 100
+        assert kpis.loc[mes, 'Aproveitamento'] == realizado / oportunidades * 100
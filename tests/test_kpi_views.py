@@ -0,0 +1,24 @@
+# test_kpi_views.py
+
+import numpy as np
+import pandas as pd
+
+from kpi_views import KPIViews
+
+
+def test_categoria_vazia_nao_zera_as_oportunidades():
+    df = pd.DataFrame({
+        'Cliente': ['A', 'A', 'B'],
+        'MÊS': [1.0, 2.0, 1.0],
+        'BUDGET': [100.0, np.nan, 50.0],
+        'Importação': [10.0, 4.0, np.nan],
+        'Exportação': [np.nan, 6.0, np.nan],
+        'Cabotagem': [5.0, np.nan, np.nan],
+        'Quantidade_iTRACKER': [80.0, 20.0, np.nan],
+    })
+    views = KPIViews(df)
+    assert views.lookup().total_oportunidades == 25.0
+    assert views.lookup(meses=[1]).total_oportunidades == 15.0
+    assert views.lookup(clientes=['A'], meses=[2]).total_oportunidades == 10.0
+    assert views.by_client().loc['B', 'OPORTUNIDADES'] == 0.0
+    assert views.lookup().total_budget == 150.0
@@ -0,0 +1,72 @@
+# test_matching.py
+
+import os
+
+import pytest
+
+from matching import ClientMatcher, load_aliases
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def aliases():
+    return load_aliases(os.path.join(RAIZ, "clientes.txt"), os.path.join(RAIZ, "contas_clientes.json"))
+
+
+@pytest.fixture
+def matcher(aliases):
+    return ClientMatcher(aliases, cache_path=None)
+
+
+def test_contas_vem_do_arquivo_explicito(aliases):
+    assert aliases["SAMSUNG INTERNATIONAL INC"] == "SAMSUNG"
+    assert aliases["ALIANCA NAVEGACAO E LOGISTICA"] == "ALIANCA"
+    assert aliases["OLAM AGRICOLA LTDA"] == "OLAM"
+    # Mesmo primeiro token não basta para entrar na conta
+    assert aliases["OLAM ESTÉTICA AUTOMOTIVA LTDA"] == "OLAM ESTETICA AUTOMOTIVA LTDA"
+    assert aliases["MAERSK"] == "MAERSK"
+
+
+@pytest.mark.parametrize("nome, conta", [
+    ("samsung sds", "SAMSUNG"),
+    ("SAMSUNG ELETRONICA", "SAMSUNG"),
+    ("Samsung International Inc.", "SAMSUNG"),
+    ("Aliança", "ALIANCA"),
+    ("Alianca Navegacao", "ALIANCA"),
+    ("ALIANCA S.A. INDUSTRIA NAVAL", "ALIANCA"),
+    ("OLAM ESTETICA", "OLAM ESTETICA AUTOMOTIVA LTDA"),
+    ("Olam Agricola S.A.", "OLAM"),
+])
+def test_nomes_brutos_caem_na_conta(matcher, nome, conta):
+    assert matcher.score(nome)[0] == conta
+
+
+def test_nome_sem_relacao_fica_sem_match(matcher):
+    assert matcher.score("XYZ COMERCIO LTDA")[0] is None
+    assert matcher.match("XYZ COMERCIO LTDA") is None
+
+
+def test_palpites_caem_quando_a_lista_muda(tmp_path):
+    cache = str(tmp_path / "matches.json")
+    matcher = ClientMatcher({"OLAM": "OLAM", "OLAM AGRICOLA LTDA": "OLAM"}, cache)
+    assert matcher.match_many(["OLAM ESTETICA"]) == {"OLAM ESTETICA": "OLAM"}
+
+    mesma_lista = ClientMatcher({"OLAM": "OLAM", "OLAM AGRICOLA LTDA": "OLAM"}, cache)
+    assert mesma_lista._palpites == {"OLAM ESTETICA": "OLAM"}
+
+    nova_lista = {"OLAM": "OLAM", "OLAM AGRICOLA LTDA": "OLAM",
+                  "OLAM ESTÉTICA AUTOMOTIVA LTDA": "OLAM ESTETICA AUTOMOTIVA LTDA"}
+    matcher = ClientMatcher(nova_lista, cache)
+    assert matcher.match("OLAM ESTETICA") == "OLAM ESTETICA AUTOMOTIVA LTDA"
+
+
+def test_confirmados_valem_mesmo_com_a_lista_nova(tmp_path):
+    cache = str(tmp_path / "matches.json")
+    matcher = ClientMatcher({"OLAM": "OLAM"}, cache)
+    matcher.match("OLAM ESTETICA")
+    matcher.confirm("OLAM ESTETICA", "OLAM ESTETICA AUTOMOTIVA LTDA")
+    matcher.save_cache()
+    matcher = ClientMatcher({"OLAM": "OLAM", "MAERSK": "MAERSK"}, cache)
+    assert matcher.match("OLAM ESTETICA") == "OLAM ESTETICA AUTOMOTIVA LTDA"
+    assert matcher._palpites == {}
@@ -0,0 +1,67 @@
+# test_metrics.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from metrics import (CLASSES_PERFORMANCE, classify_performance, custom_round, custom_round_array,
+                     format_fixed_array, format_number, format_number_array, format_percent,
+                     format_percent_array)
+
+# NaN, negativos, empates de arredondamento (x.5, x.x5), fronteiras das faixas e valores grandes
+VALORES = [
+    np.nan, -0.0, 0.0, -1.0, -0.5, -999.95, -1500.0, -2_500_000.0,
+    0.5, 1.5, 2.5, 0.05, 0.15, 0.25, 1.25, 69.95, 69.99, 70.0, 99.95, 99.99, 100.0,
+    999.4, 999.5, 999.95, 1000.0, 1049.95, 1050.0, 999_949.0, 999_999.0, 1_000_000.0,
+    1_005_000.0, 1_234_567.891, 123_456_789_012.5, 1e18, np.inf, -np.inf,
+]
+
+
+def _classe_escalar(valor):
+    # Mesmas comparações de format_percent
+    if valor >= 100:
+        return 'META ATINGIDA'
+    if valor >= 70:
+        return 'ATENÇÃO'
+    return 'CRÍTICO'
+
+
+def test_format_number_array_igual_ao_escalar():
+    assert list(format_number_array(VALORES)) == [format_number(v) for v in VALORES]
+
+
+@pytest.mark.parametrize("positive_is_good", [True, False])
+def test_format_percent_array_igual_ao_escalar(positive_is_good):
+    esperado = [format_percent(v, positive_is_good) for v in VALORES]
+    assert list(format_percent_array(VALORES, positive_is_good)) == esperado
+
+
+@pytest.mark.parametrize("decimals,suffix", [(0, ""), (1, "%"), (2, " un")])
+def test_format_fixed_array_igual_a_fstring(decimals, suffix):
+    assert list(format_fixed_array(VALORES, decimals, suffix)) == [f"{v:.{decimals}f}{suffix}" for v in VALORES]
+
+
+def test_classify_performance_igual_ao_escalar():
+    classes = CLASSES_PERFORMANCE[classify_performance(VALORES)]
+    assert list(classes) == [_classe_escalar(v) for v in VALORES]
+
+
+def test_custom_round_array_igual_ao_escalar():
+    finitos = [v for v in VALORES if np.isfinite(v)]
+    resultado = custom_round_array(finitos)
+    assert resultado.dtype == np.int64
+    assert list(resultado) == [custom_round(v) for v in finitos]
+
+
+def test_custom_round_array_mantem_nan_e_inf():
+    resultado = custom_round_array([1.6, np.nan, np.inf])
+    assert resultado[0] == 2
+    assert np.isnan(resultado[1]) and np.isinf(resultado[2])
+
+
+def test_series_mantem_indice_e_nome():
+    serie = pd.Series([150.0, np.nan, 80.0], index=['a', 'b', 'c'], name='Performance')
+    for resultado in (format_percent_array(serie), format_number_array(serie), classify_performance(serie)):
+        assert isinstance(resultado, pd.Series)
+        assert list(resultado.index) == ['a', 'b', 'c'] and resultado.name == 'Performance'
+    assert list(format_percent_array(serie)) == [format_percent(v) for v in serie]
@@ -0,0 +1,69 @@
+# test_query_service.py
+
+import json
+
+import pytest
+
+from client_store import open_store
+from query_service import ClientDataIndex, QueryError, route
+
+
+def _mes(budget, realizado, gap):
+    return {"budget": budget, "importacao": 10, "exportacao": 5, "cabotagem": 5,
+            "quantidade_itracker": realizado, "target_acumulado": budget / 2, "gap_realizacao": gap}
+
+
+DADOS = {
+    "ALIANÇA": {"3": _mes(100, 40, 10), "4": _mes(100, 60, -10)},
+    "BRASKEM": {"4": _mes(300, 90, 60)},
+    "VALE": {"4": {**_mes(0, 5, "n/d")}},
+}
+
+
+@pytest.fixture
+def index(tmp_path):
+    path_json = tmp_path / "dados.json"
+    path_json.write_text(json.dumps(DADOS, ensure_ascii=False), encoding="utf-8")
+    store = open_store(str(tmp_path / "dados.sqlite"), str(path_json))
+    yield ClientDataIndex(store)
+    store.close()
+
+
+def test_importa_o_json_com_o_banco_vazio(index):
+    assert len(index.store) == 3
+    assert index.cliente("alianca", "4")["quantidade_itracker"] == 60
+
+
+def test_cliente_e_mes_inexistentes(index):
+    with pytest.raises(QueryError) as erro:
+        index.cliente("MAERSK")
+    assert erro.value.status == 404
+    with pytest.raises(QueryError):
+        index.cliente("BRASKEM", "3")
+    assert list(index.cliente("Aliança")["meses"]) == ["3", "4"]
+
+
+def test_agregados_somados_no_banco(index):
+    abril = index.agregados("4")
+    assert abril["clientes"] == 3
+    assert abril["budget"] == 400
+    assert abril["gap_realizacao"] == 50  # o texto "n/d" fica de fora
+    assert abril["realizacao_budget"] == round(155 / 400 * 100, 2)
+    assert index.agregados()["clientes"] == 3
+
+
+def test_ranking_ignora_valores_nao_numericos(index):
+    itens = index.ranking("gap_realizacao", "4")["itens"]
+    assert [(i["cliente"], i["gap_realizacao"]) for i in itens] == [("BRASKEM", 60), ("ALIANÇA", -10)]
+    assert index.ranking("gap_realizacao", n=1, ordem="asc")["itens"][0]["mes"] == 4
+    with pytest.raises(QueryError):
+        index.ranking("cliente")
+
+
+def test_nova_versao_do_banco_invalida_o_cache(index):
+    status, corpo = route(index, "/agregados?mes=4")
+    assert status == 200 and json.loads(corpo)["budget"] == 400
+    index.store.upsert({"BRASKEM": {"4": _mes(500, 90, 60)}})
+    assert route(index, "/agregados?mes=4")[1] == corpo
+    assert index.reload()
+    assert json.loads(route(index, "/agregados?mes=4")[1])["budget"] == 600
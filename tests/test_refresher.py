@@ -0,0 +1,54 @@
+# test_refresher.py
+
+import os
+import threading
+import time
+
+import pandas as pd
+
+from refresher import DataRefresher
+
+
+def _refresher(tmp_path, conteudo=b"planilha", atraso=0.0):
+    chamadas = []
+
+    def fetch():
+        chamadas.append(1)
+        time.sleep(atraso)
+        return conteudo
+
+    refresher = DataRefresher(fetch, lambda c: pd.DataFrame({"a": [len(c)]}), path=str(tmp_path / "snapshot.pkl"))
+    return refresher, chamadas
+
+
+def test_buscas_simultaneas_baixam_uma_vez(tmp_path):
+    refresher, chamadas = _refresher(tmp_path, atraso=0.2)
+    resultados = []
+    threads = [threading.Thread(target=lambda: resultados.append(refresher.refresh_now())) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(chamadas) == 1
+    assert all(r is resultados[0] for r in resultados)
+
+
+def test_mesma_versao_mantem_snapshot_e_arquivo(tmp_path):
+    refresher, _ = _refresher(tmp_path)
+    primeiro = refresher.refresh_now()
+    mtime = os.path.getmtime(tmp_path / "snapshot.pkl")
+    time.sleep(0.01)
+    assert refresher.refresh_now() is primeiro
+    assert os.path.getmtime(tmp_path / "snapshot.pkl") == mtime
+
+
+def test_falha_mantem_ultima_versao_boa(tmp_path):
+    refresher, _ = _refresher(tmp_path)
+    bom = refresher.refresh_now()
+
+    def falha():
+        raise OSError("Drive fora do ar")
+
+    refresher._fetch = falha
+    assert refresher.refresh_now() is bom
+    assert isinstance(refresher.ultimo_erro, OSError)
@@ -0,0 +1,50 @@
+# test_scenarios.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rankings import aggregate_by_client
+from scenarios import ScenarioEngine
+
+
+def _planilha():
+    # Target acumulado no dia 15: budget / 30 * 15
+    budget = np.array([300.0, 600.0, 0.0, 0.0, 120.0, np.nan])
+    realizado = np.array([100.0, 250.0, 30.0, 10.0, 40.0, 5.0])
+    target = np.round(np.nan_to_num(budget) / 30, 2) * 15
+    return pd.DataFrame({
+        'Cliente': ['A', 'A', 'B', 'B', 'C', 'C'],
+        'MÊS': [3, 4, 3, 4, 3, 4],
+        'BUDGET': budget,
+        'Importação': 10.0, 'Exportação': 5.0, 'Cabotagem': 0.0,
+        'Quantidade_iTRACKER': realizado,
+        'Target Acumulado': target,
+        'Gap de Realização': target - realizado,
+    })
+
+
+def test_atual_reproduz_o_gap_da_planilha():
+    df = _planilha()
+    engine = ScenarioEngine(aggregate_by_client(df, mes_gap=4))
+    assert engine.dia == 15
+    gap = engine.run().by_client('ATUAL').set_index('Cliente')['Gap de Realização']
+    esperado = df[df['MÊS'] == 4].set_index('Cliente')['Gap de Realização']
+    np.testing.assert_allclose(gap[esperado.index], esperado)
+
+
+def test_cliente_sem_budget_ganha_target_do_novo_budget():
+    engine = ScenarioEngine(aggregate_by_client(_planilha(), mes_gap=4))
+    engine.transfer("A PARA B", 'A', 'B', 0.5)
+    resultado = engine.run().by_client("A PARA B").set_index('Cliente')
+    # B recebe 450 no recorte (2 meses, sem budget antes): 225 no mês do GAP
+    assert resultado.loc['B', 'Gap de Realização'] == pytest.approx(225 / 30 * 15 - 10)
+    # A fica com 450, na mesma proporção de antes (2/3 no mês do GAP)
+    assert resultado.loc['A', 'Gap de Realização'] == pytest.approx(300 / 30 * 15 - 250)
+
+
+def test_escala_o_target_com_o_budget():
+    engine = ScenarioEngine(aggregate_by_client(_planilha(), mes_gap=3))
+    engine.scale("+10%", 1.1)
+    resultado = engine.run().by_client("+10%").set_index('Cliente')
+    np.testing.assert_allclose(resultado['Gap de Realização'], [330 / 2 - 100, -30, 132 / 2 - 40])
@@ -0,0 +1,107 @@
+# test_shared_dataset.py
+
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dataset import SharedDataset, build_shared_dataset
+from kpi_views import KPIViews
+from shared_dataset import ATUAL_FILE, SharedReader, load_published, publish
+from synthetic_data import make_workbook_df
+from trends import TrendEngine
+
+CARGA = datetime(2025, 4, 17, 12, 0)
+
+
+def _dataset(n_clientes=20, seed=42):
+    df = make_workbook_df(n_clientes, seed=seed)
+    # Coluna de texto extra com vazios, como as observações da planilha
+    df['Observação'] = pd.Series("revisar", index=df.index).where(np.arange(len(df)) % 3 == 0)
+    df.loc[5, 'MÊS'] = np.nan
+    return build_shared_dataset(df, CARGA)
+
+
+def _publicar(dataset, pasta, instante=1000):
+    destino = publish(dataset, KPIViews(dataset.df), TrendEngine(dataset.df), str(pasta))
+    # mtime explícito: publicações separadas no tempo, sem depender da resolução do relógio
+    os.utime(destino, (instante, instante))
+    return destino
+
+
+def test_ida_e_volta_preserva_o_dataset(tmp_path):
+    dataset = _dataset()
+    publicado = load_published(_publicar(dataset, tmp_path))
+
+    assert publicado.dataset.versao == dataset.versao
+    assert publicado.dataset.carregado_em == CARGA
+    assert publicado.dataset.qualidade == dataset.qualidade
+    pd.testing.assert_frame_equal(publicado.dataset.df, dataset.df)
+    # Numéricas mapeadas do disco, somente leitura
+    budget = publicado.dataset.df['BUDGET'].to_numpy()
+    assert not budget.flags.writeable
+    assert isinstance(budget.base, np.memmap) or isinstance(budget, np.memmap)
+    assert publicado.dataset.df['Observação'].isna().sum() == dataset.df['Observação'].isna().sum()
+
+
+def test_codigos_ausentes_nas_colunas_de_texto(tmp_path):
+    # Cliente vazio (código -1 no factorize) volta como NaN, não como a última categoria
+    base = _dataset().df
+    df = base.assign(Cliente=np.where(np.arange(len(base)) % 7 == 0, None, base['Cliente'].to_numpy()))
+    dataset = SharedDataset(df, "com-vazios", CARGA, _dataset().qualidade)
+    publicado = load_published(publish(dataset, KPIViews(df.dropna(subset=['Cliente'])),
+                                       TrendEngine(df.dropna(subset=['Cliente'])), str(tmp_path)))
+    clientes = publicado.dataset.df['Cliente']
+    assert clientes.isna().tolist() == df['Cliente'].isna().tolist()
+    assert clientes.dropna().tolist() == df['Cliente'].dropna().tolist()
+
+
+def test_agregados_mapeados_respondem_como_os_recalculados(tmp_path):
+    dataset = _dataset()
+    publicado = load_published(_publicar(dataset, tmp_path))
+    kpis, tendencias = KPIViews(dataset.df), TrendEngine(dataset.df)
+    clientes = dataset.clientes[:3]
+
+    assert publicado.kpi_views.lookup() == kpis.lookup()
+    assert publicado.kpi_views.lookup(meses=[3, 4]) == kpis.lookup(meses=[3, 4])
+    assert publicado.kpi_views.lookup([5], clientes) == kpis.lookup([5], clientes)
+    pd.testing.assert_frame_equal(publicado.kpi_views.by_client(), kpis.by_client())
+    pd.testing.assert_frame_equal(publicado.tendencias.monthly_totals(clientes), tendencias.monthly_totals(clientes))
+    pares = (clientes * 2, [1, 6, 12, 2, 0, 7])
+    pd.testing.assert_frame_equal(publicado.tendencias.lookup(*pares), tendencias.lookup(*pares))
+
+
+def test_leitor_troca_de_versao_com_o_atual(tmp_path):
+    leitor = SharedReader(str(tmp_path))
+    assert leitor.attach() is None
+
+    v1, v2 = _dataset(seed=1), _dataset(seed=2)
+    _publicar(v1, tmp_path)
+    primeiro = leitor.attach()
+    assert primeiro.dataset.versao == v1.versao
+    assert leitor.attach() is primeiro  # ATUAL igual: nada é remapeado
+
+    _publicar(v2, tmp_path, 2000)
+    assert leitor.current_version() == v2.versao
+    assert leitor.attach().dataset.versao == v2.versao
+
+
+def test_versao_ilegivel_mantem_a_anterior(tmp_path):
+    leitor = SharedReader(str(tmp_path))
+    _publicar(_dataset(seed=1), tmp_path)
+    anterior = leitor.attach()
+    (tmp_path / ATUAL_FILE).write_text("nao-existe")
+    assert leitor.attach() is anterior
+    assert leitor.ultimo_erro is not None
+
+
+@pytest.mark.parametrize("n_versoes", [2, 4])
+def test_limpar_mantem_so_a_versao_anterior(tmp_path, n_versoes):
+    versoes = [_dataset(seed=s).versao for s in range(n_versoes)]
+    for s in range(n_versoes):
+        _publicar(_dataset(seed=s), tmp_path, 1000 * (s + 1))
+    restantes = {nome for nome in os.listdir(tmp_path) if (tmp_path / nome).is_dir()}
+    assert restantes == set(versoes[-2:])
+    assert (tmp_path / ATUAL_FILE).read_text() == versoes[-1]
@@ -0,0 +1,29 @@
+# test_templates.py
+
+import templates
+from templates import HtmlTemplate
+
+
+def test_template_minifica_e_preenche_os_campos():
+    t = HtmlTemplate("""
+    <div class='a'>
+        <b>{titulo}</b> {{literal}} {titulo}
+    </div>
+    """, fixo="X")
+    assert t.campos == ["titulo"]
+    assert t(titulo="T") == "<div class='a'><b>T</b> {literal} T </div>"
+
+
+def test_campos_fixos_entram_na_parte_estatica():
+    t = HtmlTemplate("<p>{fixo}|{valor}</p>", fixo="{a}")
+    assert t.campos == ["valor"]
+    assert t(valor=1) == "<p>{a}|1</p>"
+
+
+def test_blocos_cacheados_aceitam_listas():
+    itens = ["um", "<b>dois</b>"]
+    bloco = templates.insight_block("INSIGHTS", itens, "intro")
+    assert "<p>intro</p>" in bloco and "<ul><li>um</li><li><b>dois</b></li></ul>" in bloco
+    assert templates.insight_block("INSIGHTS", list(itens), "intro") is bloco
+    assert "<ul></ul>" in templates.insight_block("VAZIO", [])
+    assert "<ol><li>r</li></ol>" in templates.conclusions_block("i", itens, "<li>r</li>")
@@ -0,0 +1,44 @@
+# test_version_diff.py
+
+import numpy as np
+import pandas as pd
+
+from schema import apply_schema
+from version_diff import diff_tables, row_table
+
+
+def _planilha(linhas):
+    colunas = ['Cliente', 'MÊS', 'BUDGET', 'Importação', 'Exportação', 'Cabotagem',
+               'Quantidade_iTRACKER', 'Target Acumulado', 'Gap de Realização']
+    return apply_schema(pd.DataFrame(linhas, columns=colunas))[0]
+
+
+V1 = [
+    ["ALIANCA", 3, 100, 10, 5, 5, 30, 50, 20],
+    ["BRASKEM", 3, 200, 20, 0, 0, 60, 100, 40],
+    ["VALE", 4, 80, 2, 2, 2, 20, 40, 20],
+]
+
+
+def test_vazio_novo_nao_altera_as_outras_chaves():
+    v1 = _planilha(V1)
+    v2 = _planilha(V1 + [["MAERSK", 4, np.nan, 1, 1, 1, 5, 10, 5]])
+    assert v1['BUDGET'].dtype.kind == 'i' and v2['BUDGET'].dtype.kind == 'f'
+    diff = diff_tables(row_table(v1), row_table(v2), "v1", "v2")
+    assert diff.adicionados.tolist() == [("MAERSK", 4.0)]
+    assert diff.modificados.empty and diff.removidos.empty
+
+
+def test_mes_vazio_nao_altera_as_outras_chaves():
+    v2 = _planilha(V1 + [["MAERSK", np.nan, 10, 1, 1, 1, 5, 10, 5]])
+    diff = diff_tables(row_table(_planilha(V1)), row_table(v2), "v1", "v2")
+    assert diff.adicionados.tolist() == [("MAERSK", 0.0)]
+    assert diff.modificados.empty
+
+
+def test_valor_alterado_marca_so_a_sua_chave():
+    v2 = [linha[:] for linha in V1]
+    v2[1][6] = 65
+    diff = diff_tables(row_table(_planilha(V1)), row_table(_planilha(v2)), "v1", "v2")
+    assert diff.modificados.tolist() == [("BRASKEM", 3.0)]
+    assert diff.adicionados.empty and diff.removidos.empty
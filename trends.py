@@ -0,0 +1,132 @@
+# trends.py
+
+import numpy as np
+import pandas as pd
+
+MESES = np.arange(1, 13)
+JANELA = 3  # meses da performance móvel
+
+COLUNAS = ['BUDGET', 'Realizado', 'Var_MoM', 'Var_MoM_%', 'YTD_Budget', 'YTD_Realizado',
+           'YTD_Performance', 'Perf_3M']
+
+
+def _percentual(numerador, denominador):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominador > 0, numerador / denominador * 100, np.nan)
+
+
+def _comparacoes(budget, realizado):
+    """
+    Todas as comparações a partir das matrizes (cliente × mês) de budget e realizado.
+
+    As somas acumuladas no eixo dos meses dão o YTD direto e a janela móvel
+    como diferença de duas posições do acumulado (acum[m] - acum[m - 3]).
+    """
+    acum_budget = np.cumsum(budget, axis=-1)
+    acum_realizado = np.cumsum(realizado, axis=-1)
+
+    anterior = np.zeros_like(realizado)
+    anterior[..., 1:] = realizado[..., :-1]
+    var_mom = realizado - anterior
+
+    def janela(acum):
+        deslocado = np.zeros_like(acum)
+        deslocado[..., JANELA:] = acum[..., :-JANELA]
+        return acum - deslocado
+
+    return {
+        'BUDGET': budget,
+        'Realizado': realizado,
+        'Var_MoM': var_mom,
+        'Var_MoM_%': _percentual(var_mom, anterior),
+        'YTD_Budget': acum_budget,
+        'YTD_Realizado': acum_realizado,
+        'YTD_Performance': _percentual(acum_realizado, acum_budget),
+        'Perf_3M': _percentual(janela(acum_realizado), janela(acum_budget)),
+    }
+
+
+class TrendEngine:
+    """
+    Variação mês a mês, YTD e performance móvel de 3 meses de todos os clientes.
+
+    Monta uma vez por versão as matrizes (cliente × mês) de BUDGET e realizado
+    e calcula todas as comparações de uma vez com somas acumuladas. Linhas sem
+    mês válido ficam de fora.
+    """
+
+    def __init__(self, df):
+        meses = df['MÊS'].to_numpy(dtype=float)
+        validos = np.isin(meses, MESES)
+        clientes, cod_cliente = np.unique(df['Cliente'].to_numpy(dtype=object)[validos], return_inverse=True)
+        cod_mes = meses[validos].astype(np.int64) - 1
+
+        budget = np.zeros((len(clientes), len(MESES)))
+        realizado = np.zeros((len(clientes), len(MESES)))
+        np.add.at(budget, (cod_cliente, cod_mes), np.nan_to_num(df['BUDGET'].to_numpy(dtype=float)[validos]))
+        np.add.at(realizado, (cod_cliente, cod_mes),
+                  np.nan_to_num(df['Quantidade_iTRACKER'].to_numpy(dtype=float)[validos]))
+        self._montar(clientes, budget, realizado)
+
+    def _montar(self, clientes, budget, realizado, por_cliente=None):
+        self.clientes = clientes
+        self._cliente_idx = {c: i for i, c in enumerate(clientes)}
+        self._budget = budget
+        self._realizado = realizado
+        self._por_cliente = _comparacoes(budget, realizado) if por_cliente is None else por_cliente
+
+    @classmethod
+    def from_arrays(cls, clientes, budget, realizado, por_cliente=None):
+        """
+        Motor a partir das matrizes (cliente × mês) já calculadas, ex.: publicadas
+        por shared_dataset. Sem `por_cliente`, as comparações são recalculadas.
+        """
+        engine = object.__new__(cls)
+        engine._montar(clientes, budget, realizado, por_cliente)
+        return engine
+
+    def to_arrays(self):
+        """(clientes, budget, realizado, comparações): o suficiente para recriar o motor com from_arrays."""
+        return self.clientes, self._budget, self._realizado, self._por_cliente
+
+    def by_client(self):
+        """
+        Comparações de cada (Cliente, MÊS).
+
+        Retorna:
+            DataFrame: Indexado por (Cliente, MÊS), com as colunas de COLUNAS.
+        """
+        idx = pd.MultiIndex.from_product([self.clientes, MESES], names=['Cliente', 'MÊS'])
+        return pd.DataFrame({col: valores.ravel() for col, valores in self._por_cliente.items()}, index=idx)
+
+    def monthly_totals(self, clientes=()):
+        """
+        Comparações da soma dos clientes selecionados (vazio = todos), mês a mês.
+
+        Retorna:
+            DataFrame: Uma linha por mês, indexado por MÊS.
+        """
+        if clientes:
+            ci = [self._cliente_idx[c] for c in clientes if c in self._cliente_idx]
+            budget, realizado = self._budget[ci].sum(axis=0), self._realizado[ci].sum(axis=0)
+        else:
+            budget, realizado = self._budget.sum(axis=0), self._realizado.sum(axis=0)
+        return pd.DataFrame(_comparacoes(budget, realizado), index=pd.Index(MESES, name='MÊS'))
+
+    def lookup(self, clientes, meses):
+        """
+        Comparações para pares (cliente, mês) quaisquer, na ordem recebida.
+
+        Pares sem cliente conhecido ou com mês inválido voltam como NaN.
+        """
+        clientes = np.asarray(clientes, dtype=object)
+        meses = np.asarray(meses, dtype=float)
+        if not len(self.clientes):
+            return pd.DataFrame(np.nan, index=range(len(clientes)), columns=COLUNAS)
+        ci = np.array([self._cliente_idx.get(c, -1) for c in clientes], dtype=np.int64)
+        validos = (ci >= 0) & np.isin(meses, MESES)
+        mi = np.where(validos, meses, 1).astype(np.int64) - 1
+        return pd.DataFrame({
+            col: np.where(validos, valores[np.where(validos, ci, 0), mi], np.nan)
+            for col, valores in self._por_cliente.items()
+        })
@@ -0,0 +1,218 @@
+# version_diff.py
+
+import os
+import pickle
+import tempfile
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from refresher import CACHE_DIR
+from schema import SCHEMA
+
+LINHAS_FILE = os.path.join(CACHE_DIR, "linhas_ultima_versao.pkl")
+CHAVE = ['Cliente', 'MÊS']
+SEM_MES = 0  # MÊS usado na chave das linhas sem mês válido
+
+# Colunas comparadas no detalhe das linhas alteradas
+COLUNAS_VALOR = [c.nome for c in SCHEMA if c.tipo == 'numero' and c.nome != 'MÊS']
+
+
+def _chaves(df):
+    return pd.MultiIndex.from_arrays(
+        [df['Cliente'].to_numpy(dtype=object), df['MÊS'].fillna(SEM_MES).to_numpy(dtype=float)], names=CHAVE
+    )
+
+
+def _tipos_estaveis(df):
+    # apply_schema deixa uma coluna numérica como int64 sem vazios e float64
+    # com algum vazio: com tudo em float64 o hash das linhas não muda junto
+    inteiras = [c for c, tipo in df.dtypes.items() if isinstance(tipo, np.dtype) and tipo.kind in 'iub']
+    return df.astype(dict.fromkeys(inteiras, 'float64')) if inteiras else df
+
+
+def row_table(df):
+    """
+    Uma linha por (Cliente, MÊS) com o hash do conteúdo e a soma das colunas numéricas.
+
+    O hash de cada (Cliente, MÊS) é a soma (módulo 2^64) dos hashes das
+    linhas da planilha com essa chave, então não depende da ordem das linhas.
+    As colunas inteiras entram no hash como float64, para que um vazio
+    novo em outra linha não mude o hash das chaves que não mudaram.
+
+    Retorna:
+        DataFrame: Indexado por (Cliente, MÊS), com `hash` e as colunas de COLUNAS_VALOR presentes.
+    """
+    chaves = _chaves(df)
+    codigos, unicas = pd.factorize(chaves, sort=True)
+    hashes = np.zeros(len(unicas), dtype=np.uint64)
+    np.add.at(hashes, codigos, pd.util.hash_pandas_object(_tipos_estaveis(df), index=False).to_numpy())
+    colunas = [c for c in COLUNAS_VALOR if c in df.columns]
+    tabela = df[colunas].groupby(codigos).sum(min_count=1)
+    tabela.index = pd.MultiIndex.from_tuples(unicas, names=CHAVE)
+    tabela['hash'] = hashes
+    return tabela
+
+
+def rows_for(df, chaves):
+    """Linhas do DataFrame cujas (Cliente, MÊS) estão em `chaves`."""
+    if not len(chaves):
+        return df.iloc[0:0]
+    return df[_chaves(df).isin(chaves)]
+
+
+@dataclass(frozen=True)
+class VersionDiff:
+    """
+    Diferença linha a linha entre duas versões dos dados, por (Cliente, MÊS).
+
+    `detalhes` tem uma linha por chave alterada, com o tipo da alteração, as
+    colunas que mudaram e BUDGET/realizado antes e depois.
+    """
+    versao_anterior: str
+    versao: str
+    adicionados: pd.MultiIndex
+    removidos: pd.MultiIndex
+    modificados: pd.MultiIndex
+    detalhes: pd.DataFrame
+
+    @property
+    def vazio(self):
+        return not (len(self.adicionados) or len(self.removidos) or len(self.modificados))
+
+    @property
+    def chaves(self):
+        """Todas as chaves afetadas."""
+        return self.adicionados.append(self.removidos).append(self.modificados)
+
+    @property
+    def alterados(self):
+        """Chaves com conteúdo novo (adicionadas ou modificadas)."""
+        return self.adicionados.append(self.modificados)
+
+    @property
+    def meses(self):
+        """Meses válidos com alguma linha afetada."""
+        return sorted({m for m in self.chaves.get_level_values('MÊS') if m != SEM_MES})
+
+
+def _detalhes(anterior, nova, adicionados, removidos, modificados):
+    colunas = [c for c in COLUNAS_VALOR if c in anterior.columns and c in nova.columns]
+    chaves = adicionados.append(removidos).append(modificados)
+    antes = anterior.reindex(chaves)
+    depois = nova.reindex(chaves)
+    diferentes = ~((antes[colunas].to_numpy() == depois[colunas].to_numpy())
+                   | (antes[colunas].isna().to_numpy() & depois[colunas].isna().to_numpy()))
+    tipos = np.repeat(["adicionada", "removida", "alterada"], [len(adicionados), len(removidos), len(modificados)])
+    alteradas = [
+        ", ".join(np.array(colunas)[linha]) or "outras colunas" if tipo == "alterada" else ""
+        for tipo, linha in zip(tipos, diferentes)
+    ]
+
+    def par(col):
+        return (antes[col].to_numpy() if col in antes else np.nan), (depois[col].to_numpy() if col in depois else np.nan)
+
+    budget_antes, budget_depois = par('BUDGET')
+    realizado_antes, realizado_depois = par('Quantidade_iTRACKER')
+    return pd.DataFrame({
+        'Cliente': chaves.get_level_values('Cliente'),
+        'MÊS': chaves.get_level_values('MÊS'),
+        'Alteração': tipos,
+        'Colunas alteradas': alteradas,
+        'BUDGET antes': budget_antes,
+        'BUDGET depois': budget_depois,
+        'Realizado antes': realizado_antes,
+        'Realizado depois': realizado_depois,
+    })
+
+
+def diff_tables(anterior, nova, versao_anterior, versao):
+    """
+    Compara as tabelas de row_table de duas versões.
+
+    Retorna:
+        VersionDiff
+    """
+    comuns = anterior.index.intersection(nova.index)
+    adicionados = nova.index.difference(anterior.index)
+    removidos = anterior.index.difference(nova.index)
+    mudou = anterior['hash'].reindex(comuns).to_numpy() != nova['hash'].reindex(comuns).to_numpy()
+    modificados = comuns[mudou]
+    return VersionDiff(versao_anterior, versao, adicionados, removidos, modificados,
+                       _detalhes(anterior, nova, adicionados, removidos, modificados))
+
+
+class VersionHistory:
+    """
+    Última versão dos dados vista pelo processo (persistida em disco) e o
+    diff de cada versão nova contra a anterior.
+
+    Quando chega uma versão nova, o diff é aplicado ao armazenamento
+    estruturado (client_store.ClientStore): só os pares (cliente, mês)
+    tocados pelo diff são regravados, com todas as linhas que ainda caem
+    neles, e os que ficaram sem linhas são apagados. Só o processo que
+    publica os dados deve passar `store`.
+
+    Parâmetros:
+        store (ClientStore, opcional): Armazenamento atualizado a cada versão.
+        path (str): Arquivo com a tabela de linhas da última versão.
+    """
+
+    def __init__(self, store=None, path=LINHAS_FILE):
+        self._store = store
+        self._path = path
+        self._lock = threading.Lock()
+        self._diffs = {}
+        self._versao, self._tabela, diff = self._load_from_disk()
+        if self._versao is not None:
+            self._diffs[self._versao] = diff
+
+    def observe(self, dataset):
+        """
+        Registra a versão do dataset (na primeira vez que aparece).
+
+        Retorna:
+            VersionDiff | None: Diff contra a versão anterior (None se não houver anterior).
+        """
+        with self._lock:
+            if dataset.versao in self._diffs:
+                return self._diffs[dataset.versao]
+            nova = row_table(dataset.df)
+            diff = None
+            if self._tabela is not None:
+                diff = diff_tables(self._tabela, nova, self._versao, dataset.versao)
+            if self._store is not None:
+                if diff is None:
+                    self._store.write_frame(dataset.df)
+                else:
+                    self._store.replace(dataset.df, diff.chaves)
+            self._versao, self._tabela = dataset.versao, nova
+            self._diffs[dataset.versao] = diff
+            self._save_to_disk(diff)
+            return diff
+
+    def diff_for(self, versao):
+        """Diff já calculado da versão (None se for a primeira ou se ainda não foi observada)."""
+        return self._diffs.get(versao)
+
+    def _load_from_disk(self):
+        try:
+            with open(self._path, "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError, TypeError):
+            return None, None, None
+
+    def _save_to_disk(self, diff):
+        # Mesmo esquema do snapshot: arquivo temporário + rename
+        pasta = os.path.dirname(self._path) or "."
+        os.makedirs(pasta, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((self._versao, self._tabela, diff), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)